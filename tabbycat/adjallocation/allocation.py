@@ -1,7 +1,11 @@
 import logging
 from warnings import warn
 
+from django.db import transaction
+
 from adjallocation.models import DebateAdjudicator
+from privateurls.utils import bump_landing_version_on_commit
+from tournaments.models import Round
 
 logger = logging.getLogger(__name__)
 
@@ -203,3 +207,81 @@ class AdjudicatorAllocation:
             _, created = self.container.related_adjudicator_set.update_or_create(
                     adjudicator=adj, defaults={'type': t})
             logger.debug("%s: %s, %s, %s", "Created" if created else "Updated", self.container, adj, t)
+
+
+def sync_related_adjudicators(model, field, panels):
+    """Makes the related adjudicators of each container in `panels`, a dict
+    mapping containers to lists of `(adjudicator, type)` pairs, match it.
+    `model` is the related adjudicator model and `field` the name of its
+    foreign key to the container.
+
+    Rows for adjudicators who stay on a panel are kept, and only their `type`
+    updated, so that anything that cascades from them (e.g. scores and
+    feedback given by that adjudicator) survives. This uses one query to
+    fetch the existing rows, then at most one delete, one `bulk_update()` and
+    one `bulk_create()`, in a single transaction. (For debates, it also finds
+    their tournaments, to invalidate private URL landing pages, and
+    invalidates diversity data.)
+
+    Returns a dict mapping container IDs to lists of the related adjudicator
+    instances, with `adjudicator` populated, so that callers can serialize the
+    result without querying it again."""
+    containers = {container.id: container for container in panels}
+    existing = {(getattr(row, field + '_id'), row.adjudicator_id): row
+                for row in model.objects.filter(**{field + '_id__in': containers.keys()})}
+
+    rows = {}
+    to_create = []
+    to_update = []
+    for container, panel in panels.items():
+        rows[container.id] = []
+        for adj, t in panel:
+            row = existing.pop((container.id, adj.id), None)
+            if row is None:
+                row = model(**{field: container}, adjudicator=adj, type=t)
+                to_create.append(row)
+            else:
+                if row.type != t:
+                    row.type = t
+                    to_update.append(row)
+                row.adjudicator = adj
+                setattr(row, field, container)
+            rows[container.id].append(row)
+
+    with transaction.atomic():
+        if existing:
+            model.objects.filter(id__in=[row.id for row in existing.values()]).delete()
+        if to_update:
+            model.objects.bulk_update(to_update, ['type'])
+        if to_create:
+            model.objects.bulk_create(to_create)
+        # Bulk operations don't send signals, so invalidate landing pages and
+        # diversity data here
+        if model is DebateAdjudicator and (existing or to_update or to_create):
+            for tournament_id in Round.objects.filter(debate__in=containers.keys()).values_list(
+                    'tournament_id', flat=True).order_by().distinct():
+                bump_landing_version_on_commit('draw', tournament_id)
+            from standings.diversity import bump_diversity_version  # avoid circular import
+            transaction.on_commit(bump_diversity_version)
+
+    return rows
+
+
+def bulk_save_allocations(allocations):
+    """Saves many allocations at once, replacing the existing adjudicators of
+    their containers, which must all be of the same model. This uses
+    `sync_related_adjudicators()`, which takes a fixed number of queries,
+    rather than the queries per adjudicator that `AdjudicatorAllocation.save()`
+    uses. Like `save()`, it keeps the rows of adjudicators who stay on a panel.
+
+    Returns a dict mapping container IDs to lists of the related adjudicator
+    instances, with `adjudicator` populated, so that callers can serialize the
+    result without querying it again."""
+    allocations = list(allocations)
+    if not allocations:
+        return {}
+
+    manager = allocations[0].container.related_adjudicator_set
+    panels = {alloc.container: [(adj, t) for adj, t in alloc.with_debateadj_types() if adj]
+              for alloc in allocations}
+    return sync_related_adjudicators(manager.model, manager.field.name, panels)
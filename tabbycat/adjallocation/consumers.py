@@ -13,15 +13,15 @@ from participants.prefetch import populate_win_counts
 from tournaments.models import Round
 from users.permissions import Permission
 
+from .allocation import bulk_save_allocations
 from .allocators.base import AdjudicatorAllocationError
 from .allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
-from .models import PreformedPanel
+from .models import PreformedPanel, PreformedPanelAdjudicator
 from .preformed import copy_panels_to_debates
 from .preformed.anticipated import calculate_anticipated_draw
 from .preformed.direct import DirectPreformedPanelAllocator
 from .preformed.hungarian import HungarianPreformedPanelAllocator
-from .serializers import (EditPanelAdjsPanelSerializer,
-                          SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer,
+from .serializers import (EditPanelAdjsPanelSerializer, SimpleDebateImportanceSerializer,
                           SimplePanelAllocationSerializer, SimplePanelImportanceSerializer)
 
 logger = logging.getLogger(__name__)
@@ -33,6 +33,9 @@ class PanelEditConsumer(BaseAdjudicatorContainerConsumer):
     importance_serializer = SimplePanelImportanceSerializer
     adjudicators_serializer = SimplePanelAllocationSerializer
     access_permission = Permission.EDIT_PREFORMEDPANELS
+    adjudicator_model = PreformedPanelAdjudicator
+    adjudicator_container_field = 'panel'
+    adjudicator_prefetch = 'preformedpaneladjudicator_set__adjudicator'
 
 
 class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
@@ -82,7 +85,7 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                 allocator = DirectPreformedPanelAllocator(debates, panels, round)
 
             debates, panels = allocator.allocate()
-            copy_panels_to_debates(debates, panels)
+            rows = copy_panels_to_debates(debates, panels)
 
             self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_DEBATES_AUTO)
 
@@ -105,8 +108,8 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                 self.return_error(event['extra']['group_name'], str(e))
                 return
 
-            for alloc in allocation:
-                alloc.save()
+            rows = bulk_save_allocations(allocation)
+            debates = [alloc.container for alloc in allocation]
 
             self.log_action(event['extra'], round, ActionLogEntry.ActionType.ADJUDICATORS_AUTO)
 
@@ -121,10 +124,8 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                 msg = _("Successfully auto-allocated adjudicators to debates.")
                 level = 'success'
 
-        # TODO: return debates directly from allocator function?
-        content = self.reserialize_debates(SimpleDebateAllocationSerializer, round)
-
-        self.return_response(content, event['extra']['group_name'], msg, level)
+        content = self.serialize_allocations(rows, debates, round)
+        self.return_data_response(content, event['extra']['group_name'], msg, level)
 
     def allocate_panel_adjs(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
@@ -150,11 +151,10 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             self.return_error(event['extra']['group_name'], str(e))
             return
 
-        for alloc in allocation:
-            alloc.save()
+        rows = bulk_save_allocations(allocation)
 
         self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_ADJUDICATOR_AUTO)
-        content = self.reserialize_panels(SimplePanelAllocationSerializer, round)
+        content = self.serialize_allocations(rows, [alloc.container for alloc in allocation])
 
         if user_warnings:
             msg = ngettext(
@@ -167,7 +167,7 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             msg = _("Successfully auto-allocated adjudicators to preformed panels.")
             level = 'success'
 
-        self.return_response(content, event['extra']['group_name'], mark_safe(msg), level)
+        self.return_data_response(content, event['extra']['group_name'], mark_safe(msg), level)
 
     def _prioritise_by_bracket(self, instances, bracket_attrname):
         instances = instances.order_by('-' + bracket_attrname)
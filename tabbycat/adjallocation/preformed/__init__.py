@@ -1,5 +1,10 @@
 from itertools import zip_longest
 
+from django.db.models import prefetch_related_objects
+
+from adjallocation.allocation import sync_related_adjudicators
+from adjallocation.models import DebateAdjudicator
+
 from .base import registry
 # These imports add the allocator classes in those files to the registry.
 from . import dumb
@@ -15,11 +20,21 @@ def copy_panels_to_debates(debates, panels):
     debate just has its adjudicators cleared. Panels without a corresponding
     debate are ignored. The iterable `debates` must not contain `None`
     (otherwise this function will stop copying there).
+
+    Adjudicators who stay on a debate keep their `DebateAdjudicator` rows, as
+    with `sync_related_adjudicators()`, which this uses to take a fixed number
+    of queries. Returns a dict mapping debate IDs to lists of the
+    `DebateAdjudicator` instances.
     """
+    pairs = []
     for debate, panel in zip_longest(debates, panels, fillvalue=None):
         if debate is None:
             break
-        debate.debateadjudicator_set.all().delete()
-        if panel is not None:
-            for ppa in panel.preformedpaneladjudicator_set.all():
-                debate.debateadjudicator_set.create(adjudicator=ppa.adjudicator, type=ppa.type)
+        pairs.append((debate, panel))
+
+    prefetch_related_objects([panel for debate, panel in pairs if panel is not None],
+        'preformedpaneladjudicator_set__adjudicator')
+
+    return sync_related_adjudicators(DebateAdjudicator, 'debate', {
+        debate: [(ppa.adjudicator, ppa.type) for ppa in (panel.preformedpaneladjudicator_set.all() if panel is not None else [])]
+        for debate, panel in pairs})
@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from adjallocation.allocation import AdjudicatorAllocation, bulk_save_allocations
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from results.models import SpeakerScoreByAdj, TeamScoreByAdj
+from utils.tests import CompletedTournamentTestMixin
+
+
+class BulkSaveAllocationsTestCase(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_bulk_save_allocations(self):
+        adjs = list(self.tournament.adjudicator_set.all())
+        debates = list(self.round.debate_set.all()[:len(adjs) // 2])
+        allocations = [AdjudicatorAllocation(debate, chair=adjs[2*i], trainees=[adjs[2*i+1]])
+                       for i, debate in enumerate(debates)]
+
+        rows = bulk_save_allocations(allocations)
+
+        for alloc in allocations:
+            saved = AdjudicatorAllocation(alloc.container, from_db=True)
+            self.assertEqual(saved.chair, alloc.chair)
+            self.assertEqual(saved.panellists, [])
+            self.assertEqual(saved.trainees, alloc.trainees)
+            self.assertEqual({(row.adjudicator_id, row.type) for row in rows[alloc.container.id]},
+                {(alloc.chair.id, DebateAdjudicator.TYPE_CHAIR), (alloc.trainees[0].id, DebateAdjudicator.TYPE_TRAINEE)})
+
+    def test_bulk_save_keeps_staying_adjudicators(self):
+        debates = [debate for debate in self.round.debate_set_with_prefetches(teams=False)
+                   if len(list(debate.adjudicators.voting())) > 1]
+        self.assertTrue(debates)
+
+        # Feedback from each chair on the rest of its panel
+        for debate in debates:
+            source = debate.debateadjudicator_set.get(adjudicator=debate.adjudicators.chair)
+            for adj in debate.adjudicators.panellists:
+                AdjudicatorFeedback.objects.create(adjudicator=adj, score=3, source_adjudicator=source,
+                    confirmed=True, submitter_type=AdjudicatorFeedback.Submitter.TABROOM)
+
+        def counts():
+            return (SpeakerScoreByAdj.objects.filter(debate_adjudicator__debate__in=debates).count(),
+                    TeamScoreByAdj.objects.filter(debate_adjudicator__debate__in=debates).count(),
+                    AdjudicatorFeedback.objects.filter(source_adjudicator__debate__in=debates).count())
+
+        before = counts()
+        self.assertTrue(all(before))
+        debateadj_ids = set(DebateAdjudicator.objects.filter(debate__in=debates).values_list('id', flat=True))
+
+        # Swap each chair with its first panellist
+        allocations = []
+        for debate in debates:
+            old = debate.adjudicators
+            allocations.append(AdjudicatorAllocation(debate, chair=old.panellists[0],
+                panellists=[old.chair] + old.panellists[1:], trainees=old.trainees))
+        bulk_save_allocations(allocations)
+
+        self.assertEqual(counts(), before)
+        self.assertEqual(set(DebateAdjudicator.objects.filter(debate__in=debates).values_list('id', flat=True)), debateadj_ids)
+        for alloc in allocations:
+            saved = AdjudicatorAllocation(alloc.container, from_db=True)
+            self.assertEqual(saved.chair, alloc.chair)
+            self.assertCountEqual(saved.panellists, alloc.panellists)
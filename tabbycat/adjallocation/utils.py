@@ -4,8 +4,6 @@ from itertools import combinations, product
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 
-from participants.models import Adjudicator, Team
-
 from .conflicts import ConflictsInfo
 
 
@@ -14,8 +12,10 @@ def adjudicator_conflicts_display(debates):
     strings of explaining conflicts between adjudicators and teams, and
     conflicts between adjudicators and each other."""
 
-    adjudicators = Adjudicator.objects.filter(debateadjudicator__debate__in=debates)
-    teams = Team.objects.filter(debateteam__debate__in=debates)
+    # Use the participants already loaded with the debates, rather than
+    # querying them again through the debates
+    adjudicators = list({adj.id: adj for debate in debates for adj in debate.adjudicators.all()}.values())
+    teams = list({team.id: team for debate in debates for team in debate.teams}.values())
     conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
 
     conflict_messages = {debate: [] for debate in debates}
@@ -7,12 +7,16 @@ by a front-end interface as well."""
 import itertools
 import logging
 import random
+from collections import defaultdict
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max, Q
 
 from adjallocation.models import DebateAdjudicator
 from draw.models import DebateTeam
 from participants.models import Adjudicator, Team
+from standings.diversity import bump_diversity_version
 
 from . import models as fm
 
@@ -67,6 +71,82 @@ def add_feedback_to_round(round, **kwargs):
         add_feedback(debate, **kwargs)
 
 
+def add_feedback_to_round_bulk(round, submitter_type, user, probability=1.0, discarded=False, confirmed=False, batch_size=1000):
+    """Like ``add_feedback_to_round()``, but generates all feedback (and
+    answers) for the round in memory and writes them using batched inserts,
+    inside a single transaction. Arguments are as for ``add_feedback()``.
+    Returns a list of the AdjudicatorFeedback objects created."""
+
+    if discarded and confirmed:
+        raise ValueError("Feedback can't be both discarded and confirmed!")
+
+    t = round.tournament
+    questions = list(t.adj_feedback_questions)
+    debates = round.debate_set_with_prefetches(teams=True, adjudicators=True, speakers=False, venues=False)
+
+    fbs = []
+    for debate in debates:
+        if debate.adjudicators.chair is None:
+            raise ValueError("This debate ({}) doesn't have a chair.".format(debate.matchup))
+        debateadjs = {da.adjudicator_id: da for da in debate.debateadjudicator_set.all()}
+
+        for source, adj in _sources_and_subjects(debate, t):
+            if random.random() > probability:
+                continue
+
+            fb = fm.AdjudicatorFeedback(submitter_type=submitter_type, adjudicator=adj,
+                    score=float(random.randrange(1, 6)), discarded=discarded, confirmed=confirmed)
+            if submitter_type == fm.AdjudicatorFeedback.Submitter.TABROOM:
+                fb.submitter = user
+            if isinstance(source, Adjudicator):
+                fb.source_adjudicator = debateadjs[source.id]
+            else:
+                fb.source_team = next(dt for dt in debate.debateteams if dt.team_id == source.id)
+            fbs.append(fb)
+
+    with transaction.atomic():
+        # Mirror what Submission.save() does for each feedback submission
+        existing = fm.AdjudicatorFeedback.objects.filter(
+            Q(source_adjudicator__debate__round=round) | Q(source_team__debate__round=round))
+        versions = {(a, sa, st): v for a, sa, st, v in existing.values(
+            'adjudicator_id', 'source_adjudicator_id', 'source_team_id').annotate(
+            Max('version')).values_list('adjudicator_id', 'source_adjudicator_id', 'source_team_id', 'version__max')}
+        for fb in fbs:
+            fb.version = versions.get((fb.adjudicator_id, fb.source_adjudicator_id, fb.source_team_id), 0) + 1
+
+        if confirmed:
+            orallist = t.pref('feedback_from_teams') == 'orallist'
+            keys = {(None if orallist and fb.source_team_id else fb.adjudicator_id, fb.source_adjudicator_id, fb.source_team_id) for fb in fbs}
+            unconfirm = [fb_id for fb_id, a, sa, st in existing.filter(confirmed=True).values_list(
+                'id', 'adjudicator_id', 'source_adjudicator_id', 'source_team_id')
+                if (None if orallist and st else a, sa, st) in keys]
+            fm.AdjudicatorFeedback.objects.filter(id__in=unconfirm).update(confirmed=False)
+
+        fm.AdjudicatorFeedback.objects.bulk_create(fbs, batch_size=batch_size)
+
+        # Answers refer to feedback generically, so need the feedback IDs first
+        answers = defaultdict(list)
+        for fb in fbs:
+            for question in questions:
+                if fb.source_team and not question.from_team:
+                    continue
+                if fb.source_adjudicator and not question.from_adj:
+                    continue
+                answer = _random_answer(question, fb.score)
+                if answer is not None:
+                    answers[question.answer_type_class].append(
+                        question.answer_type_class(question=question, content_object=fb, answer=answer))
+
+        for model, objs in answers.items():
+            model.objects.bulk_create(objs, batch_size=batch_size)
+
+        # Bulk operations don't send the signals that would do this
+        transaction.on_commit(bump_diversity_version)
+
+    logger.info("[%s] Added %d feedback submissions to %s in bulk", t.slug, len(fbs), round.name)
+    return fbs
+
+
 def delete_all_feedback_for_round(round):
     """Deletes all feedback for the given round."""
     fm.AdjudicatorFeedback.objects.filter(source_adjudicator__debate__round=round).delete()
@@ -79,6 +159,49 @@ def delete_feedback(debate):
     fm.AdjudicatorFeedback.objects.filter(source_team__debate=debate).delete()
 
 
+def _sources_and_subjects(debate, tournament):
+    """Returns a list of 2-tuples (source, subject) of feedback expected in
+    the debate, where source is a Team or Adjudicator and subject is an
+    Adjudicator."""
+    if tournament.pref('feedback_from_teams') == 'all-adjs':
+        sources_and_subjects = [(team, adj) for team in debate.teams for adj in debate.adjudicators.all()]
+    elif tournament.pref('feedback_from_teams') == 'orallist':
+        sources_and_subjects = [(team, debate.adjudicators.chair) for team in debate.teams]
+    else:
+        sources_and_subjects = []
+
+    sources_and_subjects.extend(itertools.permutations(
+        (adj for adj, position in debate.adjudicators.with_debateadj_types()), 2))
+    return sources_and_subjects
+
+
+def _random_answer(question, score):
+    """Returns a random answer to the question, consistent with the score.
+    Returns None if the question should be left unanswered."""
+    if question.ANSWER_TYPE_TYPES[question.answer_type] is bool:
+        answer = random.choice([None, True, False])
+    elif question.ANSWER_TYPE_TYPES[question.answer_type] is int:
+        min_value = int(question.min_value) or 0
+        max_value = int(question.max_value) or 10
+        answer = random.randrange(min_value, max_value+1)
+    elif question.ANSWER_TYPE_TYPES[question.answer_type] is float:
+        min_value = question.min_value or 0
+        max_value = question.max_value or 10
+        answer = random.uniform(min_value, max_value)
+    elif question.ANSWER_TYPE_TYPES[question.answer_type] is str:
+        if question.answer_type == fm.AdjudicatorFeedbackQuestion.AnswerType.LONGTEXT:
+            answer = random.choice(COMMENTS[score])
+        elif question.answer_type == fm.AdjudicatorFeedbackQuestion.AnswerType.SINGLE_SELECT:
+            answer = random.choice(question.choices)
+        else:
+            answer = random.choice(WORDS[score])
+    elif question.ANSWER_TYPE_TYPES[question.answer_type] is list:
+        answer = random.sample(question.choices, random.randint(0, len(question.choices_for_field)))
+    else:
+        raise TypeError("Answer type class not recognized: " + question.ANSWER_TYPE_TYPES[question.answer_type].__name__)
+    return answer
+
+
 def add_feedback(debate, submitter_type, user, probability=1.0, discarded=False, confirmed=False):
     """Adds feedback to a debate.
     Specifically, adds feedback from both teams on the chair, and from every
@@ -98,19 +221,9 @@ def add_feedback(debate, submitter_type, user, probability=1.0, discarded=False,
     if debate.adjudicators.chair is None:
         raise ValueError("This debate ({}) doesn't have a chair.".format(debate.matchup))
 
-    if debate.round.tournament.pref('feedback_from_teams') == 'all-adjs':
-        sources_and_subjects = [(team, adj) for team in debate.teams for adj in debate.adjudicators.all()]
-    elif debate.round.tournament.pref('feedback_from_teams') == 'orallist':
-        sources_and_subjects = [(team, debate.adjudicators.chair) for team in debate.teams]
-    else:
-        sources_and_subjects = []
-
-    sources_and_subjects.extend(itertools.permutations(
-        (adj for adj, position in debate.adjudicators.with_debateadj_types()), 2))
-
     fbs = list()
 
-    for source, adj in sources_and_subjects:
+    for source, adj in _sources_and_subjects(debate, debate.round.tournament):
 
         if random.random() > probability:
             logger.info(" - Skipping %s on %s", source, adj)
@@ -143,29 +256,9 @@ def add_feedback(debate, submitter_type, user, probability=1.0, discarded=False,
             if fb.source_adjudicator and not question.from_adj:
                 continue
 
-            if question.ANSWER_TYPE_TYPES[question.answer_type] is bool:
-                answer = random.choice([None, True, False])
-                if answer is None:
-                    continue
-            elif question.ANSWER_TYPE_TYPES[question.answer_type] is int:
-                min_value = int(question.min_value) or 0
-                max_value = int(question.max_value) or 10
-                answer = random.randrange(min_value, max_value+1)
-            elif question.ANSWER_TYPE_TYPES[question.answer_type] is float:
-                min_value = question.min_value or 0
-                max_value = question.max_value or 10
-                answer = random.uniform(min_value, max_value)
-            elif question.ANSWER_TYPE_TYPES[question.answer_type] is str:
-                if question.answer_type == fm.AdjudicatorFeedbackQuestion.AnswerType.LONGTEXT:
-                    answer = random.choice(COMMENTS[score])
-                elif question.answer_type == fm.AdjudicatorFeedbackQuestion.AnswerType.SINGLE_SELECT:
-                    answer = random.choice(question.choices)
-                else:
-                    answer = random.choice(WORDS[score])
-            elif question.ANSWER_TYPE_TYPES[question.answer_type] is list:
-                answer = random.sample(question.choices, random.randint(0, len(question.choices_for_field)))
-            else:
-                raise TypeError("Answer type class not recognized: " + question.ANSWER_TYPE_TYPES[question.answer_type].__name__)
+            answer = _random_answer(question, score)
+            if answer is None:
+                continue
 
             question.answer_type_class(question=question, content_object=fb, answer=answer).save()
 
@@ -7,7 +7,7 @@ from adjfeedback.models import AdjudicatorFeedback
 from draw.models import Debate
 from utils.management.base import RoundCommand
 
-from ...dbutils import add_feedback, add_feedback_to_round, delete_all_feedback_for_round, delete_feedback
+from ...dbutils import add_feedback, add_feedback_to_round, add_feedback_to_round_bulk, delete_all_feedback_for_round, delete_feedback
 
 OBJECT_TYPE_CHOICES = ["round", "debate"]
 SUBMITTER_TYPE_MAP = {
@@ -50,6 +50,10 @@ class Command(RoundCommand):
         parser.add_argument("--create-user",
                             help="Create user if it doesn't exist",
                             action="store_true")
+        parser.add_argument("--bulk",
+                            help="Generate all feedback for each round in memory and "
+                            "insert it using batched writes, in one transaction per round",
+                            action="store_true")
 
     @staticmethod
     def _get_user(options):
@@ -102,7 +106,8 @@ class Command(RoundCommand):
             raise CommandError(e)
 
     def handle_round(self, round, **options):
-        return self.handle_object(round, attrgetter('name'), delete_all_feedback_for_round, add_feedback_to_round, **options)
+        add_func = add_feedback_to_round_bulk if options["bulk"] else add_feedback_to_round
+        return self.handle_object(round, attrgetter('name'), delete_all_feedback_for_round, add_func, **options)
 
     def handle_debate(self, debate, **options):
         return self.handle_object(debate, attrgetter('matchup'), delete_feedback, add_feedback, **options)
@@ -7,18 +7,26 @@ one. Each tracker reports whether is expected, submitted and fulfilled. Then,
 instances of aggregation classes (subclasses of BaseFeedbackProgress)
 instantiate a collection of trackers for a particular source (team or
 adjudicator).
+
+Trackers are only built for individual participants. For all participants at
+once, `get_feedback_progress()` computes just the counts, in bulk.
  """
 
 import logging
+from collections import Counter, defaultdict
 from operator import attrgetter
 
+from django.db.models import Count
+
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
 from draw.models import DebateTeam
+from results.models import TeamScoreByAdj
 from results.prefetch import populate_confirmed_ballots
 from tournaments.models import Round
 
-from .utils import expected_feedback_targets
+from .utils import expected_feedback_targets, feedback_targets_in_allocation
 
 logger = logging.getLogger(__name__)
 
@@ -263,7 +271,6 @@ class FeedbackProgressForTeam(BaseFeedbackProgress):
 
     @staticmethod
     def _submitted_feedback_queryset_operations(queryset):
-        # this is also used by get_feedback_progress
         return queryset.filter(confirmed=True,
             source_team__debate__round__stage=Round.Stage.PRELIMINARY).select_related(
             'adjudicator', 'adjudicator__institution', 'source_team__debate__round')
@@ -274,7 +281,6 @@ class FeedbackProgressForTeam(BaseFeedbackProgress):
 
     @staticmethod
     def _debateteam_queryset_operations(queryset):
-        # this is also used by get_feedback_progress
         debateteams = queryset.filter(
             debate__ballotsubmission__confirmed=True,
             debate__round__silent=False,
@@ -331,7 +337,6 @@ class FeedbackProgressForAdjudicator(BaseFeedbackProgress):
 
     @staticmethod
     def _submitted_feedback_queryset_operations(queryset):
-        # this is also used by get_feedback_progress
         return queryset.filter(confirmed=True,
             source_adjudicator__debate__round__stage=Round.Stage.PRELIMINARY).select_related(
             'adjudicator', 'adjudicator__institution', 'source_adjudicator__debate__round')
@@ -342,7 +347,6 @@ class FeedbackProgressForAdjudicator(BaseFeedbackProgress):
 
     @staticmethod
     def _debateadjudicator_queryset_operations(queryset):
-        # this is also used by get_feedback_progress
         return queryset.filter(
             debate__ballotsubmission__confirmed=True,
             debate__round__stage=Round.Stage.PRELIMINARY,
@@ -372,58 +376,180 @@ class FeedbackProgressForAdjudicator(BaseFeedbackProgress):
         return trackers
 
 
+class FeedbackProgressSummary:
+    """Counts of the feedback expected from and submitted by a participant,
+    with the same counting methods as BaseFeedbackProgress, but without
+    trackers. These are computed in bulk by `get_feedback_progress()`; for the
+    individual trackers, use FeedbackProgressForTeam or
+    FeedbackProgressForAdjudicator."""
+
+    def __init__(self, num_expected=0, num_submitted=0, num_fulfilled=0):
+        self._num_expected = num_expected
+        self._num_submitted = num_submitted
+        self._num_fulfilled = num_fulfilled
+
+    def num_submitted(self):
+        return self._num_submitted
+
+    def num_expected(self):
+        return self._num_expected
+
+    def num_fulfilled(self):
+        return self._num_fulfilled
+
+    def num_unsubmitted(self):
+        return self.num_expected() - self.num_fulfilled()
+
+    def coverage(self):
+        if self.num_expected() == 0:
+            return 1.0
+        return self.num_fulfilled() / self.num_expected()
+
+
+class FeedbackProgressSummaryForTeam(FeedbackProgressSummary):
+
+    def __init__(self, team, *args, **kwargs):
+        self.team = team
+        super().__init__(*args, **kwargs)
+
+
+class FeedbackProgressSummaryForAdjudicator(FeedbackProgressSummary):
+
+    def __init__(self, adjudicator, *args, **kwargs):
+        self.adjudicator = adjudicator
+        super().__init__(*args, **kwargs)
+
+
+def _majority_adjudicator_ids(tournament):
+    """Returns a dict mapping debate IDs to sets of the IDs of adjudicators in
+    the majority of the confirmed ballot, for preliminary debates with
+    per-adjudicator ballots. This mirrors
+    `DebateResultByAdjudicator.majority_adjudicators()`."""
+    if tournament.pref('teams_in_debate') != 2:
+        return {}
+
+    votes = TeamScoreByAdj.objects.filter(
+        ballot_submission__confirmed=True, win=True,
+        debate_team__debate__round__tournament=tournament,
+        debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
+    ).values_list('debate_team__debate_id', 'debate_team__side',
+                  'debate_adjudicator__adjudicator_id', 'debate_adjudicator__type')
+
+    adjs_by_side = defaultdict(lambda: defaultdict(set))
+    chair_votes = {}
+    for debate_id, side, adj_id, adj_type in votes:
+        adjs_by_side[debate_id][side].add(adj_id)
+        if adj_type == DebateAdjudicator.TYPE_CHAIR:
+            chair_votes[debate_id] = side
+
+    majorities = {}
+    for debate_id, sides in adjs_by_side.items():
+        num_votes = Counter({side: len(adjs) for side, adjs in sides.items()}).most_common()
+        if len(num_votes) > 1 and num_votes[0][1] == num_votes[1][1]:
+            winner = chair_votes.get(debate_id)  # split panel: chair's casting vote
+        else:
+            winner = num_votes[0][0]
+        majorities[debate_id] = sides.get(winner, set())
+    return majorities
+
+
 def get_feedback_progress(tournament):
-    """Returns a list of FeedbackProgressForTeam objects and a list of
-    FeedbackProgressForAdjudicator objects.
-
-    This function pre-populates the FeedbackProgress objects to avoid needing
-    duplicate SQL queries for every team and adjudicator, so it should be used
-    for performance when the feedback progress of all teams and adjudicators is
-    needed."""
-
-    teams_progress = []
-    adjs_progress = []
-
-    teams = tournament.team_set.prefetch_related('speaker_set').all()
-
-    submitted_feedback_by_team_id = {team.id: [] for team in teams}
-    submitted_feedback_teams = AdjudicatorFeedback.objects.filter(
-            source_team__team__in=teams).select_related('source_team')
-    submitted_feedback_teams = FeedbackProgressForTeam._submitted_feedback_queryset_operations(submitted_feedback_teams)
-    for feedback in submitted_feedback_teams:
-        submitted_feedback_by_team_id[feedback.source_team.team_id].append(feedback)
-
-    debateteams_by_team_id = {team.id: [] for team in teams}
-    debateteams = DebateTeam.objects.filter(team__in=teams)
-    debateteams = FeedbackProgressForTeam._debateteam_queryset_operations(debateteams)
-    for debateteam in debateteams:
-        debateteams_by_team_id[debateteam.team_id].append(debateteam)
-
-    for team in teams:
-        progress = FeedbackProgressForTeam(team)
-        progress._submitted_feedback = submitted_feedback_by_team_id[team.id]
-        progress._debateteams = debateteams_by_team_id[team.id]
-        teams_progress.append(progress)
-
-    adjudicators = tournament.adjudicator_set.all()
-
-    submitted_feedback_by_adj_id = {adj.id: [] for adj in adjudicators}
-    submitted_feedback_adjs = AdjudicatorFeedback.objects.filter(
-            source_adjudicator__adjudicator__in=adjudicators).select_related('source_adjudicator')
-    submitted_feedback_adjs = FeedbackProgressForAdjudicator._submitted_feedback_queryset_operations(submitted_feedback_adjs)
-    for feedback in submitted_feedback_adjs:
-        submitted_feedback_by_adj_id[feedback.source_adjudicator.adjudicator_id].append(feedback)
-
-    debateadjs_by_adj_id = {adj.id: [] for adj in adjudicators}
-    debateadjs = DebateAdjudicator.objects.filter(adjudicator__in=adjudicators)
-    debateadjs = FeedbackProgressForAdjudicator._debateadjudicator_queryset_operations(debateadjs)
-    for debateadj in debateadjs:
-        debateadjs_by_adj_id[debateadj.adjudicator_id].append(debateadj)
-
-    for adj in adjudicators:
-        progress = FeedbackProgressForAdjudicator(adj)
-        progress._submitted_feedback = submitted_feedback_by_adj_id[adj.id]
-        progress._debateadjudicators = debateadjs_by_adj_id[adj.id]
-        adjs_progress.append(progress)
+    """Returns a list of FeedbackProgressSummaryForTeam objects and a list of
+    FeedbackProgressSummaryForAdjudicator objects, one for each team and
+    adjudicator in the tournament.
+
+    Rather than building trackers, this counts expected, submitted and
+    fulfilled feedback for everyone at once, from grouped queries on debate
+    allocations and feedback, so it should be used when the progress of all
+    teams and adjudicators is needed."""
+
+    feedback_paths = tournament.pref('feedback_paths')
+    feedback_from_teams = tournament.pref('feedback_from_teams')
+    enforce_orallist = (tournament.pref("show_splitting_adjudicators") and
+                        tournament.pref("ballots_per_debate_prelim") == 'per-adj')
+
+    # Panels of preliminary debates with confirmed ballots
+    debateadjs = DebateAdjudicator.objects.filter(
+        debate__round__tournament=tournament,
+        debate__round__stage=Round.Stage.PRELIMINARY,
+        debate__ballotsubmission__confirmed=True,
+    ).values_list('id', 'debate_id', 'adjudicator_id', 'type')
+    debateadjs = list(debateadjs)
+
+    panels = {}
+    for _, debate_id, adj_id, adj_type in debateadjs:
+        panel = panels.setdefault(debate_id, AdjudicatorAllocation(None))
+        if adj_type == DebateAdjudicator.TYPE_CHAIR:
+            panel.chair = adj_id
+        elif adj_type == DebateAdjudicator.TYPE_PANEL:
+            panel.panellists.append(adj_id)
+        elif adj_type == DebateAdjudicator.TYPE_TRAINEE:
+            panel.trainees.append(adj_id)
+
+    # Number of confirmed feedbacks from each source on each target
+    def _feedback_counts(source_field, owner_field):
+        counts = AdjudicatorFeedback.objects.filter(**{
+            'confirmed': True,
+            source_field + '__debate__round__stage': Round.Stage.PRELIMINARY,
+            source_field + '__' + owner_field + '__tournament': tournament,
+        }).values_list(source_field + '_id', source_field + '__' + owner_field + '_id', 'adjudicator_id').annotate(
+            Count('id')).order_by()
+        by_target = {}
+        submitted = Counter()
+        for source_id, owner_id, target_id, count in counts:
+            by_target[(source_id, target_id)] = count
+            submitted[owner_id] += count
+        return by_target, submitted
+
+    # Teams
+    expected = Counter()
+    fulfilled = Counter()
+    by_target, submitted = _feedback_counts('source_team', 'team')
+
+    if feedback_from_teams in ['orallist', 'all-adjs']:
+        debateteams = DebateTeam.objects.filter(
+            team__tournament=tournament,
+            debate__ballotsubmission__confirmed=True,
+            debate__round__silent=False,
+            debate__round__stage=Round.Stage.PRELIMINARY,
+        ).values_list('id', 'debate_id', 'team_id')
+        majorities = _majority_adjudicator_ids(tournament) if enforce_orallist and feedback_from_teams == 'orallist' else None
+
+        for dt_id, debate_id, team_id in debateteams:
+            panel = panels.get(debate_id, AdjudicatorAllocation(None))
+            if feedback_from_teams == 'all-adjs':
+                # One expected feedback on each adjudicator
+                for adj_id in panel.all():
+                    expected[team_id] += 1
+                    fulfilled[team_id] += by_target.get((dt_id, adj_id)) == 1
+            else:
+                # One expected feedback on the orallist
+                if majorities is not None:
+                    majority = majorities.get(debate_id, set())
+                    targets = [panel.chair] if panel.chair in majority else majority
+                else:
+                    targets = panel.voting()
+                expected[team_id] += 1
+                fulfilled[team_id] += sum(by_target.get((dt_id, adj_id), 0) for adj_id in targets) == 1
+
+    teams_progress = [FeedbackProgressSummaryForTeam(team, expected[team.id], submitted[team.id], fulfilled[team.id])
+                      for team in tournament.team_set.prefetch_related('speaker_set').all()]
+
+    # Adjudicators
+    expected = Counter()
+    fulfilled = Counter()
+    by_target, submitted = _feedback_counts('source_adjudicator', 'adjudicator')
+    adjudicators = list(tournament.adjudicator_set.all())
+    adj_ids = {adj.id for adj in adjudicators}
+
+    for da_id, debate_id, adj_id, adj_type in debateadjs:
+        if adj_id not in adj_ids:
+            continue
+        for target_id, _ in feedback_targets_in_allocation(panels[debate_id], adj_type, adj_id, feedback_paths):
+            expected[adj_id] += 1
+            fulfilled[adj_id] += by_target.get((da_id, target_id)) == 1
+
+    adjs_progress = [FeedbackProgressSummaryForAdjudicator(adj, expected[adj.id], submitted[adj.id], fulfilled[adj.id])
+                     for adj in adjudicators]
 
     return teams_progress, adjs_progress
@@ -5,7 +5,8 @@ from django.utils.translation import gettext as _, ngettext
 from utils.misc import reverse_tournament
 from utils.tables import TabbycatTableBuilder
 
-from .progress import FeedbackProgressForAdjudicator, FeedbackProgressForTeam
+from .progress import (FeedbackProgressForAdjudicator, FeedbackProgressForTeam, FeedbackProgressSummaryForAdjudicator,
+                       FeedbackProgressSummaryForTeam)
 
 logger = logging.getLogger(__name__)
 
@@ -168,10 +169,10 @@ class FeedbackTableBuilder(TabbycatTableBuilder):
         if self._show_record_links:
 
             def _record_link(progress):
-                if isinstance(progress, FeedbackProgressForTeam):
+                if isinstance(progress, (FeedbackProgressForTeam, FeedbackProgressSummaryForTeam)):
                     url_name = 'participants-team-record' if self.admin else 'participants-public-team-record'
                     pk = progress.team.pk
-                elif isinstance(progress, FeedbackProgressForAdjudicator):
+                elif isinstance(progress, (FeedbackProgressForAdjudicator, FeedbackProgressSummaryForAdjudicator)):
                     url_name = 'participants-adjudicator-record' if self.admin else 'participants-public-adjudicator-record'
                     pk = progress.adjudicator.pk
                 else:
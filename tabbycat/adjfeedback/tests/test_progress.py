@@ -14,7 +14,7 @@ from utils.tests import suppress_logs
 from venues.models import Venue
 
 from ..progress import FeedbackExpectedSubmissionFromAdjudicatorTracker, FeedbackExpectedSubmissionFromTeamTracker
-from ..progress import FeedbackProgressForAdjudicator, FeedbackProgressForTeam
+from ..progress import FeedbackProgressForAdjudicator, FeedbackProgressForTeam, get_feedback_progress
 
 
 class TestFeedbackProgress(TestCase):
@@ -49,6 +49,11 @@ class TestFeedbackProgress(TestCase):
     # because the teams and adjudicators change often and the related managers
     # won't be updated to account for that.
 
+    def _tournament(self):
+        # A fresh instance, so that preferences aren't read from the cache of
+        # `self.tournament`, as the trackers (via `team.tournament`) don't
+        return Tournament.objects.get(id=self.tournament.id)
+
     def _team(self, t):
         return Team.objects.get(tournament=self.tournament, reference=t)
 
@@ -121,6 +126,13 @@ class TestFeedbackProgress(TestCase):
 
         return debate
 
+    def assertSummaryMatchesTrackers(self, progress, summaries, participant): # noqa
+        """Checks that the counts from get_feedback_progress() for the same
+        participant agree with those from the trackers in `progress`."""
+        summary = next(s for s in summaries if getattr(s, participant) == getattr(progress, participant))
+        for method in ['num_submitted', 'num_expected', 'num_fulfilled', 'num_unsubmitted', 'coverage']:
+            self.assertEqual(getattr(summary, method)(), getattr(progress, method)(), method)
+
     def _create_feedback(self, source, target, confirmed=True, ignored=False):
         if isinstance(source, DebateTeam):
             source_kwargs = dict(source_team=source)
@@ -316,6 +328,7 @@ class TestFeedbackProgress(TestCase):
         self.assertEqual(progress.num_fulfilled(), fulfilled)
         self.assertEqual(progress.num_unsubmitted(), unsubmitted)
         self.assertAlmostEqual(progress.coverage(), coverage)
+        self.assertSummaryMatchesTrackers(progress, get_feedback_progress(self._tournament())[0], 'team')
         return progress
 
     def test_team_progress_all_good_orallist(self):
@@ -410,6 +423,7 @@ class TestFeedbackProgress(TestCase):
         self.assertEqual(progress.num_fulfilled(), fulfilled)
         self.assertEqual(progress.num_unsubmitted(), unsubmitted)
         self.assertAlmostEqual(progress.coverage(), coverage)
+        self.assertSummaryMatchesTrackers(progress, get_feedback_progress(self._tournament())[1], 'adjudicator')
         return progress
 
     def test_adjudicator_progress_all_good(self):
@@ -53,15 +53,33 @@ def expected_feedback_targets(debateadj, feedback_paths=None, debate=None):
 
     if debate is None:
         debate = debateadj.debate
-    adjudicators = debate.adjudicators
+
+    return feedback_targets_in_allocation(debate.adjudicators, debateadj.type, debateadj.adjudicator_id,
+            feedback_paths, key=lambda adj: adj.id)
+
+
+def feedback_targets_in_allocation(adjudicators, source_type, source, feedback_paths, key=None):
+    """Returns a list of 2-tuples `(adj, pos)` for the members of the
+    AdjudicatorAllocation `adjudicators` that an adjudicator of type
+    `source_type` (a DebateAdjudicator.TYPE_* constant) on that panel is
+    expected to give feedback on. This implements the rules for
+    `expected_feedback_targets()`, without needing model instances.
+
+    `source` identifies the source adjudicator, and is compared with `key(adj)`
+    for each member `adj` of the panel, or `adj` itself if `key` is None. This
+    allows the allocation to hold adjudicator IDs rather than instances."""
+
+    if key is None:
+        def key(adj):
+            return adj
 
     if feedback_paths == 'no-adjs':
         targets = []
-    elif feedback_paths == 'all-adjs' or debateadj.type == DebateAdjudicator.TYPE_CHAIR:
-        targets = [(adj, pos) for adj, pos in adjudicators.with_positions() if adj.id != debateadj.adjudicator_id]
-    elif feedback_paths == 'with-p-on-p' and debateadj.type == DebateAdjudicator.TYPE_PANEL:
-        targets = [(adj, pos) for adj, pos in adjudicators.with_positions() if adj.id != debateadj.adjudicator_id and pos != AdjudicatorAllocation.POSITION_TRAINEE]
-    elif feedback_paths in ['with-t-on-c', 'with-p-on-p'] or (feedback_paths == 'with-p-on-c' and debateadj.type == DebateAdjudicator.TYPE_PANEL):
+    elif feedback_paths == 'all-adjs' or source_type == DebateAdjudicator.TYPE_CHAIR:
+        targets = [(adj, pos) for adj, pos in adjudicators.with_positions() if key(adj) != source]
+    elif feedback_paths == 'with-p-on-p' and source_type == DebateAdjudicator.TYPE_PANEL:
+        targets = [(adj, pos) for adj, pos in adjudicators.with_positions() if key(adj) != source and pos != AdjudicatorAllocation.POSITION_TRAINEE]
+    elif feedback_paths in ['with-t-on-c', 'with-p-on-p'] or (feedback_paths == 'with-p-on-c' and source_type == DebateAdjudicator.TYPE_PANEL):
         if adjudicators.has_chair:
             targets = [(adjudicators.chair, AdjudicatorAllocation.POSITION_CHAIR)]
         else:
@@ -1,12 +1,27 @@
+import csv
+import hashlib
+import json
 import operator
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from django.utils.translation import get_language
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.serializers import Serializer
+from rest_framework.utils.encoders import JSONEncoder
 
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
+from results.utils import get_results_version
 from tournaments.models import Round, Tournament
 
+from .pagination import KeysetPagination
 from .permissions import IsAdminOrReadOnly, PerTournamentPermissionRequired, PublicIfReleasedPermission, PublicPreferencePermission
 
 
@@ -90,3 +105,147 @@ class OnReleasePublicAPIMixin(TournamentPublicAPIMixin):
 
 class PublicAPIMixin:
     permission_classes = [IsAdminOrReadOnly | PerTournamentPermissionRequired]
+
+
+class ResultsVersionCacheMixin:
+    """Caches the data of GET responses under a key derived from the
+    tournament, the query parameters and the results version, and sets a
+    strong ETag and Last-Modified derived from the same. Conditional requests
+    that match are answered with 304 Not Modified before any data is generated.
+
+    Views call `versioned_response()` with a function that generates the
+    response, or use `list()` for viewsets."""
+
+    results_cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
+    cached_headers = ('Link',)
+
+    def get_response_cache_key(self, request, version):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        parts = [
+            self.__class__.__name__, self.tournament.id, self.kwargs.get('round_seq'), query,
+            request.accepted_renderer.format,
+            request.user.is_anonymous,  # serializers redact some fields for the public
+            get_language(), version,
+        ]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def versioned_response(self, request, generate):
+        version, modified = get_results_version()
+        key = self.get_response_cache_key(request, version)
+        headers = {'ETag': '"%s"' % key, 'Last-Modified': http_date(modified)}
+
+        response = get_conditional_response(request._request, etag=headers['ETag'], last_modified=modified)
+        if response is None:
+            cache_key = "api_versioned_response_%s" % key
+            cached = cache.get(cache_key)
+            if cached is None:
+                response = generate()
+                # Keep pagination links, which are in headers
+                cached = (response.data, {h: response[h] for h in self.cached_headers if response.has_header(h)})
+                cache.set(cache_key, cached, self.results_cache_timeout)
+            data, cached_headers = cached
+            response = Response(data)
+            headers.update(cached_headers)
+
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(request, lambda: super(ResultsVersionCacheMixin, self).list(request, *args, **kwargs))
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer, which returns what it's asked to write
+    so that it can be streamed."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_fieldnames(serializer, prefix=""):
+    """Returns the CSV columns of `serializer`'s output: its readable fields,
+    with the fields of nested serializers as dotted keys."""
+    names = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, Serializer):
+            names.extend(_csv_fieldnames(field, prefix + name + "."))
+        else:
+            names.append(prefix + name)
+    return names
+
+
+def _flatten(data, fieldnames, prefix=""):
+    """Flattens nested dicts into one dict with dotted keys, for CSV, down to
+    the columns in `fieldnames`. Lists, and dicts that are columns themselves
+    (e.g. from JSON fields), are written as JSON."""
+    flat = {}
+    for key, value in data.items():
+        name = prefix + key
+        if isinstance(value, dict) and name not in fieldnames:
+            flat.update(_flatten(value, fieldnames, name + "."))
+        elif isinstance(value, (dict, list)):
+            flat[name] = json.dumps(value, cls=JSONEncoder)
+        else:
+            flat[name] = value
+    return flat
+
+
+class BulkExportMixin:
+    """For viewsets of large collections. On list requests:
+      - `cursor` or `page_size` parameters select keyset pagination, instead
+        of limit/offset pagination;
+      - the `export` parameter (`ndjson` or `csv`) streams the whole collection,
+        fetched in chunks and serialized one object at a time, so that memory
+        use stays constant.
+    """
+
+    export_chunk_size = 500
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.request is not None and (
+                'cursor' in self.request.query_params or 'page_size' in self.request.query_params):
+            self._paginator = KeysetPagination()
+        return super().paginator
+
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get('export')
+        if export is None:
+            return super().list(request, *args, **kwargs)
+
+        formats = {
+            'ndjson': (self.stream_ndjson, 'application/x-ndjson'),
+            'csv': (self.stream_csv, 'text/csv'),
+        }
+        if export not in formats:
+            raise ValidationError({'export': "Must be one of: %s" % ", ".join(formats)})
+        stream, content_type = formats[export]
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(stream(self.iter_serialized(queryset)), content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (self.tournament.slug, export)
+        return response
+
+    def iter_serialized(self, queryset):
+        # iterator() with a chunk size still runs the queryset's prefetches,
+        # for each chunk
+        for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+            yield self.get_serializer(instance).data
+
+    def stream_ndjson(self, rows):
+        encoder = JSONEncoder()
+        for row in rows:
+            yield encoder.encode(row) + "\n"
+
+    def stream_csv(self, rows):
+        # Columns come from the serializer rather than the first row, which
+        # might lack keys that later rows have (e.g. nested objects that are null)
+        fieldnames = _csv_fieldnames(self.get_serializer())
+        writer = csv.DictWriter(_Echo(), fieldnames=fieldnames, extrasaction='ignore')
+        yield writer.writeheader()
+        fieldnames = set(fieldnames)
+        for row in rows:
+            yield writer.writerow(_flatten(row, fieldnames))
@@ -0,0 +1,12 @@
+from drf_link_header_pagination import LinkHeaderCursorPagination
+
+
+class KeysetPagination(LinkHeaderCursorPagination):
+    """Cursor pagination over primary keys. Unlike limit/offset pagination,
+    the cost of getting a page doesn't grow with how deep it is, and pages
+    don't shift when objects are added while paging through."""
+
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
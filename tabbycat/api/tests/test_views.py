@@ -1,13 +1,22 @@
+import csv
+import io
 import json
+from unittest import mock
 
 from django.conf import settings
-from django.test import Client
+from django.test import Client, SimpleTestCase
 from django.urls import reverse
+from rest_framework import serializers
 from rest_framework.test import APITestCase
 
+from participants.models import Speaker
+from results.models import BallotSubmission
+from results.utils import bump_results_version
 from tournaments.models import Round
 from utils.tests import CompletedTournamentTestMixin, V1_ROOT_URL
 
+from ..mixins import BulkExportMixin
+
 
 class RootTests(APITestCase):
 
@@ -225,3 +234,103 @@ class BallotViewSetTests(CompletedTournamentTestMixin, APITestCase):
     def test_access_with_private_url(self):
         response = self.client.get(reverse('api-ballot-list', kwargs={'tournament_slug': self.tournament.slug, 'round_seq': 1, 'debate_pk': 12}), headers={"Authorization": "Key urlkey"})
         self.assertEqual(response.status_code, 200)
+
+
+class StandingsCachingTests(CompletedTournamentTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        bump_results_version()
+        self.client.login(username="admin", password="admin")
+        self.url = reverse('api-team-standings', kwargs={'tournament_slug': self.tournament.slug})
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with mock.patch('api.views.BaseStandingsView.get_standings_response') as generate:
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            generate.assert_not_called()
+
+    def test_etag_changes_with_results(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertNotEqual(self.client.get(self.url + "?round=1")['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BallotSubmission.objects.filter(confirmed=True).first().save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class BulkExportTests(CompletedTournamentTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="admin", password="admin")
+        self.url = reverse('api-speaker-list', kwargs={'tournament_slug': self.tournament.slug})
+
+    def test_keyset_pagination(self):
+        ids = []
+        url = self.url + "?page_size=7"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 7)
+            ids.extend(speaker['id'] for speaker in response.data)
+            links = dict(reversed(link.split("; ")) for link in response.get('Link', "").split(", ") if link)
+            url = links.get('rel="next"', "").strip("<>")
+        self.assertEqual(ids, sorted(Speaker.objects.filter(team__tournament=self.tournament).values_list('id', flat=True)))
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.url + "?export=ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, json.loads(json.dumps(self.client.get(self.url).data)))
+
+    def test_export_csv(self):
+        response = self.client.get(self.url + "?export=csv")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertIn("name", lines[0].split(","))
+        self.assertEqual(len(lines), Speaker.objects.filter(team__tournament=self.tournament).count() + 1)
+
+    def test_export_invalid_format(self):
+        self.assertEqual(self.client.get(self.url + "?export=xml").status_code, 400)
+
+
+class ExportNestedSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+
+class ExportRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    nested = ExportNestedSerializer(allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField())
+    secret = serializers.CharField(write_only=True)
+
+
+class BulkExportCSVColumnsTests(SimpleTestCase):
+
+    def test_columns_from_serializer(self):
+        view = BulkExportMixin()
+        view.get_serializer = ExportRowSerializer
+        rows = [
+            {'id': 1, 'nested': None, 'tags': []},
+            {'id': 2, 'nested': {'name': "b"}, 'tags': ["x", "y"]},
+        ]
+        output = "".join(view.stream_csv(rows))
+        reader = csv.DictReader(io.StringIO(output))
+        self.assertEqual(reader.fieldnames, ['id', 'nested.name', 'tags'])
+        first, second = list(reader)
+        self.assertEqual(first['nested.name'], "")
+        self.assertEqual(second['nested.name'], "b")
+        self.assertEqual(json.loads(second['tags']), ["x", "y"])
@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 from itertools import groupby
 
 from asgiref.sync import async_to_sync
@@ -45,7 +45,8 @@ from venues.models import Venue, VenueCategory
 
 from . import serializers
 from .fields import ParticipantAvailabilityForeignKeyField
-from .mixins import AdministratorAPIMixin, APILogActionMixin, PublicAPIMixin, RoundAPIMixin, TournamentAPIMixin, TournamentPublicAPIMixin
+from .mixins import (AdministratorAPIMixin, APILogActionMixin, BulkExportMixin, PublicAPIMixin, ResultsVersionCacheMixin, RoundAPIMixin,
+                     TournamentAPIMixin, TournamentPublicAPIMixin)
 from .permissions import PerTournamentPermissionRequired, PublicPreferencePermission, URLKeyAuthentication
 from .query_serializers import (
     AdjudicatorParamsSerializer, AvailabilitiesParamsSerializer, BallotParamsSerializer, FeedbackParamsSerializer, FeedbackQuestionParamsSerializer,
@@ -445,7 +446,7 @@ class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch adjudicator", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete adjudicator", parameters=[id_parameter]),
 )
-class AdjudicatorViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class AdjudicatorViewSet(BulkExportMixin, TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.AdjudicatorSerializer
     access_preference = 'public_participants'
     action_log_type_created = ActionLogEntry.ActionType.ADJUDICATOR_CREATE
@@ -515,7 +516,7 @@ class GlobalInstitutionViewSet(AdministratorAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch speaker", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete speaker", parameters=[id_parameter]),
 )
-class SpeakerViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class SpeakerViewSet(BulkExportMixin, TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.SpeakerSerializer
     tournament_field = "team__tournament"
     access_preference = 'public_participants'
@@ -782,7 +783,7 @@ def get_metrics_params(generator):
     ]
 
 
-class BaseStandingsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPIView):
+class BaseStandingsView(ResultsVersionCacheMixin, TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPIView):
     lookup_field = 'slug'
     lookup_url_kwarg = 'tournament_slug'
 
@@ -812,6 +813,9 @@ class BaseStandingsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPI
     ])
     def get(self, request, **kwargs):
         """Get current standings"""
+        return self.versioned_response(request, self.get_standings_response)
+
+    def get_standings_response(self):
         params_serializer = StandingsParamsSerializer(data=self.request.query_params, context={'tournament': self.tournament})
         params_serializer.is_valid(raise_exception=True)
         self.params = params_serializer.validated_data
@@ -916,7 +920,7 @@ class TeamStandingsView(BaseStandingsView):
 @extend_schema_view(
     list=extend_schema(summary="Get speaker scores per round", responses=serializers.SpeakerRoundScoresSerializer(many=True)),
 )
-class SpeakerRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class SpeakerRoundStandingsRoundsView(ResultsVersionCacheMixin, TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.SpeakerRoundScoresSerializer
     tournament_field = "team__tournament"
     access_preference = 'speaker_tab_released'
@@ -943,7 +947,9 @@ class SpeakerRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMix
             speaker_scores = speaker_scores.filter(position__lte=self.tournament.last_substantive_position)
 
         for spk in data.values():
-            spk.debateteams = deepcopy(spk.team.debateteam_set.all())
+            # Teammates share prefetched debate teams, so each needs its own
+            # (shallow) copies to hold their scores
+            spk.debateteams = [copy(dt) for dt in spk.team.debateteam_set.all()]
             for dt in spk.debateteams:
                 dt.scores = []
 
@@ -961,7 +967,7 @@ class SpeakerRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMix
 @extend_schema_view(
     list=extend_schema(summary="Get team scores per round", responses=serializers.TeamRoundScoresSerializer(many=True)),
 )
-class TeamRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class TeamRoundStandingsRoundsView(ResultsVersionCacheMixin, TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.TeamRoundScoresSerializer
     access_preference = 'team_tab_released'
 
@@ -992,7 +998,7 @@ class TeamRoundStandingsRoundsView(TournamentAPIMixin, TournamentPublicAPIMixin,
     partial_update=extend_schema(summary="Patch pairing", parameters=debate_parameters),
     destroy=extend_schema(summary="Delete pairing", parameters=debate_parameters),
 )
-class PairingViewSet(RoundAPIMixin, ModelViewSet):
+class PairingViewSet(BulkExportMixin, RoundAPIMixin, ModelViewSet):
 
     class CustomPermission(PublicPreferencePermission):
         def get_tournament_preference(self, view, op):
@@ -1077,7 +1083,7 @@ class GeneratePairingView(RoundAPIMixin, AdministratorAPIMixin, CreateAPIView):
     update=extend_schema(summary="Update ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
     partial_update=extend_schema(summary="Patch ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
 )
-class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class BallotViewSet(BulkExportMixin, RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
@@ -1230,7 +1236,7 @@ class FeedbackQuestionViewSet(TournamentAPIMixin, PublicAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch feedback", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete feedback", parameters=[id_parameter]),
 )
-class FeedbackViewSet(TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
+class FeedbackViewSet(BulkExportMixin, TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
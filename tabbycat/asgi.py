@@ -14,6 +14,7 @@ from adjallocation.consumers import AdjudicatorAllocationWorkerConsumer, PanelEd
 from checkins.consumers import CheckInEventConsumer # noqa: E402 (has to come after settings)
 from draw.consumers import DebateEditConsumer # noqa: E402 (has to come after settings)
 from notifications.consumers import NotificationQueueConsumer # noqa: E402 (has to come after settings)
+from privateurls.consumers import QRCodeWorkerConsumer # noqa: E402 (has to come after settings)
 from results.consumers import BallotResultConsumer, BallotStatusConsumer # noqa: E402 (has to come after settings)
 from venues.consumers import VenuesWorkerConsumer # noqa: E402 (has to come after settings)
 
@@ -43,5 +44,6 @@ application = ProtocolTypeRouter({
         "notifications":  NotificationQueueConsumer.as_asgi(), # Email sending
         "adjallocation": AdjudicatorAllocationWorkerConsumer.as_asgi(),
         "venues": VenuesWorkerConsumer.as_asgi(),
+        "privateurls": QRCodeWorkerConsumer.as_asgi(), # QR code generation
     }),
 })
@@ -10,13 +10,19 @@ from polymorphic.models import PolymorphicModel
 from utils.misc import generate_identifier_string
 
 
-def generate_identifier():
+def generate_barcode():
     # First number should not be 0 so that it is easier import into Excel etc
-    new_id = str(random.choice([1, 2, 3, 4, 5, 6, 7, 8, 9])) + generate_identifier_string(digits, 5)
-    if Identifier.objects.filter(barcode=new_id).count() == 0:
-        return new_id
-    else:
-        return generate_identifier()
+    return str(random.choice([1, 2, 3, 4, 5, 6, 7, 8, 9])) + generate_identifier_string(digits, 5)
+
+
+def generate_identifier():
+    """Returns a barcode not yet used by any identifier. This checks the
+    database for each candidate, so to create many identifiers at once, use
+    `checkins.utils.create_identifiers()` instead."""
+    while True:
+        new_id = generate_barcode()
+        if not Identifier.objects.filter(barcode=new_id).exists():
+            return new_id
 
 
 class Identifier(PolymorphicModel):
@@ -4,11 +4,14 @@ import random
 import string
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from .models import DebateIdentifier, Event, PersonIdentifier, VenueIdentifier
+from utils.misc import allocate_unique_keys
+
+from .models import DebateIdentifier, Event, generate_barcode, Identifier, PersonIdentifier, VenueIdentifier
 
 logger = logging.getLogger(__name__)
 
@@ -42,14 +45,29 @@ def get_unexpired_checkins(tournament, window_preference_type):
     return Event.objects.filter(filters).select_related('identifier').order_by('time')
 
 
-def create_identifiers(model_to_make, items_to_check):
+def create_identifiers(model_to_make, items_to_check, num_attempts=10):
+    """Creates identifiers for every item in `items_to_check` that doesn't
+    already have one. Barcodes are allocated in memory against the set of those
+    already in use, so if another process takes one of them in the meantime,
+    the whole batch is rolled back and allocated again."""
     kind = model_to_make.instance_attr
-    identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
-
-    for item in identifiers_to_make:
-        model_to_make.objects.create(**{kind: item})
-
-    return
+    identifiers_to_make = list(items_to_check.filter(checkin_identifier__isnull=True))
+
+    for i in range(num_attempts):
+        existing = set(Identifier.objects.values_list('barcode', flat=True))
+        # Pass a blank barcode so that the field default isn't called
+        identifiers = [model_to_make(barcode='', **{kind: item}) for item in identifiers_to_make]
+        identifiers = allocate_unique_keys(identifiers, 'barcode', generate_barcode, existing)
+        try:
+            with transaction.atomic():
+                for identifier in identifiers:
+                    identifier.save()
+        except IntegrityError:
+            logger.warning("Collision saving %d new barcodes, retrying", len(identifiers))
+            continue
+        return
+
+    logger.error("Could not save unique barcodes after %d tries", num_attempts)
 
 
 def single_checkin(instance, events):
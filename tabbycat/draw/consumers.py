@@ -4,9 +4,15 @@ from asgiref.sync import async_to_sync
 from channels.consumer import SyncConsumer
 from channels.generic.websocket import JsonWebsocketConsumer
 from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 
 from actionlog.models import ActionLogEntry
+from adjallocation.models import DebateAdjudicator
 from adjallocation.serializers import SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer
+from privateurls.utils import bump_landing_version_on_commit
+from standings.diversity import bump_diversity_version
 from tournaments.mixins import RoundWebsocketMixin
 from users.permissions import Permission
 from utils.mixins import SuperuserRequiredWebsocketMixin
@@ -18,6 +24,39 @@ from .serializers import EditDebateTeamsDebateSerializer, SimpleDebateSideStatus
 logger = logging.getLogger(__name__)
 
 
+def _allocation_version_key(group_name):
+    return "allocation_version_%s" % group_name
+
+
+def get_allocation_version(group_name):
+    """Returns the number of updates that have been broadcast to the given
+    group of allocation editors, so that clients can detect missed updates."""
+    return cache.get(_allocation_version_key(group_name), 0)
+
+
+def bump_allocation_version(group_name):
+    """Increments and returns the version for the given group. If the version
+    has been evicted from the cache, it restarts, which clients will see as a
+    missed update and resynchronise."""
+    key = _allocation_version_key(group_name)
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, 1, None)
+        return 1
+
+
+def send_versioned_update(group_name, content):
+    """Broadcasts `content` to the group, tagged with the group's next version."""
+    async_to_sync(get_channel_layer().group_send)(
+        group_name, {
+            'type': 'broadcast_debates_or_panels',
+            'content': dict(content, version=bump_allocation_version(group_name)),
+        },
+    )
+
+
 class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWebsocketMixin, JsonWebsocketConsumer):
     """For receiving updates to either debates or preformed panels; making the
     supplied modifications; and re-broadcasting them. The intent is that the
@@ -35,6 +74,10 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
                 self.receive_importance(content)
             elif key == 'adjudicators':
                 self.receive_adjudicators(content)
+            elif key == 'adjudicatorMoves':
+                self.receive_adjudicator_moves(content)
+            elif key == 'resync':
+                self.receive_resync(content)
 
     def receive_action(self, action_function, action_settings, user):
         # TODO: Make this selection mechanism more robust
@@ -60,7 +103,7 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
         debates_or_panels = self.get_debates_or_panels(changes)
         for d_or_p in debates_or_panels:
             d_or_p.importance = changes[d_or_p.id]['importance']
-            d_or_p.save()
+        self.model.objects.bulk_update(debates_or_panels, ['importance'])
 
         serialized = self.importance_serializer(debates_or_panels, many=True)
         content_to_return = content.copy()
@@ -101,6 +144,113 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
         del content_to_return['adjudicators']
         self.return_attributes(content_to_return, serialized)
 
+    def apply_adjudicator_moves(self, moves):
+        """Applies a list of moves, each a dict
+            {'adjudicator': id, 'from': id or None, 'to': id or None, 'position': 'C', 'P' or 'T'}
+        where `from` and `to` are debate or panel IDs (None for unallocated),
+        in bulk and in a single transaction. Allocation rows that stay in the same debate
+        or panel are updated rather than re-created, so that anything that
+        refers to them (e.g. scores in a ballot) is kept.
+
+        Bulk operations don't send model signals, so this invalidates private
+        URL landing pages and diversity data itself."""
+        field = self.adjudicator_container_field
+        to_remove = set()
+        reposition = {}
+        to_place = {}
+
+        def add_reposition(container_id, adj_id, position):
+            reposition.setdefault(position, Q(pk__in=[]))
+            reposition[position] |= Q(**{field + '_id': container_id, 'adjudicator_id': adj_id})
+
+        for move in moves:
+            adj_id, from_id, to_id = move['adjudicator'], move['from'], move['to']
+            if from_id is not None and from_id == to_id:
+                add_reposition(to_id, adj_id, move['position'])
+                continue
+            if from_id is not None:
+                to_remove.add((from_id, adj_id))
+            if to_id is not None:
+                to_place[(to_id, adj_id)] = move['position']
+
+        # Adjudicators moved away and back again stay where they are
+        remove = Q(pk__in=[])
+        for from_id, adj_id in to_remove - to_place.keys():
+            remove |= Q(**{field + '_id': from_id, 'adjudicator_id': adj_id})
+
+        with transaction.atomic():
+            self.adjudicator_model.objects.filter(remove).delete()
+
+            # In case this client's copy was stale and the adjudicator was
+            # already there, update that row rather than re-creating it
+            existing = Q(pk__in=[])
+            for to_id, adj_id in to_place:
+                existing |= Q(**{field + '_id': to_id, 'adjudicator_id': adj_id})
+            existing = set(self.adjudicator_model.objects.filter(existing).values_list(field + '_id', 'adjudicator_id'))
+            to_create = []
+            for (to_id, adj_id), position in to_place.items():
+                if (to_id, adj_id) in existing:
+                    add_reposition(to_id, adj_id, position)
+                else:
+                    to_create.append(self.adjudicator_model(**{field + '_id': to_id}, adjudicator_id=adj_id, type=position))
+
+            for position, q in reposition.items():
+                self.adjudicator_model.objects.filter(q).update(type=position)
+            self.adjudicator_model.objects.bulk_create(to_create)
+            if self.adjudicator_model is DebateAdjudicator:
+                bump_landing_version_on_commit('draw', self.tournament.id)
+                transaction.on_commit(bump_diversity_version)
+
+    def receive_adjudicator_moves(self, content):
+        """Applies moves of individual adjudicators, sent by the editor as
+            {"adjudicatorMoves": [{"adjudicator": 12, "from": 73, "to": 74, "position": "P"}], "componentID": 2885}
+        and broadcasts only those moves, rather than re-serialized debates or
+        panels, to other editors."""
+        positions = {choice for choice, _ in DebateAdjudicator.TYPE_CHOICES}
+        try:
+            moves = [{
+                'adjudicator': int(move['adjudicator']),
+                'from': None if move.get('from') is None else int(move['from']),
+                'to': None if move.get('to') is None else int(move['to']),
+                'position': move.get('position'),
+            } for move in content['adjudicatorMoves']]
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Malformed adjudicator moves received: %r", content['adjudicatorMoves'])
+            return self.receive_resync(content)
+
+        container_ids = {move[k] for move in moves for k in ('from', 'to') if move[k] is not None}
+        containers = dict(self.model.objects.filter(id__in=container_ids,
+            round__tournament=self.tournament).values_list('id', 'round__seq'))
+        adj_ids = {move['adjudicator'] for move in moves}
+        num_adjs = self.tournament.relevant_adjudicators.filter(id__in=adj_ids).count()
+        if any(move[k] is not None and move[k] not in containers for move in moves for k in ('from', 'to')) or \
+                any(move['to'] is not None and move['position'] not in positions for move in moves) or \
+                num_adjs != len(adj_ids):
+            logger.warning("Invalid adjudicator moves received: %r", moves)
+            return self.receive_resync(content)
+
+        self.apply_adjudicator_moves(moves)
+
+        round_seqs = set(containers.values()) or {self.round.seq}
+        content_to_return = {'adjudicatorMoves': moves, 'componentID': content.get('componentID')}
+        for seq in round_seqs:
+            send_versioned_update(f"{self.group_prefix}_{self.tournament.slug}_{seq}", content_to_return)
+
+    def receive_resync(self, content):
+        """Sends the full allocation of this round, with the current version,
+        to this client only; used when it has missed an update."""
+        debates_or_panels = self.get_round_debates_or_panels()
+        serialized = self.adjudicators_serializer(debates_or_panels, many=True)
+        self.send_json({
+            'debatesOrPanels': serialized.data,
+            'version': get_allocation_version(self.group_name()),
+            'resync': True,
+        })
+
+    def get_round_debates_or_panels(self):
+        return self.model.objects.filter(round=self.round).select_related('round').prefetch_related(
+            self.adjudicator_prefetch)
+
     def return_attributes(self, original_content, serialized_content):
         """ Return the original JSON but with the generic debatesOrPanels key """
         original_content['debatesOrPanels'] = serialized_content.data
@@ -121,13 +271,7 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
         round_seqs.add(str(self.round.seq))
 
         for seq in round_seqs:
-            group_name = f"{self.group_prefix}_{self.tournament.slug}_{seq}"
-            async_to_sync(get_channel_layer().group_send)(
-                group_name, {
-                    'type': 'broadcast_debates_or_panels',
-                    'content': original_content,
-                },
-            )
+            send_versioned_update(f"{self.group_prefix}_{self.tournament.slug}_{seq}", original_content)
 
     def broadcast_debates_or_panels(self, event):
         self.send_json(event['content'])
@@ -142,6 +286,9 @@ class DebateEditConsumer(BaseAdjudicatorContainerConsumer):
     venues_serializer = SimpleDebateVenueSerializer
     teams_serializer = EditDebateTeamsDebateSerializer
     access_permission = Permission.EDIT_DEBATEADJUDICATORS
+    adjudicator_model = DebateAdjudicator
+    adjudicator_container_field = 'debate'
+    adjudicator_prefetch = 'debateadjudicator_set__adjudicator'
 
     def receive_json(self, content):
         for key in content.keys():
@@ -228,6 +375,25 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
         serialized_debates = serialiser(debates, many=True)
         return serialized_debates
 
+    def serialize_allocations(self, rows, containers, round=None):
+        """Returns the same representation of adjudicator allocations as the
+        `Simple*AllocationSerializer` classes, but built from the in-memory
+        result of `bulk_save_allocations()` (or similar) rather than by
+        querying the database again. `rows` maps container IDs to lists of
+        related adjudicator instances. Round metadata is included if `round`
+        is given, as for debates."""
+        serialized = []
+        for container in containers:
+            adjudicators = {key: [] for key, label in DebateAdjudicator.TYPE_CHOICES}
+            for row in rows.get(container.id, []):
+                adjudicators[row.type].append(row.adjudicator_id)
+            item = {'id': container.id, 'adjudicators': adjudicators}
+            if round is not None:
+                item['round_seq'] = round.seq
+                item['round_name'] = round.name
+            serialized.append(item)
+        return serialized
+
     def return_error(self, group_name, error_text):
         """ Because the worker can't do proper returns we can't really catch
         exceptions across each function; provide a manual handler instead. """
@@ -242,8 +408,13 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
 
     def return_response(self, serialized_debates_or_panels, group_name,
                         message_text, message_type):
+        self.return_data_response(serialized_debates_or_panels.data, group_name,
+            message_text, message_type)
+
+    def return_data_response(self, debates_or_panels_data, group_name,
+                             message_text, message_type):
         content = {
-            'debatesOrPanels': serialized_debates_or_panels.data,
+            'debatesOrPanels': debates_or_panels_data,
             'message': {'text': message_text, 'type': message_type},
         }
 
@@ -256,7 +427,7 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
 
         round_seqs = set()
         try:
-            for item in serialized_debates_or_panels.data:
+            for item in debates_or_panels_data:
                 rs = item.get('round_seq', None)
                 if rs is not None:
                     round_seqs.add(str(rs))
@@ -265,19 +436,8 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
 
         # Fallback to the original group only if no round_seq info is present
         if not round_seqs:
-            async_to_sync(get_channel_layer().group_send)(
-                group_name, {
-                    'type': 'broadcast_debates_or_panels',
-                    'content': content,
-                },
-            )
+            send_versioned_update(group_name, content)
             return
 
         for seq in round_seqs:
-            target_group = f"{base_prefix}_{seq}"
-            async_to_sync(get_channel_layer().group_send)(
-                target_group, {
-                    'type': 'broadcast_debates_or_panels',
-                    'content': content,
-                },
-            )
+            send_versioned_update(f"{base_prefix}_{seq}", content)
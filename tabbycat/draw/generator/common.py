@@ -158,6 +158,9 @@ class BasePairDrawGenerator(BaseDrawGenerator):
         "avoid_institution" - if True, draw tries to avoid pairing teams that
             are from the same institution.
         "side_penalty" - A penalty to apply when optimizing with side balance
+        "matching_processes" - For graph-based generators, the number of worker
+            processes in which to find the matchings of separate brackets. If
+            0 or 1, they are found sequentially; the draw is the same either way.
         """
 
     BASE_DEFAULT_OPTIONS = {
@@ -171,6 +174,7 @@ class BasePairDrawGenerator(BaseDrawGenerator):
         "pairing_penalty"       : 0,
         "avoid_conflicts"       : "off",
         "max_times_on_one_side" : 0,
+        "matching_processes"    : 0,
     }
 
     TEAMS_IN_DEBATE = 2
@@ -1,4 +1,6 @@
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import current_process
 from typing import Optional, TYPE_CHECKING
 
 import munkres
@@ -18,6 +20,38 @@ def sign(n: int) -> int:
         return 0
 
 
+def min_weight_matching(edges):
+    """Returns the minimum weight matching of the graph with weighted edges
+    `edges`, as a list of pairs of node indices. Nodes are indices rather than
+    teams so that this can run in a worker process."""
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(edges)
+    # nx.nx_pydot.write_dot(graph, sys.stdout)
+    return list(nx.min_weight_matching(graph))
+
+
+def minimum_cost_assignment(matrix):
+    """Returns the minimum cost assignment of rows to columns in `matrix`, as
+    a list of (row, column) pairs."""
+    return munkres.Munkres().compute(matrix)
+
+
+def solve_brackets(func, problems, processes=0):
+    """Returns a list of `func(problem)` for each of `problems`. If `processes`
+    is greater than 1, they are solved in a pool of that many worker processes.
+
+    Each problem is solved from only its own arguments, so the results are the
+    same as when they are solved sequentially. Anything random should be done
+    before and after calling this, not in `func`.
+
+    Daemonic processes (e.g. the workers of a parallel test run) can't start
+    worker processes of their own, so in those, they are solved sequentially."""
+    if processes > 1 and len(problems) > 1 and not current_process().daemon:
+        with ProcessPoolExecutor(max_workers=min(processes, len(problems))) as executor:
+            return list(executor.map(func, problems))
+    return [func(problem) for problem in problems]
+
+
 class GraphGeneratorMixin:
     def avoid_conflicts(self, pairings):
         """Graph optimisation avoids conflicts, so method is extraneous."""
@@ -61,22 +95,29 @@ class GraphGeneratorMixin:
         return len(teams)
 
     def generate_pairings(self, brackets):
-        """Creates an undirected weighted graph for each bracket and gets the minimum weight matching"""
+        """Creates an undirected weighted graph for each bracket and gets the minimum weight matching.
+        Once costs are computed, the brackets are independent, so if the "matching_processes" option
+        is more than 1, the matchings are found in parallel."""
         from .pairing import Pairing
-        pairings = OrderedDict()
-        i = 0
-        for j, (points, teams) in enumerate(brackets.items()):
-            pairings[points] = []
-            graph = nx.Graph()
+        graphs = []
+        for j, teams in enumerate(brackets.values()):
+            edges = []
             n_teams = self.get_n_teams(teams)
-            for k, t1 in enumerate(teams):
-                for t2 in teams[k+1:]:
+            for k1, t1 in enumerate(teams):
+                for k2, t2 in enumerate(teams[k1+1:], start=k1+1):
                     penalty = self.assignment_cost(t1, t2, n_teams, j)
                     if penalty is not None:
-                        graph.add_edge(t1, t2, weight=penalty)
+                        edges.append((k1, k2, penalty))
+            graphs.append(edges)
+
+        matchings = solve_brackets(min_weight_matching, graphs, self.options.get("matching_processes", 0))
 
-            # nx.nx_pydot.write_dot(graph, sys.stdout)
-            for pairing in sorted(nx.min_weight_matching(graph), key=lambda p: self.room_rank_ordering(p)):
+        pairings = OrderedDict()
+        i = 0
+        for (points, teams), matching in zip(brackets.items(), matchings):
+            pairings[points] = []
+            matching = [(teams[k1], teams[k2]) for k1, k2 in matching]
+            for pairing in sorted(matching, key=lambda p: self.room_rank_ordering(p)):
                 i += 1
                 pairings[points].append(Pairing(teams=pairing, bracket=self.get_bracket(pairing, points), room_rank=i))
 
@@ -103,14 +144,18 @@ class GraphAllocatedSidesMixin(GraphGeneratorMixin):
 
     def generate_pairings(self, brackets):
         from .pairing import Pairing
+        matrices = []
+        for pool in brackets.values():
+            n_teams = len(pool[DebateSide.AFF]) + len(pool[DebateSide.NEG])
+            matrices.append([[self.assignment_cost(aff, neg, n_teams) for neg in pool[DebateSide.NEG]] for aff in pool[DebateSide.AFF]])
+
+        assignments = solve_brackets(minimum_cost_assignment, matrices, self.options.get("matching_processes", 0))
+
         pairings = OrderedDict()
         i = 0
-        for points, pool in brackets.items():
+        for (points, pool), assignment in zip(brackets.items(), assignments):
             pairings[points] = []
-            n_teams = len(pool[DebateSide.AFF]) + len(pool[DebateSide.NEG])
-            matrix = [[self.assignment_cost(aff, neg, n_teams) for neg in pool[DebateSide.NEG]] for aff in pool[DebateSide.AFF]]
-
-            for i_aff, i_neg in munkres.Munkres().compute(matrix):
+            for i_aff, i_neg in assignment:
                 i += 1
                 pairings[points].append(Pairing(teams=[pool[DebateSide.AFF][i_aff], pool[DebateSide.NEG][i_neg]], bracket=points, room_rank=i))
 
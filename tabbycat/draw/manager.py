@@ -3,6 +3,7 @@ import random
 from operator import add
 from typing import List, Tuple, TYPE_CHECKING
 
+from django.conf import settings
 from django.utils.translation import gettext as _
 
 from draw.generator.powerpair import BasePowerPairedDrawGenerator
@@ -254,6 +255,12 @@ class PowerPairedDrawManager(BaseDrawManager):
             options.extend(["pullup", "position_cost", "assignment_method", "renyi_order", "exponent"])
         return options
 
+    def create(self, options: dict | None = None) -> list[Debate]:
+        if self.teams_in_debate == 2 and settings.DRAW_MATCHING_PROCESSES > 1:
+            options = dict(options or {})
+            options.setdefault("matching_processes", settings.DRAW_MATCHING_PROCESSES)
+        return super().create(options)
+
     def get_teams(self) -> Tuple[List['Team'], List['Team']]:
         """Get teams in ranked order."""
         teams = add(*super().get_teams())
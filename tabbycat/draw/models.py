@@ -136,13 +136,16 @@ class Debate(models.Model):
     # Callers that wish to retrieve the teams of many debates should add
     #   prefetch_related(Prefetch('debateteam_set',
     #       queryset=DebateTeam.objects.select_related('team'))
-    # to their query set.
+    # to their query set, or, if they already have the DebateTeam objects,
+    # pass them to `self.set_debateteams()`.
 
-    def _populate_teams(self):
-        """Populates the team attributes from self.debateteam_set."""
-        dts = self.debateteam_set.all()
-        if not dts._prefetch_done:  # uses internal undocumented flag of Django's QuerySet class
-            dts = dts.select_related('team')
+    def _populate_teams(self, dts=None):
+        """Populates the team attributes from `dts` if given, otherwise from
+        self.debateteam_set."""
+        if dts is None:
+            dts = self.debateteam_set.all()
+            if not dts._prefetch_done:  # uses internal undocumented flag of Django's QuerySet class
+                dts = dts.select_related('team')
 
         self._teams = []
         self._dts = []
@@ -159,6 +162,11 @@ class Debate(models.Model):
             self._team_properties[team_key] = dt.team
             self._team_properties[dt_key] = dt
 
+    def set_debateteams(self, debateteams):
+        """Populates the team properties from `debateteams`, which should be
+        all the DebateTeam objects (with teams) of this debate."""
+        self._populate_teams(debateteams)
+
     @property
     def teams(self):
         # No need for _team_property overhead, this list is guaranteed to exist
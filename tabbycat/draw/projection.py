@@ -0,0 +1,212 @@
+"""Read-only projection of a round's draw, for pages that only display it.
+
+`Round.debate_set_with_prefetches()` returns model instances, which is what
+pages that edit the draw need. Pages that just print or display the draw can
+use `get_draw_projection()` instead, which builds plain objects from a fixed
+number of narrow queries, however many debates there are."""
+
+from collections import defaultdict
+
+from django.db.models import Count
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext as _
+
+from adjallocation.allocation import AdjudicatorAllocation
+from adjallocation.models import DebateAdjudicator
+from participants.models import Speaker
+from results.models import TeamScore
+from venues.models import Venue, VenueCategory
+
+from .models import Debate, DebateTeam
+from .types import DebateSide
+
+
+def count_sides(debates, tournament):
+    """Returns the number of sides in `debates`, which may be projected
+    debates or `Debate` instances with their debate teams prefetched, so that
+    this doesn't query them again. If there are no debate teams, returns the
+    number of teams in a debate in `tournament`."""
+    sides = [dt.side for debate in debates for dt in debate.debateteams if dt.side != DebateSide.BYE]
+    return max(sides) + 1 if sides else tournament.pref('teams_in_debate')
+
+
+class ProjectedPerson:
+    """A speaker or adjudicator, with only what's needed to display them."""
+    __slots__ = ('id', 'name', 'code_name', 'anonymous', 'institution_code')
+
+    def __init__(self, id, name, code_name, anonymous, institution_code=None):
+        self.id = id
+        self.name = name
+        self.code_name = code_name
+        self.anonymous = anonymous
+        self.institution_code = institution_code
+
+    def get_public_name(self, tournament):
+        # Same as Person.get_public_name()
+        if self.anonymous:
+            return mark_safe("<em>" + _("Redacted") + "</em>")
+        if tournament.pref('participant_code_names') == 'off':
+            return self.name
+        return self.code_name
+
+
+class ProjectedTeam:
+    __slots__ = ('id', 'short_name', 'code_name', 'institution_code', 'speakers')
+
+    def __init__(self, id, short_name, code_name, institution_code):
+        self.id = id
+        self.short_name = short_name
+        self.code_name = code_name
+        self.institution_code = institution_code
+        self.speakers = []
+
+
+class ProjectedDebateTeam:
+    __slots__ = ('side', 'team', 'flags', 'iron_prev')
+
+    def __init__(self, side, team, flags):
+        self.side = side
+        self.team = team
+        self.flags = flags
+        self.iron_prev = 0
+
+
+class ProjectedDebate:
+    """A debate, with its teams by side and its panel by position. The panel
+    is in the same order as in `AdjudicatorAllocation`."""
+    __slots__ = ('id', 'room_rank', 'bracket', 'importance', 'result_status', 'sides_confirmed',
+                 'venue_name', 'venue_display_name', 'debateteams', 'chair', 'panellists', 'trainees')
+
+    def __init__(self, id, room_rank, bracket, importance, result_status, sides_confirmed, venue_name):
+        self.id = id
+        self.room_rank = room_rank
+        self.bracket = bracket
+        self.importance = importance
+        self.result_status = result_status
+        self.sides_confirmed = sides_confirmed
+        self.venue_name = venue_name
+        self.venue_display_name = venue_name
+        self.debateteams = []
+        self.chair = None
+        self.panellists = []
+        self.trainees = []
+
+    def get_dt(self, side):
+        """Returns the debate team on `side`, or None if there isn't one."""
+        for dt in self.debateteams:
+            if dt.side == side:
+                return dt
+        return None
+
+    @property
+    def teams(self):
+        return [dt.team for dt in self.debateteams]
+
+    def voting_with_positions(self):
+        if self.chair is not None:
+            yield self.chair, AdjudicatorAllocation.POSITION_CHAIR if self.panellists else AdjudicatorAllocation.POSITION_ONLY
+        for adj in self.panellists:
+            yield adj, AdjudicatorAllocation.POSITION_PANELLIST
+
+    def with_positions(self):
+        yield from self.voting_with_positions()
+        for adj in self.trainees:
+            yield adj, AdjudicatorAllocation.POSITION_TRAINEE
+
+
+class DrawProjection:
+    """The debates of a draw, with summary fields computed along with them so
+    that callers don't need to query the draw again."""
+    __slots__ = ('debates', 'n_sides', 'n_incomplete', 'n_confirmed')
+
+    def __init__(self, debates, n_sides):
+        self.debates = debates
+        self.n_sides = n_sides
+        self.n_incomplete = sum(d.result_status in (Debate.STATUS_NONE, Debate.STATUS_DRAFT) for d in debates)
+        self.n_confirmed = sum(d.result_status == Debate.STATUS_CONFIRMED for d in debates)
+
+    def __iter__(self):
+        return iter(self.debates)
+
+    def __len__(self):
+        return len(self.debates)
+
+    @property
+    def incomplete_ballots(self):
+        return self.n_incomplete > 0
+
+    @property
+    def all_confirmed(self):
+        return self.n_confirmed == len(self.debates)
+
+
+def get_draw_projection(round, debate_ids=None, speakers=True, iron=False):
+    """Returns a `DrawProjection` of the debates in `round` (or just those with
+    IDs in `debate_ids`), ordered by room rank.
+
+    This takes four queries, plus one each for `speakers` (teams' speakers,
+    ordered by name) and `iron` (each team's iron-person speeches in the
+    previous round), however many debates there are."""
+
+    debates = round.debate_set.all()
+    if debate_ids is not None:
+        debates = debates.filter(id__in=debate_ids)
+    debates_by_venue_id = defaultdict(list)
+    rows = debates.order_by('room_rank', 'id').values_list(
+        'id', 'room_rank', 'bracket', 'importance', 'result_status', 'sides_confirmed', 'venue__name', 'venue_id')
+    debates = {}
+    for *fields, venue_id in rows:
+        debate = debates[fields[0]] = ProjectedDebate(*fields)
+        if venue_id is not None:
+            debates_by_venue_id[venue_id].append(debate)
+
+    categories = defaultdict(list)
+    for venue_id, name, display in VenueCategory.venues.through.objects.filter(
+            venue_id__in=debates_by_venue_id.keys()).exclude(
+            venuecategory__display_in_venue_name=VenueCategory.DISPLAY_NONE).values_list(
+            'venue_id', 'venuecategory__name', 'venuecategory__display_in_venue_name'):
+        categories[venue_id].append((name, display))
+    for venue_id, venue_categories in categories.items():
+        for debate in debates_by_venue_id[venue_id]:
+            debate.venue_display_name = Venue.format_display_name(debate.venue_name, venue_categories)
+
+    teams = {}
+    for debate_id, side, flags, team_id, short_name, code_name, institution_code in DebateTeam.objects.filter(
+            debate_id__in=debates.keys()).order_by('side').values_list(
+            'debate_id', 'side', 'flags', 'team_id', 'team__short_name', 'team__code_name', 'team__institution__code'):
+        team = teams.get(team_id)
+        if team is None:
+            team = teams[team_id] = ProjectedTeam(team_id, short_name, code_name, institution_code)
+        debates[debate_id].debateteams.append(ProjectedDebateTeam(side, team, flags))
+
+    if speakers:
+        for team_id, *person in Speaker.objects.filter(team_id__in=teams.keys()).order_by('name').values_list(
+                'team_id', 'id', 'name', 'code_name', 'anonymous'):
+            teams[team_id].speakers.append(ProjectedPerson(*person))
+
+    if iron and round.prev is not None:
+        irons = dict(TeamScore.objects.filter(
+            has_ghost=True,
+            ballot_submission__confirmed=True,
+            debate_team__debate__round=round.prev,
+            debate_team__team_id__in=teams.keys(),
+        ).values('debate_team__team_id').annotate(n=Count('id')).values_list('debate_team__team_id', 'n'))
+        for debate in debates.values():
+            for dt in debate.debateteams:
+                dt.iron_prev = irons.get(dt.team.id, 0)
+
+    for debate_id, adj_type, *person in DebateAdjudicator.objects.filter(
+            debate_id__in=debates.keys()).order_by('adjudicator__name').values_list(
+            'debate_id', 'type', 'adjudicator_id', 'adjudicator__name', 'adjudicator__code_name',
+            'adjudicator__anonymous', 'adjudicator__institution__code'):
+        debate = debates[debate_id]
+        adj = ProjectedPerson(*person)
+        if adj_type == DebateAdjudicator.TYPE_CHAIR:
+            debate.chair = adj
+        elif adj_type == DebateAdjudicator.TYPE_PANEL:
+            debate.panellists.append(adj)
+        elif adj_type == DebateAdjudicator.TYPE_TRAINEE:
+            debate.trainees.append(adj)
+
+    debates = list(debates.values())
+    return DrawProjection(debates, count_sides(debates, round.tournament))
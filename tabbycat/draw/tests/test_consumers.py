@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from adjallocation.models import DebateAdjudicator
+from draw.consumers import DebateEditConsumer
+from results.models import SpeakerScoreByAdj
+from utils.tests import CompletedTournamentTestMixin
+
+
+class ApplyAdjudicatorMovesTestCase(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        self.consumer = DebateEditConsumer()
+        self.consumer._tournament_from_url = self.tournament
+
+    def test_stale_move_keeps_allocation(self):
+        """A move into a debate the adjudicator is already in (from a client's
+        stale copy) should update the allocation, not re-create it."""
+        debateadj = DebateAdjudicator.objects.filter(debate__round=self.round,
+            speakerscorebyadj__isnull=False).select_related('debate').distinct().first()
+        self.assertIsNotNone(debateadj)
+        n_scores = SpeakerScoreByAdj.objects.filter(debate_adjudicator=debateadj).count()
+        other = self.round.debate_set.exclude(id=debateadj.debate_id).first()
+
+        self.consumer.apply_adjudicator_moves([{
+            'adjudicator': debateadj.adjudicator_id,
+            'from': other.id,
+            'to': debateadj.debate_id,
+            'position': DebateAdjudicator.TYPE_TRAINEE,
+        }])
+
+        debateadj.refresh_from_db()
+        self.assertEqual(debateadj.type, DebateAdjudicator.TYPE_TRAINEE)
+        self.assertEqual(SpeakerScoreByAdj.objects.filter(debate_adjudicator=debateadj).count(), n_scores)
+
+    def test_move_between_debates(self):
+        debateadj = DebateAdjudicator.objects.filter(debate__round=self.round).first()
+        other = self.round.debate_set.exclude(id=debateadj.debate_id).first()
+
+        self.consumer.apply_adjudicator_moves([{
+            'adjudicator': debateadj.adjudicator_id,
+            'from': debateadj.debate_id,
+            'to': other.id,
+            'position': DebateAdjudicator.TYPE_PANEL,
+        }])
+
+        self.assertFalse(DebateAdjudicator.objects.filter(id=debateadj.id).exists())
+        self.assertTrue(DebateAdjudicator.objects.filter(debate=other, adjudicator_id=debateadj.adjudicator_id,
+            type=DebateAdjudicator.TYPE_PANEL).exists())
@@ -2,6 +2,7 @@ import copy
 import unittest
 
 from collections import OrderedDict
+from unittest.mock import Mock, patch
 
 from .utils import TestTeam
 from .. import DrawFatalError, DrawGenerator, DrawUserError
@@ -524,6 +525,25 @@ class TestPowerPairedDrawGenerator(unittest.TestCase):
                         self.assertEqual(actual.get_team_flags(actual.teams[1]), exp_aff_flags)
                         self.assertEqual(actual.get_team_flags(actual.teams[0]), exp_neg_flags)
 
+    def test_parallel_matching(self):
+        for standings_key, expected_key in [(1, 5), (1, 6)]:
+            with self.subTest(standings=standings_key, expected=expected_key):
+                kwargs = dict(self.expected[expected_key][0], side_allocations="none")
+                sequential = self.do_draw(self.standings[standings_key], kwargs)
+                parallel = self.do_draw(self.standings[standings_key], dict(kwargs, matching_processes=2))
+                self.assertEqual([[t.id for t in p.teams] for p in sequential], [[t.id for t in p.teams] for p in parallel])
+                self.assertEqual([p.room_rank for p in sequential], [p.room_rank for p in parallel])
+                self.assertEqual([p.flags for p in sequential], [p.flags for p in parallel])
+
+    def test_parallel_matching_in_daemon(self):
+        # Daemonic processes can't have children, so matchings should be found sequentially
+        kwargs = dict(self.expected[5][0], side_allocations="none")
+        sequential = self.do_draw(self.standings[1], kwargs)
+        with patch('draw.generator.graph.current_process', return_value=Mock(daemon=True)), \
+                patch('draw.generator.graph.ProcessPoolExecutor', side_effect=AssertionError("started worker processes")):
+            parallel = self.do_draw(self.standings[1], dict(kwargs, matching_processes=2))
+        self.assertEqual([[t.id for t in p.teams] for p in sequential], [[t.id for t in p.teams] for p in parallel])
+
 
 class TestPowerPairedWithAllocatedSidesDrawGeneratorPartOddBrackets(unittest.TestCase):
     """Basic unit test for core functionality of power-paired draws with allocated
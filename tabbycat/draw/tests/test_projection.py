@@ -0,0 +1,41 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from draw.projection import get_draw_projection
+from utils.tests import CompletedTournamentTestMixin
+
+
+class DrawProjectionTests(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_matches_debates(self):
+        projection = get_draw_projection(self.round, iron=True)
+        debates = {debate.id: debate for debate in self.round.debate_set_with_prefetches(iron=True)}
+        self.assertEqual(len(projection), len(debates))
+
+        for projected in projection:
+            debate = debates[projected.id]
+            self.assertEqual(projected.venue_display_name, debate.venue.display_name if debate.venue else None)
+            self.assertEqual(projected.result_status, debate.result_status)
+            self.assertEqual(
+                sorted((dt.side, dt.team.id, dt.iron_prev) for dt in projected.debateteams),
+                sorted((dt.side, dt.team_id, dt.iron_prev) for dt in debate.debateteams))
+            for dt in debate.debateteams:
+                self.assertEqual([s.name for s in projected.get_dt(dt.side).team.speakers], [s.name for s in dt.team.speakers])
+            self.assertEqual(
+                [(adj.id, position) for adj, position in projected.with_positions()],
+                [(adj.id, position) for adj, position in debate.adjudicators.with_positions()])
+
+        self.assertEqual(projection.n_sides, len(self.tournament.sides))
+        self.assertTrue(projection.all_confirmed)
+        self.assertFalse(projection.incomplete_ballots)
+
+    def test_query_count_constant(self):
+        counts = []
+        for round in self.tournament.prelim_rounds():
+            with CaptureQueriesContext(connection) as queries:
+                get_draw_projection(round)
+            counts.append(len(queries.captured_queries))
+        self.assertEqual(len(set(counts)), 1, "Query counts differ between rounds: %s" % counts)
@@ -1,7 +1,8 @@
 from django.test import TestCase
 
 from tournaments.models import Round
-from utils.tests import AdminTournamentViewSimpleLoadTestMixin, CompletedTournamentTestMixin, ConditionalTableViewTestsMixin, TableViewTestsMixin
+from utils.tests import (AdminTournamentViewSimpleLoadTestMixin, CompletedTournamentTestMixin, ConditionalTableViewTestsMixin,
+    QueryBudgetTestMixin, TableViewTestsMixin)
 
 
 class PublicDrawForSpecificRoundViewPermissionTest(ConditionalTableViewTestsMixin, TestCase):
@@ -181,3 +182,15 @@ class PublicDrawEliminationCurrentRoundTest(CompletedTournamentTestMixin, TableV
 class EditDebateTeamsViewTest(AdminTournamentViewSimpleLoadTestMixin, TestCase):
     view_name = 'edit-debate-teams'
     round_seq = 1
+
+
+class AdminDrawQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+
+    def test_query_budget(self):
+        self.assertQueryBudgetConstant('draw', in_round=True, admin=True)
+
+
+class AdminDrawDisplayQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+
+    def test_query_budget(self):
+        self.assertQueryBudgetConstant('draw-display', in_round=True, admin=True)
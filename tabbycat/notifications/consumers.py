@@ -1,12 +1,17 @@
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
-from email.utils import formataddr
-from time import time
+from email.utils import formataddr, make_msgid
+from time import monotonic, time
 from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
 from channels.consumer import SyncConsumer
+from django import db
 from django.conf import settings
 from django.core import mail
+from django.core.mail.utils import DNS_NAME
 from django.template import Context, Template
 from html2text import html2text
 
@@ -19,6 +24,83 @@ from .utils import (AdjudicatorAssignmentEmailGenerator, BallotsEmailGenerator,
                     NotificationContextGenerator, RandomizedUrlEmailGenerator, StandingsEmailGenerator,
                     TeamDrawEmailGenerator, TeamSpeakerEmailGenerator)
 
+logger = logging.getLogger(__name__)
+
+
+class EmailConnectionPool:
+    """Keeps up to `size` connections to the email backend open between
+    batches, and sends messages over them in parallel. Connections that have
+    been idle for more than `idle_timeout` seconds are reopened first, as mail
+    servers tend to drop idle connections."""
+
+    def __init__(self, size: int, idle_timeout: float) -> None:
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self._connections = []
+        self._last_used = None
+
+    def _get_connections(self, n: int) -> List[Any]:
+        if self._last_used is not None and monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        while len(self._connections) < n:
+            connection = mail.get_connection(fail_silently=False)
+            connection.open()
+            self._connections.append(connection)
+        return self._connections[:n]
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Error closing email connection")
+        self._connections = []
+
+    @staticmethod
+    def _send_chunk(connection: Any, messages: List[mail.EmailMessage]) -> List[Optional[Exception]]:
+        errors = []
+        for message in messages:
+            try:
+                connection.send_messages([message])
+            except Exception:
+                # The server may have dropped the connection; retry once on a new one
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                try:
+                    connection.open()
+                    connection.send_messages([message])
+                except Exception as e:
+                    errors.append(e)
+                    continue
+            errors.append(None)
+        return errors
+
+    def send(self, messages: List[mail.EmailMessage]) -> List[Optional[Exception]]:
+        """Sends the messages, spread across the pool's connections. Returns a
+        list with, for each message in order, the exception raised in sending
+        it, or None if it was sent."""
+        if not messages:
+            return []
+        n = min(self.size, len(messages))
+        connections = self._get_connections(n)
+        chunks = [messages[i::n] for i in range(n)]
+        try:
+            if n == 1:
+                results = [self._send_chunk(connections[0], chunks[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=n) as executor:
+                    results = list(executor.map(self._send_chunk, connections, chunks))
+        finally:
+            self._last_used = monotonic()
+
+        errors = [None] * len(messages)
+        for i, chunk_errors in enumerate(results):
+            for j, error in enumerate(chunk_errors):
+                errors[i + j * n] = error
+        return errors
+
 
 class NotificationQueueConsumer(SyncConsumer):
 
@@ -33,23 +115,30 @@ class NotificationQueueConsumer(SyncConsumer):
         BulkNotification.EventType.CUSTOM: NotificationContextGenerator,
     }
 
-    @staticmethod
-    def _send(messages: List[mail.EmailMultiAlternatives], records: List[SentMessage]) -> None:
-        SentMessage.objects.bulk_create(records)
+    # Events of these types are held for `settings.EMAIL_BATCH_WINDOW` seconds
+    # and sent together, as they tend to arrive in bursts
+    BATCHED_EVENTS = {BulkNotification.EventType.BALLOTS_CONFIRMED}
 
-        connection = mail.get_connection(fail_silently=False)
-        failed_events = []
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._pending_events = []
+        self._flush_timer = None
+        # The flush runs in the timer's thread, so the pending events and the
+        # connection pool are shared with the consumer's own thread
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pool = EmailConnectionPool(settings.EMAIL_CONNECTION_POOL_SIZE, settings.EMAIL_CONNECTION_IDLE_TIMEOUT)
 
-        connection.open()
+    def _send(self, messages: List[mail.EmailMultiAlternatives], records: List[SentMessage]) -> None:
+        SentMessage.objects.bulk_create(records)
         for message, record in zip(messages, records):
-            try:
-                message.extra_headers['X-RECORDID'] = record.id
-                connection.send_messages([message])
-            except Exception as e:
-                failed_events.append(EmailStatus(email=record, event=EmailStatus.EventType.FAILED, data={'error': str(e)}))
-        connection.close()
+            message.extra_headers['X-RECORDID'] = record.id
 
-        EmailStatus.objects.bulk_create(failed_events)
+        errors = self._pool.send(messages)
+        EmailStatus.objects.bulk_create([
+            EmailStatus(email=record, event=EmailStatus.EventType.FAILED, data={'error': str(error)})
+            for record, error in zip(records, errors) if error is not None
+        ])
 
     @staticmethod
     def _get_from_fields(t: Tournament) -> Tuple[str, Optional[List[str]]]:
@@ -59,9 +148,67 @@ class NotificationQueueConsumer(SyncConsumer):
         return from_email, None  # Shouldn't have array of None
 
     def email(self, event: Dict[str, Union[str, BulkNotification.EventType, List[int], Dict[str, Any]]]) -> None:
+        if event['message'] in self.BATCHED_EVENTS and settings.EMAIL_BATCH_WINDOW > 0:
+            with self._pending_lock:
+                self._pending_events.append(event)
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(settings.EMAIL_BATCH_WINDOW, self._flush_from_timer)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+            return
+
+        self.send_events([event])
+
+    def _flush_from_timer(self) -> None:
+        """Runs in the timer thread. The flush is done here, rather than by
+        sending a message to the consumer's channel, because the channel is
+        shared by all workers and another worker might receive it."""
+        try:
+            self.flush_pending_events()
+        except Exception:
+            logger.exception("Error sending batched notifications")
+        finally:
+            db.connection.close()  # this thread's connection
+
+    def flush_pending_events(self) -> None:
+        with self._pending_lock:
+            self._flush_timer = None
+            events, self._pending_events = self._pending_events, []
+
+        # A ballot confirmed more than once in the window only needs one
+        # receipt, with the latest template
+        coalesced = {}
+        for pending in events:
+            coalesced[(pending['message'], pending['extra'].get('debate_id'))] = pending
+        self.send_events(list(coalesced.values()))
+
+    def send_events(self, events: List[Dict[str, Any]]) -> None:
+        """Renders and sends the messages for each of the given events, with
+        database objects fetched once for all of them. Each event is rendered
+        and sent separately, so that an error in one doesn't stop the others."""
+        debate_ids = [event['extra']['debate_id'] for event in events if 'debate_id' in event['extra']]
+        debates = Debate.objects.select_related('round__tournament', 'venue').in_bulk(debate_ids)
+        notifications = {}
+        templates = {}
+
+        for event in events:
+            messages = []
+            records = []
+            try:
+                self._prepare_messages(event, debates, notifications, templates, messages, records)
+                with self._send_lock:
+                    self._send(messages, records)
+            except Exception:
+                logger.exception("Error sending notifications for %s event", event['message'])
+
+    def _prepare_messages(self, event: Dict[str, Any], debates: Dict[int, Debate],
+            notifications: Dict[tuple, BulkNotification], templates: Dict[str, Template],
+            messages: List[mail.EmailMultiAlternatives], records: List[SentMessage]) -> None:
         # Get database objects
         if 'debate_id' in event['extra']:
-            debate = Debate.objects.select_related('round__tournament').get(pk=event['extra'].pop('debate_id'))
+            debate = debates.get(event['extra'].pop('debate_id'))
+            if debate is None:
+                return  # deleted since the event was sent
             event['extra']['debate'] = debate
             round = event['extra']['debate'].round
             t = round.tournament
@@ -77,8 +224,11 @@ class NotificationQueueConsumer(SyncConsumer):
         from_email, reply_to = self._get_from_fields(t)
         notification_type = event['message']
 
-        subject = Template(event['subject'])
-        html_body = Template(event['body'])
+        for template in (event['subject'], event['body']):
+            if template not in templates:
+                templates[template] = Template(template)
+        subject = templates[event['subject']]
+        html_body = templates[event['body']]
 
         recipients = Person.objects.filter(pk__in=event['send_to'] or [], email__isnull=False).exclude(email='')
         contexts = self.NOTIFICATION_GENERATORS[notification_type].generate(to=recipients, **event['extra'])
@@ -93,35 +243,37 @@ class NotificationQueueConsumer(SyncConsumer):
             'body_template': event['body'],
         }
         if notification_type is BulkNotification.EventType.BALLOTS_CONFIRMED:
-            bulk_notification, c = BulkNotification.objects.get_or_create(
-                event=BulkNotification.EventType.BALLOTS_CONFIRMED, **creation_kwargs)
+            key = (round.id, event['subject'], event['body'])
+            if key not in notifications:
+                notifications[key], c = BulkNotification.objects.get_or_create(
+                    event=BulkNotification.EventType.BALLOTS_CONFIRMED, **creation_kwargs)
+            bulk_notification = notifications[key]
         else:
             bulk_notification = BulkNotification.objects.create(event=notification_type, **creation_kwargs)
 
-        messages = []
-        records = []
         for instance, recipient in contexts:
             data = asdict(instance)
             data['USER'] = recipient.name
 
             hook_id = str(bulk_notification.id) + "-" + str(recipient.id) + "-" + str(int(time()))[4:]
+            # Set the Message-ID ourselves, so that it's known without building
+            # the whole MIME message before it's sent
+            message_id = make_msgid(domain=DNS_NAME)
             context = Context(data)
             body = html_body.render(context)
             email = mail.EmailMultiAlternatives(
                 subject=subject.render(context), body=html2text(body),
                 from_email=from_email, to=[formataddr((recipient.name.strip(), recipient.email))],
                 reply_to=reply_to, headers={
+                    'Message-ID': message_id,
                     'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
                 },
             )
             email.attach_alternative(body, "text/html")
             messages.append(email)
 
-            raw_message = email.message()
             records.append(
                 SentMessage(recipient=recipient, email=recipient.email,
                             method=SentMessage.METHOD_TYPE_EMAIL,
-                            context=data, message_id=raw_message['Message-ID'],
+                            context=data, message_id=message_id,
                             hook_id=hook_id, notification=bulk_notification))
-
-        self._send(messages, records)
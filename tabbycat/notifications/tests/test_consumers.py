@@ -0,0 +1,105 @@
+import logging
+from unittest import mock
+
+from django.core import mail
+from django.test import override_settings, SimpleTestCase, TestCase
+
+from draw.models import Debate
+from notifications.consumers import EmailConnectionPool, NotificationQueueConsumer
+from notifications.models import BulkNotification, SentMessage
+from participants.models import Adjudicator
+from utils.tests import CompletedTournamentTestMixin
+
+
+class EmailConnectionPoolTestCase(SimpleTestCase):
+
+    def _messages(self, n):
+        return [mail.EmailMessage(subject="Message %d" % i, body="", to=["test%d@example.com" % i]) for i in range(n)]
+
+    def test_sends_all_messages(self):
+        pool = EmailConnectionPool(size=3, idle_timeout=60)
+        errors = pool.send(self._messages(7))
+        self.assertEqual(errors, [None] * 7)
+        self.assertCountEqual([m.subject for m in mail.outbox], ["Message %d" % i for i in range(7)])
+
+    def test_errors_in_message_order(self):
+        pool = EmailConnectionPool(size=2, idle_timeout=60)
+        messages = self._messages(5)
+        failing = messages[3]
+        error = RuntimeError("failed")
+
+        original = mail.get_connection
+
+        def get_connection(*args, **kwargs):
+            connection = original(*args, **kwargs)
+            send_messages = connection.send_messages
+
+            def send_failing(emails):
+                if failing in emails:
+                    raise error
+                return send_messages(emails)
+            connection.send_messages = send_failing
+            return connection
+
+        with mock.patch('django.core.mail.get_connection', get_connection):
+            errors = pool.send(messages)
+        self.assertEqual(errors, [None, None, None, error, None])
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_empty(self):
+        self.assertEqual(EmailConnectionPool(size=2, idle_timeout=60).send([]), [])
+
+
+@override_settings(EMAIL_BATCH_WINDOW=60)
+class BallotReceiptBatchingTestCase(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        for adj in Adjudicator.objects.filter(tournament=self.tournament):
+            adj.email = "adj%d@example.com" % adj.id
+            adj.save()
+        self.consumer = NotificationQueueConsumer()
+
+    def _event(self, debate):
+        return {
+            "type": "email",
+            "message": BulkNotification.EventType.BALLOTS_CONFIRMED,
+            "extra": {"debate_id": debate.id},
+            "subject": "Ballot for {{ DEBATE }}",
+            "body": "{{ SCORES }}",
+            "send_to": None,
+        }
+
+    def test_ballot_receipts_coalesced(self):
+        debates = list(Debate.objects.filter(round=self.round)[:2])
+        for debate in debates + debates[:1]:
+            self.consumer.email(self._event(debate))
+        self.consumer._flush_timer.cancel()
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.consumer.flush_pending_events()
+        self.assertEqual(BulkNotification.objects.filter(round=self.round).count(), 1)
+
+        # One receipt per adjudicator, not one per confirmation
+        num_adjs = sum(debate.debateadjudicator_set.count() for debate in debates)
+        self.assertGreater(len(mail.outbox), 0)
+        self.assertLessEqual(len(mail.outbox), num_adjs)
+        self.assertEqual(len(mail.outbox), SentMessage.objects.count())
+        for message in mail.outbox:
+            self.assertTrue(SentMessage.objects.filter(message_id=message.extra_headers['Message-ID']).exists())
+
+    def test_bad_event_doesnt_stop_batch(self):
+        debates = list(Debate.objects.filter(round=self.round)[:2])
+        bad_event = self._event(debates[0])
+        bad_event['body'] = "{% not_a_tag %}"
+        self.consumer.email(bad_event)
+        self.consumer.email(self._event(debates[1]))
+        self.consumer._flush_timer.cancel()
+
+        with self.assertLogs('notifications.consumers', logging.ERROR):
+            self.consumer.flush_pending_events()
+        self.assertGreater(len(mail.outbox), 0)
+        self.assertEqual(len(mail.outbox), SentMessage.objects.count())
+        self.assertIsNone(self.consumer._flush_timer)
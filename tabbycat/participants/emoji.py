@@ -3,26 +3,47 @@ import random
 import logging
 from typing import Tuple, Optional
 
+from django.db import IntegrityError, transaction
+
 logger = logging.getLogger(__name__)
 
 
-def set_emoji(teams, tournament):
+def set_emoji(teams, tournament, num_attempts=10):
     """Sets the emoji of every team in `teams` to a randomly chosen and unique
     emoji.  Every team in `teams` must be from the same tournament, and that
-    tournament must be provided as the second argument."""
+    tournament must be provided as the second argument. All teams are saved in
+    a single update, which is retried with fresh choices if another process
+    takes one of the chosen emoji in the meantime."""
+    from privateurls.utils import bump_landing_version_on_commit
 
-    used_emoji = tournament.team_set.filter(emoji__isnull=False).values_list('emoji', flat=True)
-    unused_emoji = [e for e in EMOJI_RANDOM_OPTIONS if e[0] not in used_emoji]
+    from .models import Team
 
-    if len(teams) > len(unused_emoji):
-        teams = teams[:len(unused_emoji)]
-    emojis = random.sample(unused_emoji, len(teams))
+    teams = list(teams)
+    without_code_names = {team.id for team in teams if not team.code_name}
 
-    for team, emoji in zip(teams, emojis):
-        team.emoji = emoji[0]
-        if not team.code_name:
-            team.code_name = emoji[1]
-        team.save()
+    for i in range(num_attempts):
+        used_emoji = set(tournament.team_set.filter(emoji__isnull=False).values_list('emoji', flat=True))
+        unused_emoji = [e for e in EMOJI_RANDOM_OPTIONS if e[0] not in used_emoji]
+
+        chosen_teams = teams[:len(unused_emoji)]
+        emojis = random.sample(unused_emoji, len(chosen_teams))
+
+        for team, emoji in zip(chosen_teams, emojis):
+            team.emoji = emoji[0]
+            if team.id in without_code_names:
+                team.code_name = emoji[1]
+
+        try:
+            with transaction.atomic():
+                Team.objects.bulk_update(chosen_teams, ['emoji', 'code_name'])
+                # bulk_update() doesn't send signals, so invalidate landing pages here
+                bump_landing_version_on_commit('participants', tournament.id)
+        except IntegrityError:
+            logger.warning("Collision saving emoji for %d teams, retrying", len(chosen_teams))
+            continue
+        return
+
+    logger.error("Could not save unique emoji for teams after %d tries", num_attempts)
 
 
 def pick_unused_emoji(tournament_id=None) -> Tuple[Optional[str], Optional[str]]:
@@ -32,7 +53,7 @@ def pick_unused_emoji(tournament_id=None) -> Tuple[Optional[str], Optional[str]]
     teams = Team.objects.filter(emoji__isnull=False)
     if tournament_id is not None:
         teams = teams.filter(tournament_id=tournament_id)
-    used_emoji = teams.values_list('emoji', flat=True)
+    used_emoji = set(teams.values_list('emoji', flat=True))
     unused_emoji = [e for e in EMOJI_RANDOM_OPTIONS if e[0] not in used_emoji]
 
     try:
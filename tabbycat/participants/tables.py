@@ -71,7 +71,7 @@ class AdjudicatorDebateTable:
 
         debates = [da.debate for da in debateadjs]
         populate_wins(debates)
-        populate_confirmed_ballots(debates, motions=True, results=True)
+        populate_confirmed_ballots(debates, motions=True, summaries=True)
 
         table.add_round_column([debate.round for debate in debates])
         table.add_debate_results_columns(debates, n_cols=Debate.objects.filter(id__in=[d.id for d in debates]).aggregate(n=Coalesce(Max('debateteam__side'), len(view.tournament.sides)-1))['n']+1)
@@ -116,7 +116,7 @@ class TeamDebateTable:
 
         debates = [ts.debate_team.debate for ts in teamscores]
         populate_opponents([ts.debate_team for ts in teamscores])
-        populate_confirmed_ballots(debates, motions=True, results=True)
+        populate_confirmed_ballots(debates, motions=True, summaries=True)
 
         table.add_round_column([debate.round for debate in debates])
         table.add_debate_result_by_team_column(teamscores)
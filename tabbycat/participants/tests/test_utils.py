@@ -0,0 +1,35 @@
+from checkins.models import PersonIdentifier
+from checkins.utils import create_identifiers
+from participants.emoji import set_emoji
+from participants.models import Person, Speaker, Team
+from participants.utils import populate_code_names
+from privateurls.utils import populate_url_keys
+from utils.tests import BaseMinimalTournamentTestCase
+
+
+class TestBulkKeyAllocation(BaseMinimalTournamentTestCase):
+
+    def test_populate_url_keys(self):
+        populate_url_keys(Person.objects.all())
+        url_keys = list(Person.objects.values_list('url_key', flat=True))
+        self.assertNotIn(None, url_keys)
+        self.assertEqual(len(url_keys), len(set(url_keys)))
+
+    def test_populate_code_names(self):
+        populate_code_names(Person.objects.all())
+        code_names = list(Person.objects.values_list('code_name', flat=True))
+        self.assertNotIn('', code_names)
+        self.assertEqual(len(code_names), len(set(code_names)))
+
+    def test_set_emoji(self):
+        set_emoji(Team.objects.filter(tournament=self.tournament), self.tournament)
+        emoji = list(Team.objects.values_list('emoji', flat=True))
+        self.assertNotIn(None, emoji)
+        self.assertEqual(len(emoji), len(set(emoji)))
+
+    def test_create_identifiers(self):
+        speakers = Speaker.objects.filter(team__tournament=self.tournament)
+        create_identifiers(PersonIdentifier, speakers)
+        barcodes = list(PersonIdentifier.objects.values_list('barcode', flat=True))
+        self.assertEqual(len(barcodes), speakers.count())
+        self.assertEqual(len(barcodes), len(set(barcodes)))
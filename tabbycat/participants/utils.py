@@ -3,7 +3,7 @@ import string
 from django.db.models import Count, Q
 
 from tournaments.models import Round
-from utils.misc import generate_identifier_string
+from utils.misc import bulk_allocate_unique_keys, generate_identifier_string
 
 from .models import Person, Region, Team
 
@@ -55,14 +55,10 @@ def get_side_history(teams, sides, seq):
 
 def populate_code_names(people, length=8, num_attempts=10):
     """Populates the code name field for every instance in the given QuerySet."""
-    chars = string.digits
+    from privateurls.utils import bump_landing_version
 
-    existing_keys = list(Person.objects.exclude(code_name__isnull=True).values_list('code_name', flat=True))
-    for person in people:
-        for i in range(num_attempts):
-            new_key = generate_identifier_string(chars, length)
-            if new_key not in existing_keys:
-                person.code_name = new_key
-                existing_keys.append(new_key)
-                break
-        Person.objects.bulk_update(people, ['code_name'])
+    chars = string.digits
+    bulk_allocate_unique_keys(people, 'code_name', lambda: generate_identifier_string(chars, length),
+        Person.objects.all(), num_attempts)
+    # bulk_update() doesn't send signals, and people might be from any tournament
+    bump_landing_version('participants', None)
@@ -1,19 +1,20 @@
 import json
 
-import qrcode
 from django.contrib.humanize.templatetags.humanize import ordinal
+from django.core.paginator import Paginator
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 from django.views.generic.base import TemplateView
-from qrcode.image import svg
 
+from adjallocation.allocation import AdjudicatorAllocation
 from adjfeedback.models import AdjudicatorFeedbackQuestion
 from adjfeedback.utils import expected_feedback_targets
 from checkins.models import DebateIdentifier
 from checkins.utils import create_identifiers
-from draw.models import DebateTeam
+from draw.projection import get_draw_projection
 from options.utils import use_team_code_names
 from participants.models import Adjudicator, Speaker
+from privateurls.utils import cache_qr_codes, get_cached_qr_codes, QR_CODE_CHUNK_SIZE, queue_qr_codes
 from results.utils import side_and_position_names
 from tournaments.mixins import (CurrentRoundMixin, OptionalAssistantTournamentPageMixin,
                                 RoundMixin, TournamentMixin)
@@ -23,7 +24,59 @@ from utils.mixins import AdministratorMixin
 from venues.serializers import VenueSerializer
 
 
-class BasePrintFeedbackFormsView(RoundMixin, TemplateView):
+def _venue_sort_key(debate):
+    return debate.venue.display_name if debate.venue else ""
+
+
+class PrintablePagesMixin:
+    """Allows printables for large rounds to be generated in pages of
+    `debates_per_page` debates, selected using the `page` GET parameter. If
+    the parameter isn't given, all debates in the round are included."""
+
+    debates_per_page = 50
+
+    def get_sorted_draw(self, **prefetch_kwargs):
+        """Returns the debates in the round (or the requested page), with the
+        given prefetches, sorted by venue."""
+        page_number = self.request.GET.get('page')
+
+        if page_number is None:
+            draw = sorted(self.round.debate_set_with_prefetches(**prefetch_kwargs), key=_venue_sort_key)
+            self.print_paginator = Paginator(draw, self.debates_per_page)
+            self.print_page = None
+            return draw
+
+        # Sort all debates by venue, then fetch everything else for just this page
+        debates = self.round.debate_set.select_related('venue').prefetch_related('venue__venuecategory_set')
+        self.print_paginator = Paginator(sorted(debates, key=_venue_sort_key), self.debates_per_page)
+        self.print_page = self.print_paginator.get_page(page_number)
+        debate_ids = [debate.id for debate in self.print_page]
+        draw = self.round.debate_set_with_prefetches(filter_kwargs={'id__in': debate_ids}, **prefetch_kwargs)
+        return sorted(draw, key=_venue_sort_key)
+
+    def get_sorted_projection(self, **projection_kwargs):
+        """Like `get_sorted_draw()`, but returns debates from a read-only
+        projection of the draw (see `draw.projection`), which takes the same
+        number of queries however many debates there are."""
+        draw = sorted(get_draw_projection(self.round, **projection_kwargs), key=lambda debate: debate.venue_display_name or "")
+        self.print_paginator = Paginator(draw, self.debates_per_page)
+
+        page_number = self.request.GET.get('page')
+        if page_number is None:
+            self.print_page = None
+            return draw
+
+        self.print_page = self.print_paginator.get_page(page_number)
+        return list(self.print_page)
+
+    def get_context_data(self, **kwargs):
+        if self.print_paginator.num_pages > 1:
+            kwargs['print_pages'] = self.print_paginator.page_range
+            kwargs['current_print_page'] = self.print_page.number if self.print_page else None
+        return super().get_context_data(**kwargs)
+
+
+class BasePrintFeedbackFormsView(PrintablePagesMixin, RoundMixin, TemplateView):
 
     template_name = 'feedback_list.html'
 
@@ -57,6 +110,7 @@ class BasePrintFeedbackFormsView(RoundMixin, TemplateView):
         return questions
 
     def construct_info(self, venue, source, source_p, target, target_p):
+        """`venue` should be the serialized venue of the debate."""
         if hasattr(source, 'name'): # Not a team
             source_n = source.name
         elif use_team_code_names(self.tournament, False):
@@ -65,51 +119,50 @@ class BasePrintFeedbackFormsView(RoundMixin, TemplateView):
             source_n = source.short_name
 
         return {
-            'venue': VenueSerializer(venue).data if venue else '',
+            'venue': venue,
             'authorInstitution': escape(source.institution.code) if source.institution else _("Unaffiliated"),
             'author': escape(source_n), 'authorPosition': source_p,
             'target': escape(target.name), 'targetPosition': target_p,
         }
 
-    def get_team_feedbacks(self, debate, team):
+    def get_team_feedbacks(self, debate, venue, team, team_paths):
         if len(debate.adjudicators) == 0:
             return []
 
-        team_paths = self.tournament.pref('feedback_from_teams')
         ballots = []
 
         if team_paths == 'orallist' and debate.adjudicators.chair:
-            ballots.append(self.construct_info(debate.venue, team, _("Team"),
+            ballots.append(self.construct_info(venue, team, _("Team"),
                                                debate.adjudicators.chair, ""))
         elif team_paths == 'all-adjs':
             for target in debate.adjudicators.all():
-                ballots.append(self.construct_info(debate.venue, team, _("Team"), target, ""))
+                ballots.append(self.construct_info(venue, team, _("Team"), target, ""))
 
         return ballots
 
-    def get_adj_feedbacks(self, debate):
-        adj_paths = self.tournament.pref('feedback_paths')
+    def get_adj_feedbacks(self, debate, venue, adj_paths):
         ballots = []
+        positions = {adj.id: pos for adj, pos in debate.adjudicators.with_positions()}
 
-        debateadjs = debate.debateadjudicator_set.all()
-        for debateadj in debateadjs:
+        for debateadj in debate.debateadjudicator_set.all():
             sadj = debateadj.adjudicator
-            spos = debate.adjudicators.get_position(sadj)
             targets = expected_feedback_targets(debateadj, feedback_paths=adj_paths, debate=debate)
             for tadj, tpos in targets:
-                ballots.append(self.construct_info(debate.venue, sadj, spos, tadj, tpos))
+                ballots.append(self.construct_info(venue, sadj, positions.get(sadj.id), tadj, tpos))
 
         return ballots
 
     def get_context_data(self, **kwargs):
-        draw = self.round.debate_set_with_prefetches(institutions=True)
-        draw = sorted(draw, key=lambda d: d.venue.display_name if d.venue else "")
+        draw = self.get_sorted_draw(institutions=True)
+        team_paths = self.tournament.pref('feedback_from_teams')
+        adj_paths = self.tournament.pref('feedback_paths')
 
         ballots = []
         for debate in draw:
+            venue = VenueSerializer(debate.venue).data if debate.venue else ''
             for team in debate.teams:
-                ballots.extend(self.get_team_feedbacks(debate, team))
-            ballots.extend(self.get_adj_feedbacks(debate))
+                ballots.extend(self.get_team_feedbacks(debate, venue, team, team_paths))
+            ballots.extend(self.get_adj_feedbacks(debate, venue, adj_paths))
 
         kwargs['ballots'] = json.dumps(ballots)
         kwargs['questions'] = json.dumps(self.questions_dict())
@@ -128,18 +181,16 @@ class AssistantPrintFeedbackFormsView(CurrentRoundMixin, OptionalAssistantTourna
     assistant_page_permissions = ['all_areas', 'results_draw']
 
 
-class BasePrintScoresheetsView(RoundMixin, TemplateView):
+class BasePrintScoresheetsView(PrintablePagesMixin, RoundMixin, TemplateView):
 
     template_name = 'scoresheet_list.html'
 
     def get_ballots_dicts(self):
-        draw = self.round.debate_set_with_prefetches(iron=True)
-
         # Create the DebateIdentifiers for the ballots if needed
-        create_identifiers(DebateIdentifier, draw)
-        identifiers = DebateIdentifier.objects.values('debate_id', 'barcode')
+        create_identifiers(DebateIdentifier, self.round.debate_set.all())
+        identifiers = dict(DebateIdentifier.objects.filter(debate__round=self.round).values_list('debate_id', 'barcode'))
 
-        draw = sorted(draw, key=lambda d: d.venue.display_name if d.venue else "")
+        draw = self.get_sorted_projection(iron=True)
         ballots_dicts = []
 
         # Force translation before JSON serialization
@@ -149,41 +200,41 @@ class BasePrintScoresheetsView(RoundMixin, TemplateView):
         for debate in draw:
             debate_dict = {}
 
-            if debate.venue:
-                debate_dict['venue'] = {'display_name': escape(debate.venue.display_name)}
+            if debate.venue_name is not None:
+                debate_dict['venue'] = {'display_name': escape(debate.venue_display_name)}
             else:
                 debate_dict['venue'] = None
 
-            debate_dict['barcode'] = next((i['barcode'] for i in identifiers if i['debate_id'] == debate.id), None)
+            debate_dict['barcode'] = identifiers.get(debate.id)
 
             debate_dict['debateTeams'] = []
             for side, (side_name, positions) in zip(self.tournament.sides, sides_and_positions):
                 dt_dict = {'side_name': side_name, 'positions': positions}
-                try:
-                    team = debate.get_team(side)
+                dt = debate.get_dt(side)
+                if dt is not None:
                     dt_dict['team'] = {
-                        'short_name': escape(team.short_name),
-                        'code_name': escape(team.code_name),
-                        'speakers': [{'name': escape(s.get_public_name(self.tournament))} for s in team.speakers],
-                        'iron': debate.get_dt(side).iron_prev > 0,
+                        'short_name': escape(dt.team.short_name),
+                        'code_name': escape(dt.team.code_name),
+                        'speakers': [{'name': escape(s.get_public_name(self.tournament))} for s in dt.team.speakers],
+                        'iron': dt.iron_prev > 0,
                     }
-                except DebateTeam.DoesNotExist:
+                else:
                     dt_dict['team'] = None
                 debate_dict['debateTeams'].append(dt_dict)
 
             debate_dict['debateAdjudicators'] = []
-            for adj, pos in debate.adjudicators.with_positions():
+            for adj, pos in debate.with_positions():
                 da_dict = {'position': pos}
                 da_dict['adjudicator'] = {
                     'name': escape(adj.get_public_name(self.tournament)),
-                    'institution': {'code': escape(adj.institution.code) if adj.institution else _("Unaffiliated")},
+                    'institution': {'code': escape(adj.institution_code) if adj.institution_code else _("Unaffiliated")},
                 }
                 debate_dict['debateAdjudicators'].append(da_dict)
 
             if self.round.ballots_per_debate == 'per-adj':
-                authors = list(debate.adjudicators.voting_with_positions())
+                authors = list(debate.voting_with_positions())
             else:
-                authors = [(debate.adjudicators.chair, debate.adjudicators.POSITION_CHAIR)]
+                authors = [(debate.chair, AdjudicatorAllocation.POSITION_CHAIR)]
 
             blank_author_dict = {
                 'author': "_______________________________________________",
@@ -196,7 +247,7 @@ class BasePrintScoresheetsView(RoundMixin, TemplateView):
                 if author:
                     ballot_dict = {
                         'author': escape(author.name),
-                        'authorInstitution': escape(author.institution.code) if author.institution else _("Unaffiliated"),
+                        'authorInstitution': escape(author.institution_code) if author.institution_code else _("Unaffiliated"),
                         'authorPosition': pos,
                     }
                 else:
@@ -235,13 +286,22 @@ class BasePrintableRandomisedURLs(TournamentMixin, AdministratorMixin, TemplateV
     template_name = 'randomised_url_sheets.html'
 
     def add_urls(self, participants):
+        urls = {}
         for participant in participants:
             url = reverse_tournament('privateurls-person-index', self.tournament, kwargs={'url_key': participant['url_key']})
-            abs_url = self.request.build_absolute_uri(url)
-            qr_code = qrcode.make(abs_url, image_factory=svg.SvgPathImage)
+            participant['url'] = self.request.build_absolute_uri(url)
+            urls[participant['url_key']] = participant['url']
 
-            participant['url'] = abs_url
-            participant['qr'] = qr_code.path.get('d')
+        # Generate at most one chunk of missing QR codes now, and leave the
+        # rest to the background worker, so that the page loads promptly
+        qr_codes = get_cached_qr_codes(urls)
+        missing = [(url_key, url) for url_key, url in urls.items() if url_key not in qr_codes]
+        qr_codes.update(cache_qr_codes(dict(missing[:QR_CODE_CHUNK_SIZE])))
+        queue_qr_codes(dict(missing[QR_CODE_CHUNK_SIZE:]))
+        self.qr_codes_pending = max(len(missing) - QR_CODE_CHUNK_SIZE, 0)
+
+        for participant in participants:
+            participant['qr'] = qr_codes.get(participant['url_key'])
 
         return participants
 
@@ -251,6 +311,7 @@ class BasePrintableRandomisedURLs(TournamentMixin, AdministratorMixin, TemplateV
     def get_context_data(self, **kwargs):
         participants_array = self.get_participants_for_type()
         kwargs['participants'] = self.add_urls(participants_array)
+        kwargs['qr_codes_pending'] = self.qr_codes_pending
         kwargs['exists'] = self.tournament.participants.filter(url_key__isnull=False).exists()
         return super().get_context_data(**kwargs)
 
@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class PrivateUrlsConfig(AppConfig):
     name = 'privateurls'
     verbose_name = _("Private URL Management")
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,14 @@
+from channels.consumer import SyncConsumer
+
+from .utils import cache_qr_codes, get_cached_qr_codes
+
+
+class QRCodeWorkerConsumer(SyncConsumer):
+
+    def generate_qr_codes(self, event):
+        """Generates and caches QR codes for the URLs in the event that aren't
+        already cached. Several page loads might queue the same URLs before the
+        worker gets to them, so cached URLs are skipped."""
+        urls = event['urls']
+        cached = get_cached_qr_codes(urls)
+        cache_qr_codes({url_key: url for url_key, url in urls.items() if url_key not in cached})
@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .utils import bump_landing_version
+
+# How to get from an instance of each model to the ID of its tournament. Senders
+# are given by label, so that this app doesn't depend on the apps it watches.
+TOURNAMENT_ID_PATHS = {
+    'draw.Debate': 'round.tournament_id',
+    'draw.DebateTeam': 'debate.round.tournament_id',
+    'adjallocation.DebateAdjudicator': 'debate.round.tournament_id',
+    'results.BallotSubmission': 'debate.round.tournament_id',
+    'motions.RoundMotion': 'round.tournament_id',
+    'motions.Motion': 'tournament_id',
+    'options.TournamentPreferenceModel': 'instance_id',
+    'checkins.Event': 'tournament_id',
+    'participants.Adjudicator': 'tournament_id',
+    'participants.Speaker': 'team.tournament_id',
+    'participants.Team': 'tournament_id',
+}
+
+
+def _tournament_id(instance):
+    """Returns the ID of the tournament that `instance` belongs to, following
+    only related objects that are already loaded, so that these signals never
+    query the database. Returns None, meaning all tournaments, if one isn't
+    loaded or the model has no path in `TOURNAMENT_ID_PATHS`."""
+    path = TOURNAMENT_ID_PATHS.get(instance._meta.label)
+    if path is None:
+        return None
+    *relations, field = path.split('.')
+    for relation in relations:
+        if not instance._meta.get_field(relation).is_cached(instance):
+            return None
+        instance = getattr(instance, relation)
+    return getattr(instance, field)
+
+
+@receiver(post_delete, sender='draw.Debate')
+@receiver(post_save, sender='draw.Debate')
+@receiver(post_delete, sender='draw.DebateTeam')
+@receiver(post_save, sender='draw.DebateTeam')
+@receiver(post_delete, sender='adjallocation.DebateAdjudicator')
+@receiver(post_save, sender='adjallocation.DebateAdjudicator')
+@receiver(post_delete, sender='results.BallotSubmission')
+@receiver(post_save, sender='results.BallotSubmission')
+@receiver(post_delete, sender='motions.RoundMotion')
+@receiver(post_save, sender='motions.RoundMotion')
+@receiver(post_save, sender='motions.Motion')
+@receiver(post_save, sender='options.TournamentPreferenceModel')
+def update_landing_draw_version(sender, instance, **kwargs):
+    bump_landing_version('draw', _tournament_id(instance))
+
+
+@receiver(post_delete, sender='checkins.Event')
+@receiver(post_save, sender='checkins.Event')
+@receiver(post_delete, sender='checkins.PersonIdentifier')
+@receiver(post_save, sender='checkins.PersonIdentifier')
+def update_landing_checkins_version(sender, instance, **kwargs):
+    bump_landing_version('checkins', _tournament_id(instance))
+
+
+@receiver(post_delete, sender='participants.Adjudicator')
+@receiver(post_save, sender='participants.Adjudicator')
+@receiver(post_delete, sender='participants.Speaker')
+@receiver(post_save, sender='participants.Speaker')
+@receiver(post_delete, sender='participants.Team')
+@receiver(post_save, sender='participants.Team')
+def update_landing_participants_version(sender, instance, **kwargs):
+    # Participants' names are shown on their teammates', opponents' and
+    # panel-mates' pages as well as their own, so this invalidates all of the
+    # tournament's pages. (Pages are cached by URL key and version, so this
+    # also covers changed and deleted URL keys.)
+    bump_landing_version('participants', _tournament_id(instance))
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from adjallocation.models import DebateAdjudicator
+from draw.models import DebateTeam
+from participants.models import Speaker
+from privateurls.utils import get_landing_version, populate_url_keys
+from utils.misc import reverse_tournament
+from utils.tests import CompletedTournamentTestMixin
+
+
+class LandingPageCacheTests(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.debateteam = DebateTeam.objects.filter(debate__round=self.round).select_related(
+            'team__tournament', 'debate__round').first()
+        self.speaker = self.debateteam.team.speaker_set.first()
+        populate_url_keys([self.speaker])
+        self.url = reverse_tournament('privateurls-person-index', self.tournament,
+            kwargs={'url_key': self.speaker.url_key})
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_warm_cache_query_count(self):
+        cold = self.count_queries()
+        warm = self.count_queries()
+        self.assertLess(warm, cold)
+        with self.assertNumQueries(warm):
+            self.client.get(self.url)
+
+    def test_opponent_rename_invalidates(self):
+        self.count_queries()
+        warm = self.count_queries()
+        version = get_landing_version(self.tournament)
+
+        opponent = DebateTeam.objects.filter(debate=self.debateteam.debate).exclude(
+            id=self.debateteam.id).select_related('team__institution').first().team
+        opponent.reference = "Renamed"
+        opponent.save()
+
+        self.assertNotEqual(get_landing_version(self.tournament), version)
+        self.assertGreater(self.count_queries(), warm)
+
+    def test_saves_dont_look_up_tournaments(self):
+        """With their relations loaded, saving these models shouldn't make any
+        queries to find which tournament's landing pages to invalidate."""
+        debateadj = DebateAdjudicator.objects.filter(debate__round=self.round).select_related(
+            'debate__round', 'adjudicator').first()
+        speaker = Speaker.objects.select_related('team__institution').get(id=self.speaker.id)
+        team = speaker.team
+
+        for instance in (debateadj, debateadj.adjudicator, speaker, team, self.debateteam):
+            with self.subTest(model=type(instance).__name__):
+                with CaptureQueriesContext(connection) as queries:
+                    instance.save()
+                selects = [q['sql'] for q in queries if q['sql'].lstrip().upper().startswith('SELECT')]
+                self.assertEqual(selects, [])
@@ -1,13 +1,25 @@
 import logging
 import string
-from typing import Iterable, TYPE_CHECKING
+from typing import Any, Dict, Iterable, Optional, TYPE_CHECKING
+from uuid import uuid4
+
+import qrcode
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import get_language
+from qrcode.image import svg
 
 from participants.models import Person
-from utils.misc import generate_identifier_string
+from utils.misc import bulk_allocate_unique_keys, generate_identifier_string
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
 
+    from tournaments.models import Tournament
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,19 +27,145 @@ def populate_url_keys(people: 'Iterable[Person]', length: int = 8, num_attempts:
     """Populates the URL key field for every instance in the given QuerySet."""
     chars = string.ascii_lowercase + string.digits
 
-    existing_keys = list(Person.objects.exclude(url_key__isnull=True).values_list('url_key', flat=True))
-    for person in people:
-        for i in range(num_attempts):
-            new_key = generate_identifier_string(chars, length)
-            if new_key not in existing_keys:
-                person.url_key = new_key
-                existing_keys.append(new_key)
-                break
-        else:
-            logger.error("Could not generate unique URL for %r after %d tries", person, num_attempts)
-    Person.objects.bulk_update(people, ['url_key'])
+    people = list(people)
+    replaced_keys = [person.url_key for person in people if person.url_key]
+    bulk_allocate_unique_keys(people, 'url_key', lambda: generate_identifier_string(chars, length),
+        Person.objects.all(), num_attempts)
+    invalidate_qr_codes(replaced_keys)
+    invalidate_landing_pages(replaced_keys)
 
 
 def delete_url_keys(queryset: 'QuerySet[Person]') -> None:
     """Deletes URL keys from every instance in the given QuerySet."""
+    url_keys = list(queryset.filter(url_key__isnull=False).values_list('url_key', flat=True))
+    invalidate_qr_codes(url_keys)
+    invalidate_landing_pages(url_keys)
     queryset.update(url_key=None)
+
+
+# ==============================================================================
+# QR codes
+# ==============================================================================
+
+# Maximum number of QR codes generated in one go, either synchronously when a
+# page is loaded or in one message to the background worker
+QR_CODE_CHUNK_SIZE = 100
+
+
+def _qr_code_cache_key(url_key: str) -> str:
+    return "privateurl_qr_%s" % url_key
+
+
+def generate_qr_code(url: str) -> str:
+    """Returns the SVG path data of a QR code for the given URL."""
+    return qrcode.make(url, image_factory=svg.SvgPathImage).path.get('d')
+
+
+def get_cached_qr_codes(urls: Dict[str, str]) -> Dict[str, str]:
+    """`urls` should be a dict mapping URL keys to the absolute URLs of their
+    private URL pages. Returns a dict mapping URL keys to SVG path data, for
+    those URL keys whose QR codes are cached. Cache entries are keyed by URL
+    key, but only match if they were generated for the same absolute URL."""
+    cache_keys = {_qr_code_cache_key(url_key): url_key for url_key in urls}
+    cached = cache.get_many(cache_keys.keys())
+    qr_codes = {}
+    for cache_key, (url, path) in cached.items():
+        url_key = cache_keys[cache_key]
+        if urls[url_key] == url:
+            qr_codes[url_key] = path
+    return qr_codes
+
+
+def cache_qr_codes(urls: Dict[str, str]) -> Dict[str, str]:
+    """Generates and caches QR codes for the given URLs. `urls` should be as
+    for `get_cached_qr_codes()`. Returns a dict mapping URL keys to SVG path data."""
+    qr_codes = {url_key: generate_qr_code(url) for url_key, url in urls.items()}
+    cache.set_many({_qr_code_cache_key(url_key): (urls[url_key], path)
+                    for url_key, path in qr_codes.items()}, timeout=None)
+    return qr_codes
+
+
+def queue_qr_codes(urls: Dict[str, str]) -> None:
+    """Sends the given URLs to the background worker in chunks, so that their
+    QR codes are generated and cached without blocking the current request."""
+    items = list(urls.items())
+    for i in range(0, len(items), QR_CODE_CHUNK_SIZE):
+        async_to_sync(get_channel_layer().send)("privateurls", {
+            "type": "generate_qr_codes",
+            "urls": dict(items[i:i+QR_CODE_CHUNK_SIZE]),
+        })
+
+
+def invalidate_qr_codes(url_keys: 'Iterable[str]') -> None:
+    """Removes cached QR codes for the given URL keys, which should be called
+    whenever URL keys are changed or deleted."""
+    cache.delete_many([_qr_code_cache_key(url_key) for url_key in url_keys])
+
+
+# ==============================================================================
+# Landing page caching
+# ==============================================================================
+
+# Cache keys of tokens that change whenever anything shown on private URL
+# landing pages changes, other than rounds' statuses. Each kind has a token per
+# tournament (the key suffixed with its ID), and one for all tournaments, for
+# changes whose tournament isn't known.
+LANDING_VERSION_KEYS = {
+    'draw': "privateurl_landing_draw_version",
+    'checkins': "privateurl_landing_checkins_version",
+    'participants': "privateurl_landing_participants_version",
+}
+
+
+def _landing_cache_key(url_key: str) -> str:
+    return "privateurl_landing_%s" % url_key
+
+
+def _landing_version_key(kind: str, tournament_id: Optional[int]) -> str:
+    key = LANDING_VERSION_KEYS[kind]
+    return key if tournament_id is None else "%s_%d" % (key, tournament_id)
+
+
+def bump_landing_version(kind: str, tournament_id: Optional[int]) -> None:
+    """Invalidates the cached landing pages of the tournament with ID
+    `tournament_id`, or of all tournaments if it is None, where `kind` (a key
+    of `LANDING_VERSION_KEYS`) is the kind of information that changed."""
+    cache.set(_landing_version_key(kind, tournament_id), uuid4().hex, None)
+
+
+def bump_landing_version_on_commit(kind: str, tournament_id: Optional[int]) -> None:
+    """Calls `bump_landing_version()` once the current transaction commits.
+    This is for changes that don't send model signals, like bulk updates."""
+    transaction.on_commit(lambda: bump_landing_version(kind, tournament_id))
+
+
+def get_landing_version(tournament: 'Tournament') -> str:
+    """Returns a string that identifies the versions of the draw, motions,
+    check-ins and participants of the tournament's current rounds, in the
+    current language."""
+    keys = [_landing_version_key(kind, tournament_id) for tournament_id in (None, tournament.id) for kind in LANDING_VERSION_KEYS]
+    versions = cache.get_many(keys)
+    rounds = ["%d%s%s" % (r.id, r.draw_status, r.motions_status) for r in tournament.current_rounds]
+    return "-".join(rounds + [versions.get(key, "0") for key in keys] + [get_language()])
+
+
+def get_cached_landing_page(url_key: str, tournament: 'Tournament', version: str) -> Optional[Dict[str, Any]]:
+    """Returns the cached landing page payload for the given URL key, or None
+    if there isn't one for this tournament and version."""
+    cached = cache.get(_landing_cache_key(url_key))
+    if cached is None:
+        return None
+    tournament_id, cached_version, payload = cached
+    if tournament_id != tournament.id or cached_version != version:
+        return None
+    return payload
+
+
+def cache_landing_page(url_key: str, tournament: 'Tournament', version: str, payload: Dict[str, Any]) -> None:
+    cache.set(_landing_cache_key(url_key), (tournament.id, version, payload), settings.PUBLIC_SLOW_CACHE_TIMEOUT)
+
+
+def invalidate_landing_pages(url_keys: 'Iterable[str]') -> None:
+    """Removes cached landing pages for the given URL keys, which should be
+    called whenever those people or their URL keys change."""
+    cache.delete_many([_landing_cache_key(url_key) for url_key in url_keys if url_key])
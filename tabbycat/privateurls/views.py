@@ -24,7 +24,7 @@ from utils.mixins import AdministratorMixin
 from utils.tables import TabbycatTableBuilder
 from utils.views import PostOnlyRedirectView, VueTableTemplateView
 
-from .utils import populate_url_keys
+from .utils import cache_landing_page, get_cached_landing_page, get_landing_version, populate_url_keys
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
@@ -197,9 +197,13 @@ class PersonIndexView(SingleObjectByRandomisedUrlMixin, PersonalizablePublicTour
         return True
 
     def get_queryset(self) -> 'QuerySet[Person]':
+        # select_related() on both subclasses also records which one this
+        # person isn't, so that the template doesn't query for it
         return self.model.objects.filter(
-            Q(adjudicator__tournament=self.tournament) | Q(speaker__team__tournament=self.tournament)).prefetch_related(
-            Prefetch('speaker__categories', queryset=SpeakerCategory.objects.filter(public=True)))
+            Q(adjudicator__tournament=self.tournament) | Q(speaker__team__tournament=self.tournament)).select_related(
+            'adjudicator__institution__region', 'speaker__team__institution__region').prefetch_related(
+            Prefetch('speaker__categories', queryset=SpeakerCategory.objects.filter(public=True)),
+            'speaker__team__break_categories', 'speaker__team__speaker_set')
 
     def get_table(self) -> TabbycatTableBuilder:
         if hasattr(self.object, 'adjudicator'):
@@ -207,34 +211,57 @@ class PersonIndexView(SingleObjectByRandomisedUrlMixin, PersonalizablePublicTour
         else:
             return TeamDebateTable.get_table(self, self.object.speaker.team)
 
-    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+    def get_landing_payload(self) -> Dict[str, Any]:
+        """Returns the parts of the context that are expensive to compute and
+        are the same for every load of this person's page, for a given version
+        of the current rounds; see `get_landing_version()`."""
         self.object = self.get_object()
-        t = self.tournament
+        payload = {'object': self.object, 'checkins_used': False}
 
         try:
             checkin_id = PersonIdentifier.objects.get(person=self.object)
-            kwargs['checkins_used'] = True
-            kwargs['identifier'] = checkin_id
+        except ObjectDoesNotExist:
+            pass
+        else:
+            checkin_id.person = self.object
+            payload['checkins_used'] = True
+            payload['identifier'] = checkin_id
+            checkins = get_unexpired_checkins(self.tournament, 'checkin_window_people')
+            payload['event'] = checkins.filter(identifier=checkin_id).first()
 
-            checkins = get_unexpired_checkins(t, 'checkin_window_people')
+        if not hasattr(self.object, 'adjudicator'):
+            team = self.object.speaker.team
+            if invitation := team.invitation_set.first():
+                payload['speaker_invite_path'] = reverse_tournament('reg-create-speaker', self.tournament,
+                    kwargs={'pk': team.pk}) + '?key=' + invitation.url_key
 
-            try:
-                kwargs['event'] = checkins.filter(identifier=checkin_id).first()
-            except ObjectDoesNotExist:
-                kwargs['event'] = False
-        except ObjectDoesNotExist:
-            kwargs['checkins_used'] = False
+        payload.update(self.get_tables_context())
+        return payload
 
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        t = self.tournament
+        url_key = self.kwargs[self.slug_url_kwarg]
+
+        # The landing page is loaded repeatedly by every participant, especially
+        # when the draw is released, so cache what we can for each person
+        version = get_landing_version(t)
+        payload = get_cached_landing_page(url_key, t, version)
+        if payload is None:
+            payload = self.get_landing_payload()
+            cache_landing_page(url_key, t, version, payload)
+        kwargs.update(payload)
+        self.object = kwargs['object']
+        kwargs['landing_version'] = version
+        kwargs['landing_cache_timeout'] = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+
+        if 'speaker_invite_path' in kwargs:
+            kwargs['speaker_invite_link'] = self.request.build_absolute_uri(kwargs['speaker_invite_path'])
+
+        # These are only evaluated if the template's cached fragments are stale
         if hasattr(self.object, 'adjudicator'):
             kwargs['debateadjudications'] = BaseRecordView.allocations_set(self.object.adjudicator, False, self.tournament)
         else:
-            team = self.object.speaker.team
-            kwargs['debateteams'] = BaseRecordView.allocations_set(team, False, self.tournament)
-
-            if invitation := team.invitation_set.first():
-                kwargs['speaker_invite_link'] = self.request.build_absolute_uri(
-                    reverse_tournament('reg-create-speaker', self.tournament, kwargs={'pk': team.pk}) + '?key=' + invitation.url_key,
-                )
+            kwargs['debateteams'] = BaseRecordView.allocations_set(self.object.speaker.team, False, self.tournament)
 
         kwargs['draw_released'] = t.current_round.draw_status == Round.Status.RELEASED
         kwargs['feedback_pref'] = t.pref('participant_feedback') == 'private-urls'
@@ -1,7 +1,7 @@
 import string
 
 from tournaments.models import Tournament
-from utils.misc import generate_identifier_string
+from utils.misc import allocate_unique_keys, generate_identifier_string
 
 from .models import Invitation
 
@@ -10,11 +10,5 @@ def populate_invitation_url_keys(instances: list[Invitation], tournament: Tourna
     """Populates the URL key field for every instance in the given QuerySet."""
     chars = string.ascii_lowercase + string.digits
 
-    existing_keys = list(Invitation.objects.exclude(url_key__isnull=True).values_list('url_key', flat=True))
-    for instance in instances:
-        for i in range(num_attempts):
-            new_key = generate_identifier_string(chars, length)
-            if new_key not in existing_keys:
-                instance.url_key = new_key
-                existing_keys.append(new_key)
-                break
+    existing_keys = set(Invitation.objects.exclude(url_key__isnull=True).values_list('url_key', flat=True))
+    allocate_unique_keys(instances, 'url_key', lambda: generate_identifier_string(chars, length), existing_keys, num_attempts)
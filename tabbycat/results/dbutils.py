@@ -6,13 +6,21 @@ by a front-end interface as well."""
 
 import logging
 import random
+from collections import defaultdict
 from itertools import product
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
 
+from adjallocation.models import DebateAdjudicator
 from draw.models import Debate
-from results.models import BallotSubmission
-from results.result import DebateResult
+from motions.models import DebateTeamMotionPreference
+from results.models import (BallotSubmission, SpeakerCriterionScore, SpeakerCriterionScoreByAdj, SpeakerScore,
+    SpeakerScoreByAdj, TeamScore, TeamScoreByAdj)
+from results.result import DebateResult, ResultError
+from results.utils import bump_results_version
+from standings.diversity import bump_diversity_version
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -31,6 +39,23 @@ def add_results_to_round_partial(round, num, **kwargs):
         add_result(debate, **kwargs)
 
 
+def add_results_to_round_bulk(round, num=None, batch_size=1000, **kwargs):
+    """Like ``add_results_to_round()`` (or ``add_results_to_round_partial()``
+    if ``num`` is given), but generates all ballot sets for the round in memory
+    and writes them using batched inserts, inside a single transaction.
+
+    Results are generated by the same result classes and pass the same validity
+    checks as ``add_result()``, but this assumes that ballot sets are being
+    added, not edited: it doesn't check for existing scores for the new ballot
+    submissions."""
+
+    debates = list(round.debate_set_with_prefetches(teams=True, adjudicators=True, speakers=True,
+            venues=False, ordering=('id',)))
+    if num is not None:
+        debates = random.sample(debates, num)
+    return bulk_add_results(round, debates, batch_size=batch_size, **kwargs)
+
+
 def delete_all_ballotsubs_for_round(round):
     """Deletes all ballot sets from the given round."""
     BallotSubmission.objects.filter(debate__round=round).delete()
@@ -56,7 +81,8 @@ def fill_scoresheet_randomly(scoresheet, tournament, nattempts=1000):
                     step = tournament.pref('score_step')
                     start = tournament.pref('score_min') / step
                     stop = tournament.pref('score_max') / step
-                score = random.randint(start, stop) * step
+                # Score preferences are Decimals, which randint() doesn't accept
+                score = random.randint(int(start), int(stop)) * step
                 scoresheet.set_score(side, pos, score)
 
         if scoresheet.uses_declared_winners:
@@ -69,6 +95,176 @@ def fill_scoresheet_randomly(scoresheet, tournament, nattempts=1000):
         raise RuntimeError("Failed to generate valid scoresheet after %d attempts" % (nattempts,))
 
 
+def _set_speakers(result, debate, tournament, reply_random=False):
+    for side in tournament.sides:
+        speakers = list(debate.get_team(side).speakers)  # fix order
+        for i in range(1, tournament.last_substantive_position+1):
+            result.set_speaker(side, i, speakers[i-1])
+            result.set_ghost(side, i, False)
+
+        if tournament.reply_position is not None:
+            reply_speaker = random.randint(0, tournament.last_substantive_position-2) if reply_random else 0
+            result.set_speaker(side, tournament.reply_position, speakers[reply_speaker])
+            result.set_ghost(side, tournament.reply_position, False)
+
+
+def _fill_result_randomly(result, tournament):
+    if result.is_voting:
+        for scoresheet in result.scoresheets.values():
+            fill_scoresheet_randomly(scoresheet, tournament)
+    else:
+        fill_scoresheet_randomly(result.scoresheet, tournament)
+
+
+def _sample_motions(motions, tournament):
+    """Returns a sample of up to three motions, the first of which is the
+    motion debated and the rest of which are vetoes, if vetoes apply."""
+    if not motions:
+        return []
+    sample = random.sample(motions, k=min(3, len(motions)))
+    if not (tournament.pref('motion_vetoes_enabled') and len(sample) == len(tournament.sides) + 1):
+        sample = sample[:1]
+    return sample
+
+
+def result_instances(result):
+    """Returns a dict mapping score models to lists of unsaved instances of
+    that model, being the instances that ``result.save()`` would write for a
+    new ballot submission. Criterion score instances refer to their (unsaved)
+    speaker score instances, so parents must be inserted first.
+
+    This mirrors the ``save()`` methods of the result classes, and is used to
+    insert results in bulk."""
+
+    if not result.is_valid():
+        raise ResultError("Tried to save an invalid result.")
+
+    bsub = result.ballotsub
+    instances = defaultdict(list)
+
+    for side in result.sides:
+        dt = result.debateteams[side]
+        instances[TeamScore].append(TeamScore(ballot_submission=bsub, debate_team=dt,
+                **result.get_defaults_fields('teamscore', side)))
+
+        if result.uses_speakers:
+            for pos in result.positions:
+                ss = SpeakerScore(ballot_submission=bsub, debate_team=dt, position=pos,
+                        **result.get_defaults_fields('speakerscore', side, pos))
+                instances[SpeakerScore].append(ss)
+                for criterion in result.criteria:
+                    instances[SpeakerCriterionScore].append(SpeakerCriterionScore(speaker_score=ss, criterion=criterion,
+                            **result.get_defaults_fields('speakercriterionscore', side, pos, criterion)))
+
+        if result.is_voting:
+            for adj in result.scoresheets:
+                da = result.debateadjs[adj]
+                instances[TeamScoreByAdj].append(TeamScoreByAdj(ballot_submission=bsub, debate_team=dt, debate_adjudicator=da,
+                        **result.get_defaults_fields('teamscorebyadj', adj, side)))
+                if not result.uses_speakers:
+                    continue
+                for pos in result.positions:
+                    ssba = SpeakerScoreByAdj(ballot_submission=bsub, debate_team=dt, debate_adjudicator=da, position=pos,
+                            **result.get_defaults_fields('speakerscorebyadj', adj, side, pos))
+                    instances[SpeakerScoreByAdj].append(ssba)
+                    for criterion in result.criteria:
+                        instances[SpeakerCriterionScoreByAdj].append(SpeakerCriterionScoreByAdj(speaker_score_by_adj=ssba, criterion=criterion,
+                                **result.get_defaults_fields('speakercriterionscorebyadj', adj, side, pos, criterion)))
+
+    return instances
+
+
+def bulk_add_results(round, debates, submitter_type, user, discarded=False, confirmed=False, reply_random=False, batch_size=1000):
+    """Adds a ballot set to each debate in ``debates``, all of which must be in
+    ``round``, using batched inserts. Arguments are as for ``add_result()``.
+    For best performance, debates should have their teams (with speakers) and
+    adjudicators prefetched, as ``round.debate_set_with_prefetches()`` does.
+    Returns a list of the DebateResult objects created."""
+
+    if discarded and confirmed:
+        raise ValueError("Ballot can't be both discarded and confirmed!")
+
+    t = round.tournament
+    criteria = list(t.scorecriterion_set.all())
+    motions = list(round.motion_set.all())
+    debate_ids = [debate.id for debate in debates]
+
+    with transaction.atomic():
+        Debate.objects.filter(id__in=debate_ids, sides_confirmed=False).update(sides_confirmed=True)
+        for debate in debates:
+            debate.sides_confirmed = True
+
+        # Mirror what Submission.save() does for each ballot submission
+        versions = dict(BallotSubmission.objects.filter(debate_id__in=debate_ids).values(
+            'debate_id').annotate(Max('version')).values_list('debate_id', 'version__max'))
+        if confirmed:
+            BallotSubmission.objects.filter(debate_id__in=debate_ids, confirmed=True).update(confirmed=False)
+
+        bsubs = []
+        vetoes = {}
+        for debate in debates:
+            bsub = BallotSubmission(submitter_type=submitter_type, debate=debate,
+                    version=versions.get(debate.id, 0) + 1, discarded=discarded, confirmed=confirmed)
+            if submitter_type == BallotSubmission.Submitter.TABROOM:
+                bsub.submitter = user
+            sample = _sample_motions(motions, t)
+            if sample:
+                bsub.motion = sample[0]
+                vetoes[debate.id] = sample[1:]
+            bsubs.append(bsub)
+        BallotSubmission.objects.bulk_create(bsubs, batch_size=batch_size)
+
+        results = []
+        instances = defaultdict(list)
+        preferences = []
+        for bsub in bsubs:
+            debate = bsub.debate
+            result = DebateResult(bsub, load=False, round=round, tournament=t, criteria=criteria)
+            result.init_blank_buffer()
+            for dt in debate.debateteams:
+                result.debateteams[dt.side] = dt
+            if result.is_voting:
+                for da in debate.debateadjudicator_set.all():
+                    if da.type == DebateAdjudicator.TYPE_TRAINEE:
+                        continue
+                    result.debateadjs[da.adjudicator] = da
+                    result.scoresheets[da.adjudicator] = result.scoresheet_class(
+                        sides=result.sides, positions=getattr(result, 'positions', None), criteria=criteria)
+            result.assert_loaded()
+
+            if result.uses_speakers:
+                _set_speakers(result, debate, t, reply_random)
+            _fill_result_randomly(result, t)
+            assert result.is_valid()
+
+            for model, objs in result_instances(result).items():
+                instances[model].extend(objs)
+            for side, motion in zip(t.sides, vetoes.get(debate.id, [])):
+                preferences.append(DebateTeamMotionPreference(debate_team=debate.get_dt(side),
+                        motion=motion, preference=3, ballot_submission=bsub))
+            results.append(result)
+
+        # Parents must be created before criterion scores, which refer to them
+        for model in [TeamScore, TeamScoreByAdj, SpeakerScore, SpeakerScoreByAdj,
+                      SpeakerCriterionScore, SpeakerCriterionScoreByAdj]:
+            model.objects.bulk_create(instances[model], batch_size=batch_size)
+        DebateTeamMotionPreference.objects.bulk_create(preferences, batch_size=batch_size)
+
+        # Update result status (only takes into account marginal effect, does not "fix")
+        if confirmed:
+            Debate.objects.filter(id__in=debate_ids).update(result_status=Debate.STATUS_CONFIRMED)
+        elif not discarded:
+            Debate.objects.filter(id__in=debate_ids).exclude(
+                result_status=Debate.STATUS_CONFIRMED).update(result_status=Debate.STATUS_DRAFT)
+
+        # Bulk operations don't send the signals that would do this
+        transaction.on_commit(bump_results_version)
+        transaction.on_commit(bump_diversity_version)
+
+    logger.info("Added %d ballot sets to %s in bulk", len(results), round.name)
+    return results
+
+
 def add_result(debate, submitter_type, user, discarded=False, confirmed=False, reply_random=False):
     """Adds a ballot set to a debate.
 
@@ -98,22 +294,9 @@ def add_result(debate, submitter_type, user, discarded=False, confirmed=False, r
     result = DebateResult(bsub)
 
     if result.uses_speakers:
-        for side in t.sides:
-            speakers = list(debate.get_team(side).speakers)  # fix order
-            for i in range(1, t.last_substantive_position+1):
-                result.set_speaker(side, i, speakers[i-1])
-                result.set_ghost(side, i, False)
-
-            if t.reply_position is not None:
-                reply_speaker = random.randint(0, t.last_substantive_position-2) if reply_random else 0
-                result.set_speaker(side, t.reply_position, speakers[reply_speaker])
-                result.set_ghost(side, t.reply_position, False)
+        _set_speakers(result, debate, t, reply_random)
 
-    if result.is_voting:
-        for scoresheet in result.scoresheets.values():
-            fill_scoresheet_randomly(scoresheet, t)
-    else:
-        fill_scoresheet_randomly(result.scoresheet, t)
+    _fill_result_randomly(result, t)
 
     assert result.is_valid()
     result.save()
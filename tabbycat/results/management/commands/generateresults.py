@@ -3,7 +3,8 @@ from django.core.management.base import CommandError
 
 from adjallocation.models import DebateAdjudicator
 from draw.models import Debate
-from results.dbutils import add_result, add_results_to_round, add_results_to_round_partial, delete_all_ballotsubs_for_round, delete_ballotsub
+from results.dbutils import (add_result, add_results_to_round, add_results_to_round_bulk, add_results_to_round_partial,
+    delete_all_ballotsubs_for_round, delete_ballotsub)
 from results.models import BallotSubmission
 from utils.management.base import RoundCommand
 
@@ -31,6 +32,9 @@ class GenerateResultsCommandMixin:
             help="Create user if it doesn't exist")
         results_group.add_argument("--reply-random", action="store_true", default=False,
             help="Choose reply speaker at random (rather than always use first speaker)")
+        results_group.add_argument("--bulk", action="store_true", default=False,
+            help="Generate all ballot sets for each round in memory and insert them "
+                 "using batched writes, in one transaction per round")
 
         status = results_group.add_mutually_exclusive_group(required=True)
         status.add_argument("-D", "--discarded", action="store_true",
@@ -100,7 +104,12 @@ class Command(GenerateResultsCommandMixin, RoundCommand):
             delete_all_ballotsubs_for_round(round)
 
         try:
-            if options["num_ballots"] is not None:
+            if options["bulk"]:
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    "Generating ballot sets for {} debates in {} in bulk...".format(
+                        options["num_ballots"] if options["num_ballots"] is not None else "all", round.name)))
+                add_results_to_round_bulk(round, options["num_ballots"], **self.result_kwargs(options))
+            elif options["num_ballots"] is not None:
                 self.stdout.write(self.style.MIGRATE_HEADING(
                     "Generating ballot sets for {:d} randomly-chosen debates "
                     "in {}...".format(options["num_ballots"], round.name)))
@@ -139,6 +139,16 @@ class BallotSubmission(Submission):
             self._result = DebateResult(self)
         return self._result
 
+    @property
+    def result_summary(self):
+        """A DebateResultSummary, which provides winners, points and totals
+        without loading scoresheets. If the full result is needed, use
+        `self.result` instead."""
+        if not hasattr(self, "_result_summary"):
+            from .prefetch import populate_result_summaries
+            populate_result_summaries([self], self.debate.round.tournament)
+        return self._result_summary
+
     def clean(self):
         # The motion must be from the relevant round
         super().clean()
@@ -152,11 +162,9 @@ class BallotSubmission(Submission):
 
     @property
     def serialize_like_actionlog(self):
-        if hasattr(self, '_result'):
-            dr = self._result
-        else:
-            from results.result import DebateResult
-            dr = DebateResult(self)
+        # Only the winners are needed, so don't load the full result unless
+        # it's already been loaded
+        dr = self._result if hasattr(self, '_result') else self.result_summary
         result_winner, result = readable_ballotsub_result(dr)
         return {
             'user': result_winner,
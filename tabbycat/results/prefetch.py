@@ -1,13 +1,15 @@
 """Functions that prefetch data for efficiency."""
 from itertools import groupby
 
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 from checkins.utils import get_checkins
-from draw.models import DebateTeam
-from tournaments.models import Tournament
+from draw.models import Debate, DebateTeam
+from tournaments.models import Round, Tournament
 
 from .models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore, TeamScoreByAdj
 from .result import DebateResult, is_integer_step
+from .result_summary import DebateResultSummary
 
 
 def populate_wins(debates):
@@ -39,7 +41,7 @@ def populate_wins_for_debateteams(debateteams):
             debateteam._points = None
 
 
-def populate_confirmed_ballots(debates, motions=False, results=False):
+def populate_confirmed_ballots(debates, motions=False, results=False, summaries=False):
     """Sets an attribute `_confirmed_ballot` on each Debate, each being the
     BallotSubmission instance for that debate.
 
@@ -48,16 +50,20 @@ def populate_confirmed_ballots(debates, motions=False, results=False):
     This can be used for efficiency, since it retrieves all the
     information in bulk in a single SQL query. Operates in-place.
 
-    For best performance, the debates should already have
-    debateadjudicator_set__adjudicator prefetched.
+    If `results` is True, the full DebateResult of each ballot is populated
+    using `populate_results()`. If `summaries` is True, a lightweight
+    DebateResultSummary is populated instead using `populate_result_summaries()`.
+    Either way, each confirmed ballot's `debate` is set to the corresponding
+    instance in `debates`, so that prefetches on those carry over.
     """
     confirmed_ballots = BallotSubmission.objects.filter(debate__in=debates, confirmed=True)
     if motions:
         confirmed_ballots = confirmed_ballots.select_related('motion')
-    if results:
-        confirmed_ballots = confirmed_ballots.select_related(
-            'debate__round__tournament').prefetch_related(
-            'debate__debateadjudicator_set__adjudicator__institution')
+
+    debates_by_id = {debate.id: debate for debate in debates}
+    confirmed_ballots = list(confirmed_ballots)
+    for ballotsub in confirmed_ballots:
+        ballotsub.debate = debates_by_id[ballotsub.debate_id]
 
     ballotsubs_by_debate_id = {ballotsub.debate_id: ballotsub for ballotsub in confirmed_ballots}
     for debate in debates:
@@ -65,18 +71,97 @@ def populate_confirmed_ballots(debates, motions=False, results=False):
 
     if results:
         populate_results(confirmed_ballots)
+    elif summaries:
+        populate_result_summaries(confirmed_ballots)
+
+
+def populate_prefetched_confirmed_ballots(debates, results=False, summaries=False):
+    """Like `populate_confirmed_ballots()`, but takes each debate's confirmed
+    ballot from its prefetched `ballotsubmission_set`, rather than querying the
+    confirmed ballots again. The prefetch should select related motions if
+    they're needed."""
+    confirmed_ballots = []
+    for debate in debates:
+        debate._confirmed_ballot = None
+        for ballotsub in debate.ballotsubmission_set.all():
+            if ballotsub.confirmed:
+                ballotsub.debate = debate
+                debate._confirmed_ballot = ballotsub
+                confirmed_ballots.append(ballotsub)
+
+    if not confirmed_ballots:
+        return
+    if results:
+        populate_results(confirmed_ballots, confirmed_ballots[0].debate.round.tournament)
+    elif summaries:
+        populate_result_summaries(confirmed_ballots, confirmed_ballots[0].debate.round.tournament)
 
 
 def populate_checkins(debates, tournament):
     get_checkins(debates, tournament, None)
 
 
+def _populate_debates(ballotsubs, tournament):
+    """Ensures that every ballot submission in `ballotsubs` has its debate and
+    round cached, with a single Round instance per round and `tournament` as
+    the round's tournament. This way, per-round and per-tournament caches (like
+    `Round.is_last` and `Tournament.pref()`) are shared across ballots, rather
+    than being recomputed for each one. Costs at most two queries."""
+
+    missing_debate_ids = {bs.debate_id for bs in ballotsubs if not BallotSubmission.debate.is_cached(bs)}
+    if missing_debate_ids:
+        debates_by_id = Debate.objects.in_bulk(missing_debate_ids)
+        for ballotsub in ballotsubs:
+            if ballotsub.debate_id in debates_by_id:
+                ballotsub.debate = debates_by_id[ballotsub.debate_id]
+
+    debates = list({bs.debate_id: bs.debate for bs in ballotsubs}.values())
+    rounds_by_id = {d.round_id: d.round for d in debates if Debate.round.is_cached(d)}
+    missing_round_ids = {d.round_id for d in debates} - set(rounds_by_id)
+    if missing_round_ids:
+        rounds_by_id.update(Round.objects.in_bulk(missing_round_ids))
+
+    for r in rounds_by_id.values():
+        if r.tournament_id == tournament.id:
+            r.tournament = tournament
+    for debate in debates:
+        debate.round = rounds_by_id[debate.round_id]
+
+    return debates
+
+
+def _populate_adjudicators(debates):
+    """Sets `debate._adjudicators` on each debate that doesn't already have it,
+    and returns a dict mapping DebateAdjudicator IDs to DebateAdjudicator
+    instances, all in a single query."""
+
+    debateadjs = DebateAdjudicator.objects.filter(
+        debate__in=debates,
+    ).select_related('adjudicator__institution', 'adjudicator__tournament')
+
+    debateadjs_by_debate_id = {}
+    for da in debateadjs:
+        debateadjs_by_debate_id.setdefault(da.debate_id, []).append(da)
+
+    for debate in debates:
+        if hasattr(debate, '_adjudicators'):
+            continue
+        das = debateadjs_by_debate_id.get(debate.id, [])
+        chair = next((da.adjudicator for da in das if da.type == DebateAdjudicator.TYPE_CHAIR), None)
+        panellists = sorted([da.adjudicator for da in das if da.type == DebateAdjudicator.TYPE_PANEL], key=lambda adj: adj.name)
+        trainees = sorted([da.adjudicator for da in das if da.type == DebateAdjudicator.TYPE_TRAINEE], key=lambda adj: adj.name)
+        debate._adjudicators = AdjudicatorAllocation(debate, chair=chair, panellists=panellists, trainees=trainees)
+
+    return {da.id: da for das in debateadjs_by_debate_id.values() for da in das}
+
+
 def populate_results(ballotsubs, tournament=None):
     """Populates the `_result` attribute of each BallotSubmission in
     `ballotsubs` with a populated DebateResult instance.
 
-    For best performance, the ballot submissions should already have their
-    debates prefetched (using select_related).
+    All relations are loaded in a fixed number of queries, regardless of the
+    number of ballot submissions. Ballot submissions whose debates (and their
+    rounds) aren't already cached have them fetched in bulk.
     """
 
     # If the database is correct, some checks like `result.is_voting`,
@@ -87,23 +172,26 @@ def populate_results(ballotsubs, tournament=None):
     if not ballotsubs:
         return
 
+    ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
     if tournament is None:
         tournament = Tournament.objects.get(round__debate__ballotsubmission=ballotsubs[0])
     positions = tournament.positions
-    ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
+    debates = _populate_debates(ballotsubs, tournament)
 
     results_by_debate_id = {}
     results_by_ballotsub_id = {}
 
     debateteams = DebateTeam.objects.filter(
-        debate__ballotsubmission__in=ballotsubs,
-    ).select_related('team', 'team__tournament').order_by('debate_id').distinct()
+        debate__in=debates,
+    ).select_related('team', 'team__tournament').order_by('debate_id')
     nsides_per_debate = {d_id: max([dt.side for dt in dts]) + 1 for d_id, dts in groupby(debateteams, key=lambda dt: dt.debate_id)}
-    criteria = tournament.scorecriterion_set.all()
+    sides_by_debateteam_id = {dt.id: dt.side for dt in debateteams}
+    criteria = list(tournament.scorecriterion_set.all())
 
     # Create the DebateResults
     for ballotsub in ballotsubs:
-        result = DebateResult(ballotsub, load=False, sides=range(nsides_per_debate.get(ballotsub.debate_id, tournament.pref('teams_in_debate'))), criteria=criteria)
+        result = DebateResult(ballotsub, load=False, round=ballotsub.debate.round, tournament=tournament,
+            sides=range(nsides_per_debate.get(ballotsub.debate_id, tournament.pref('teams_in_debate'))), criteria=criteria)
         result.init_blank_buffer()
 
         ballotsub._result = result
@@ -119,13 +207,14 @@ def populate_results(ballotsubs, tournament=None):
     speakerscores = SpeakerScore.objects.filter(
         ballot_submission__in=ballotsubs,
         position__in=positions,
-    ).select_related('speaker', 'speaker__team__tournament', 'debate_team').prefetch_related('speakercriterionscore_set__criterion')
+    ).select_related('speaker', 'speaker__team__tournament').prefetch_related('speakercriterionscore_set__criterion')
 
     for ss in speakerscores:
         result = results_by_ballotsub_id[ss.ballot_submission_id]
+        side = sides_by_debateteam_id[ss.debate_team_id]
         if result.uses_speakers:
-            result.speakers[ss.debate_team.side][ss.position] = ss.speaker
-            result.ghosts[ss.debate_team.side][ss.position] = ss.ghost
+            result.speakers[side][ss.position] = ss.speaker
+            result.ghosts[side][ss.position] = ss.ghost
 
             if not result.is_voting:
                 int_step = is_integer_step(tournament, ss)
@@ -133,19 +222,17 @@ def populate_results(ballotsubs, tournament=None):
                     for criterion_score in ss.speakercriterionscore_set.all():
                         score = criterion_score.score
                         score = int(score) if int_step and int(score) == score else score
-                        result.set_criterion_score(ss.debate_team.side, ss.position, criterion_score.criterion, score)
+                        result.set_criterion_score(side, ss.position, criterion_score.criterion, score)
                 else:
-                    result.set_score(ss.debate_team.side, ss.position, int(ss.score) if int_step and ss.score % 1 == 0 else ss.score)
-                    result.set_speaker_rank(ss.debate_team.side, ss.position, ss.rank)
+                    result.set_score(side, ss.position, int(ss.score) if int_step and ss.score % 1 == 0 else ss.score)
+                    result.set_speaker_rank(side, ss.position, ss.rank)
 
     # Populate scoresheets (load_scoresheets)
-    debateadjs = DebateAdjudicator.objects.filter(
-        debate__ballotsubmission__in=ballotsubs,
-    ).exclude(
-        type=DebateAdjudicator.TYPE_TRAINEE,
-    ).select_related('adjudicator__institution', 'adjudicator__tournament').distinct()
+    debateadjs_by_id = _populate_adjudicators(debates)
 
-    for da in debateadjs:
+    for da in debateadjs_by_id.values():
+        if da.type == DebateAdjudicator.TYPE_TRAINEE:
+            continue
         for result in results_by_debate_id[da.debate_id]:
             if result.is_voting:
                 result.debateadjs[da.adjudicator] = da
@@ -154,42 +241,81 @@ def populate_results(ballotsubs, tournament=None):
     ssbas = SpeakerScoreByAdj.objects.filter(
         ballot_submission__in=ballotsubs,
         position__in=positions,
-    ).select_related('debate_adjudicator__adjudicator__institution', 'debate_team').prefetch_related('speakercriterionscorebyadj_set__criterion')
+    ).prefetch_related('speakercriterionscorebyadj_set__criterion')
 
     for ssba in ssbas:
         result = results_by_ballotsub_id[ssba.ballot_submission_id]
         int_step = is_integer_step(tournament, ssba)
         if result.uses_speakers and result.is_voting:
+            adj = debateadjs_by_id[ssba.debate_adjudicator_id].adjudicator
+            side = sides_by_debateteam_id[ssba.debate_team_id]
             if len(ssba.speakercriterionscorebyadj_set.all()) > 0:
                 for criterion_score in ssba.speakercriterionscorebyadj_set.all():
                     score = criterion_score.score
                     score = int(criterion_score.score) if int_step and criterion_score.score % 1 == 0 else score
-                    result.set_criterion_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side, ssba.position, criterion_score.criterion, score)
+                    result.set_criterion_score(adj, side, ssba.position, criterion_score.criterion, score)
             else:
-                result.set_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side,
-                    ssba.position, int(ssba.score) if int_step and ssba.score % 1 == 0 else ssba.score)
+                result.set_score(adj, side, ssba.position, int(ssba.score) if int_step and ssba.score % 1 == 0 else ssba.score)
 
     # Populate advancing (load_advancing)
     teamscores = TeamScore.objects.filter(
-        ballot_submission__in=ballotsubs,
-    ).select_related('debate_team')
+        ballot_submission__in=ballotsubs, win=True,
+    ).values_list('ballot_submission_id', 'debate_team_id')
 
-    for ts in teamscores:
-        result = results_by_ballotsub_id[ts.ballot_submission_id]
-        if result.uses_declared_winners and ts.win and not result.is_voting:
-            result.add_winner(ts.debate_team.side)
+    for ballotsub_id, debateteam_id in teamscores:
+        result = results_by_ballotsub_id[ballotsub_id]
+        if result.uses_declared_winners and not result.is_voting:
+            result.add_winner(sides_by_debateteam_id[debateteam_id])
 
     # Populate advancing (load_advancing)
     teamscoresbyadj = TeamScoreByAdj.objects.filter(
-        ballot_submission__in=ballotsubs,
-    ).select_related('debate_team')
+        ballot_submission__in=ballotsubs, win=True,
+    ).values_list('ballot_submission_id', 'debate_adjudicator_id', 'debate_team_id')
 
-    for tsba in teamscoresbyadj:
-        result = results_by_ballotsub_id[tsba.ballot_submission_id]
-        if result.uses_declared_winners and tsba.win:
-            result.add_winner(tsba.debate_adjudicator.adjudicator, tsba.debate_team.side)
+    for ballotsub_id, debateadj_id, debateteam_id in teamscoresbyadj:
+        result = results_by_ballotsub_id[ballotsub_id]
+        if result.uses_declared_winners:
+            result.add_winner(debateadjs_by_id[debateadj_id].adjudicator, sides_by_debateteam_id[debateteam_id])
 
     # Finally, check that everything is in order
 
     for ballotsub in ballotsubs:
         ballotsub.result.assert_loaded()
+
+
+def populate_result_summaries(ballotsubs, tournament=None):
+    """Populates the `_result_summary` attribute of each BallotSubmission in
+    `ballotsubs` with a DebateResultSummary instance, which provides winners,
+    points and totals without loading scoresheets.
+
+    This uses a fixed number of queries, regardless of the number of ballot
+    submissions. Summaries are built from saved TeamScores, so this shouldn't
+    be used on ballot submissions whose results haven't been saved.
+    """
+
+    if not ballotsubs:
+        return
+
+    ballotsubs = list(ballotsubs)
+    if tournament is None:
+        tournament = Tournament.objects.get(round__debate__ballotsubmission=ballotsubs[0])
+    _populate_debates(ballotsubs, tournament)
+
+    debateteams_by_debate_id = {}
+    debateteams = DebateTeam.objects.filter(
+        debate__ballotsubmission__in=ballotsubs,
+    ).select_related('team').distinct()
+    for dt in debateteams:
+        debateteams_by_debate_id.setdefault(dt.debate_id, []).append(dt)
+    sides_by_debateteam_id = {dt.id: dt.side for dt in debateteams}
+
+    summaries_by_ballotsub_id = {}
+    for ballotsub in ballotsubs:
+        ballotsub._result_summary = DebateResultSummary(ballotsub, debateteams_by_debate_id.get(ballotsub.debate_id, []),
+            round=ballotsub.debate.round, tournament=tournament)
+        summaries_by_ballotsub_id[ballotsub.id] = ballotsub._result_summary
+
+    teamscores = TeamScore.objects.filter(ballot_submission__in=ballotsubs).values_list(
+        'ballot_submission_id', 'debate_team_id', 'points', 'win', 'score', 'margin')
+    for ballotsub_id, debateteam_id, points, win, score, margin in teamscores:
+        summaries_by_ballotsub_id[ballotsub_id].set_teamscore(sides_by_debateteam_id[debateteam_id], points, win, score, margin)
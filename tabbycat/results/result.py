@@ -262,6 +262,17 @@ class BaseDebateResult:
             return False
         return True
 
+    def fingerprint(self):
+        """Returns a hashable representation of the result, such that two
+        results of the same class are identical if and only if their
+        fingerprints are equal. This allows identical results to be found by
+        grouping, rather than by comparing every pair using `identical()`.
+        Subclasses should extend this whenever they extend `identical()`."""
+        return (
+            self.__class__.__name__,
+            tuple((side, getattr(dt, 'pk', None)) for side, dt in sorted(self.debateteams.items())),
+        )
+
     # --------------------------------------------------------------------------
     # Load and save methods
     # --------------------------------------------------------------------------
@@ -443,6 +454,11 @@ class DebateResultByAdjudicator(BaseDebateResult):
                 return False
         return True
 
+    def fingerprint(self):
+        return super().fingerprint() + (
+            tuple(sorted((adj.pk, sheet.fingerprint()) for adj, sheet in self.scoresheets.items())),
+        )
+
     # --------------------------------------------------------------------------
     # Load and save methods
     # --------------------------------------------------------------------------
@@ -721,6 +737,12 @@ class DebateResultWithScoresMixin:
             return False
         return True
 
+    def fingerprint(self):
+        return super().fingerprint() + (
+            tuple((side, tuple((pos, getattr(speaker, 'pk', None)) for pos, speaker in sorted(self.speakers[side].items()))) for side in self.sides),
+            tuple((side, tuple(sorted(self.ghosts[side].items()))) for side in self.sides),
+        )
+
     def merge_speaker_order(self, result: BaseDebateResult) -> list[ResultError]:
         errors = []
         for side, pos in product(self.sides, self.positions):
@@ -936,6 +958,9 @@ class ConsensusDebateResult(BaseDebateResult):
     def identical(self, other):
         return super().identical(other) and hasattr(other, 'scoresheet') and self.scoresheet.identical(other.scoresheet)
 
+    def fingerprint(self):
+        return super().fingerprint() + (self.scoresheet.fingerprint(),)
+
     def populate_from_merge(self, *results) -> list[ResultError]:
         errors = []
         for result in results:
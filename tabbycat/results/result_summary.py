@@ -0,0 +1,91 @@
+"""Lightweight debate result summaries.
+
+A DebateResultSummary exposes the outcome of a ballot submission (winners,
+points and team totals) without loading scoresheets, speakers or per-adjudicator
+scores. It is built from the TeamScore rows that DebateResult classes save, so
+it is only meaningful for ballot submissions whose results have been saved.
+
+It implements the subset of the DebateResult interface used to describe the
+outcome of a debate (e.g. by `readable_ballotsub_result()`), so that callers
+that only need winners or totals can use it in place of a full result. Use
+`results.prefetch.populate_result_summaries()` to load these in bulk.
+"""
+
+from .result import ConsensusDebateResult, get_result_class
+
+
+class DebateResultSummary:
+
+    def __init__(self, ballotsub, debateteams, round=None, tournament=None):
+        """`debateteams` should be a list of DebateTeam instances for the
+        ballot's debate. Team scores are set afterwards, using `set_teamscore()`.
+        """
+        self.ballotsub = ballotsub
+        self.debate = ballotsub.debate
+        if round is None:
+            round = self.debate.round
+        if tournament is None:
+            tournament = round.tournament
+        self.tournament = tournament
+
+        result_class = get_result_class(ballotsub, round, tournament)
+        self.is_voting = result_class.is_voting
+        self.uses_speakers = result_class.uses_speakers
+
+        self.debateteams = {dt.side: dt for dt in sorted(debateteams, key=lambda dt: dt.side)}
+        self.sides = list(self.debateteams.keys())
+
+        # Consensus results without scores in debates with more than two teams
+        # have only advancing teams; other results all have ranks. This mirrors
+        # which scoresheets have `ranked_sides()` in the full result classes.
+        self.is_elimination = not self.is_voting and (len(self.sides) == 2 or result_class is ConsensusDebateResult)
+
+        self.points = dict.fromkeys(self.sides, None)
+        self.scores = dict.fromkeys(self.sides, None)
+        self.margins = dict.fromkeys(self.sides, None)
+        self.winners = set()
+
+    def __repr__(self):
+        return "<{classname} at {id:#x} for {bsub!s}>".format(
+            classname=self.__class__.__name__, id=id(self), bsub=self.ballotsub)
+
+    def set_teamscore(self, side, points, win, score, margin):
+        self.points[side] = points
+        self.scores[side] = score
+        self.margins[side] = margin
+        if win:
+            self.winners.add(side)
+
+    def get_winner(self):
+        return self.winners
+
+    def winning_side(self):
+        if len(self.winners) == 0:
+            return None
+        assert len(self.winners) == 1, "Should not be called with BP"
+        return next(iter(self.winners))
+
+    def winning_dt(self):
+        return self.debateteams.get(self.winning_side())
+
+    def winning_team(self):
+        return self.winning_dt().team
+
+    def losing_dt(self):
+        return [dt for s, dt in self.debateteams.items() if s != self.winning_side()][0]
+
+    def advancing_dt(self):
+        return [dt for s, dt in self.debateteams.items() if s in self.winners]
+
+    def advancing_teams(self):
+        return [dt.team for dt in self.advancing_dt()]
+
+    def eliminated_dt(self):
+        return [dt for s, dt in self.debateteams.items() if s not in self.winners]
+
+    def get_ranked_dt(self):
+        ranked_sides = sorted((s for s in self.sides if self.points[s] is not None), key=lambda s: -self.points[s])
+        return [self.debateteams[s] for s in ranked_sides]
+
+    def total(self, side):
+        return self.scores[side]
@@ -33,6 +33,12 @@ class BaseScoresheet:
         """Base implementation. Does nothing."""
         return True
 
+    def fingerprint(self):
+        """Returns a hashable representation of the scoresheet, such that two
+        scoresheets are identical if and only if their fingerprints are equal.
+        Subclasses should extend this whenever they extend `identical()`."""
+        return ()
+
     def winners(self):
         """Returns {DebateSide.AFF} is the affirmative team won, and {DebateSide.NEG} if the negative
         team won. `self._get_winners()` must be implemented by subclasses."""
@@ -101,6 +107,12 @@ class ScoresMixin:
     def identical(self, other):
         return super().identical(other) and self.scores == other.scores and self.speaker_ranks == other.speaker_ranks
 
+    def fingerprint(self):
+        return super().fingerprint() + (
+            tuple((side, tuple(sorted(self.scores[side].items()))) for side in self.sides),
+            tuple((side, tuple(sorted(self.speaker_ranks[side].items()))) for side in self.sides),
+        )
+
 
 class DeclaredWinnersMixin:
     """Provides functionality for explicit declaration of winner(s)."""
@@ -126,6 +138,9 @@ class DeclaredWinnersMixin:
     def identical(self, other):
         return super().identical(other) and set(self._get_winners()) == set(other._get_winners())
 
+    def fingerprint(self):
+        return super().fingerprint() + (frozenset(self.declared_winners),)
+
     def _get_winners(self):
         assert len(self.declared_winners) == self.number_winners, "There can only be this number of winners: %d" % self.number_winners
         return self.declared_winners
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import Debate, DebateTeam
+from options.models import TournamentPreferenceModel
+from participants.models import Speaker, SpeakerCategory, Team
+from tournaments.models import Round
+
+from .models import BallotSubmission, SpeakerScore, TeamScore
+from .utils import bump_results_version
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+@receiver(post_delete, sender=TeamScore)
+@receiver(post_save, sender=TeamScore)
+@receiver(post_delete, sender=SpeakerScore)
+@receiver(post_save, sender=SpeakerScore)
+@receiver(post_delete, sender=Debate)
+@receiver(post_save, sender=Debate)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=Speaker)
+@receiver(post_delete, sender=SpeakerCategory)
+@receiver(post_save, sender=SpeakerCategory)
+@receiver(m2m_changed, sender=Speaker.categories.through)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def update_results_version(sender, **kwargs):
+    # Bump only once the change is visible to other connections, so that a
+    # concurrent request can't cache old results against the new version
+    transaction.on_commit(bump_results_version)
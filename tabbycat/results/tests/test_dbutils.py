@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from draw.models import Debate
+from results.dbutils import add_results_to_round_bulk, delete_all_ballotsubs_for_round
+from results.models import BallotSubmission, TeamScore
+from results.prefetch import populate_results
+from utils.tests import CompletedTournamentTestMixin
+
+User = get_user_model()
+
+
+class BulkAddResultsTestCase(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_bulk_add_results(self):
+        user = User.objects.create_user("bulk", "", "bulk")
+        delete_all_ballotsubs_for_round(self.round)
+        add_results_to_round_bulk(self.round, submitter_type=BallotSubmission.Submitter.TABROOM,
+                user=user, confirmed=True)
+
+        ballotsubs = BallotSubmission.objects.filter(debate__round=self.round)
+        self.assertEqual(ballotsubs.count(), self.round.debate_set.count())
+        self.assertFalse(self.round.debate_set.exclude(result_status=Debate.STATUS_CONFIRMED).exists())
+        self.assertEqual(TeamScore.objects.filter(ballot_submission__in=ballotsubs).count(),
+                self.round.debate_set.count() * len(self.tournament.sides))
+
+        ballotsubs = list(ballotsubs)
+        populate_results(ballotsubs, self.tournament)
+        for ballotsub in ballotsubs:
+            self.assertTrue(ballotsub.result.is_valid())
@@ -6,6 +6,7 @@ from draw.models import Debate, DebateTeam
 from draw.types import DebateSide
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
+from results.prefetch import populate_result_summaries, populate_results
 from results.result import ConsensusDebateResultWithScores, DebateResultByAdjudicatorWithScores, ResultError    # absolute import to keep logger's name consistent
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
@@ -188,6 +189,31 @@ class BaseTestDebateResult(TestCase):
 
 class GeneralSpeakerTestsMixin:
 
+    def set_ballots_per_debate_for_result_class(self):
+        # populate_results() chooses the result class from this preference
+        self.set_tournament_preference('debate_rules', 'ballots_per_debate_prelim',
+            'per-adj' if self.debate_result_class.is_voting else 'per-debate')
+
+    @standard_test
+    def test_populate_results(self, result, testdata, scoresheet_type):
+        self.set_ballots_per_debate_for_result_class()
+        ballotsub = BallotSubmission.objects.get(debate=self.debate, confirmed=True)
+        populate_results([ballotsub], self.tournament)
+        self.assertTrue(ballotsub.result.identical(result))
+        self.assertEqual(ballotsub.result.fingerprint(), result.fingerprint())
+
+    @standard_test
+    def test_result_summary(self, result, testdata, scoresheet_type):
+        self.set_ballots_per_debate_for_result_class()
+        ballotsub = BallotSubmission.objects.get(debate=self.debate, confirmed=True)
+        populate_result_summaries([ballotsub], self.tournament)
+        summary = ballotsub.result_summary
+        self.assertEqual(testdata[scoresheet_type]['winner'], summary.winning_side())
+        for side in self.SIDES:
+            with suppress_logs('results.result', logging.WARNING):
+                self.assertEqual(result.teamscore_field_points(side), summary.points[side])
+                self.assertAlmostEqual(result.teamscore_field_score(side), summary.total(side))
+
     @standard_test
     def test_save(self, result, testdata, scoresheet_type):
         # Run self.save_complete_result and check completeness
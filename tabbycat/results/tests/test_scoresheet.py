@@ -134,6 +134,19 @@ class TestTwoTeamScoresheets(unittest.TestCase):
         self.assert_scores(scoresheet, testdata)
         self.assertEqual(scoresheet.is_valid(), winner is not None)
 
+    @on_all_testdata
+    def test_fingerprint(self, testdata):
+        scoresheet1 = TiedPointWinsAllowedScoresheet(testdata['positions'])
+        scoresheet2 = TiedPointWinsAllowedScoresheet(testdata['positions'])
+        for scoresheet in [scoresheet1, scoresheet2]:
+            scoresheet.add_declared_winner(testdata['declared_winner'])
+            self.load_scores(scoresheet, testdata)
+        self.assertEqual(scoresheet1.fingerprint(), scoresheet2.fingerprint())
+        self.assertEqual(hash(scoresheet1.fingerprint()), hash(scoresheet2.fingerprint()))
+
+        scoresheet2.set_score(DebateSide.AFF, testdata['positions'][0], 50.0)
+        self.assertNotEqual(scoresheet1.fingerprint(), scoresheet2.fingerprint())
+
     def test_declared_winner_error(self):
         scoresheet = ResultOnlyScoresheet()
         self.assertRaises(AssertionError, scoresheet.set_declared_winners, set(['hello']))
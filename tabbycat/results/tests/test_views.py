@@ -1,6 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from utils.tests import ConditionalTableViewTestsMixin
+from draw.models import Debate
+from utils.tests import CompletedTournamentTestMixin, ConditionalTableViewTestsMixin, QueryBudgetTestMixin
 
 
 class PublicResultsForRoundViewTestCase(ConditionalTableViewTestsMixin, TestCase):
@@ -11,3 +16,53 @@ class PublicResultsForRoundViewTestCase(ConditionalTableViewTestsMixin, TestCase
 
     def expected_row_counts(self):
         return [self.round.debate_set.count() * 2]
+
+
+class AdminResultsEntryForRoundQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+
+    def test_query_budget(self):
+        self.assertQueryBudgetConstant('results-round-list', in_round=True, admin=True)
+
+
+class ResultsForRoundQueryCountTestCase(CompletedTournamentTestMixin, TestCase):
+    """Checks that results pages make the same number of queries however many
+    debates there are in the round, by loading each page again after deleting
+    half the round's debates."""
+
+    round_seq = 3  # the last completed round, so that its results are public
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueryCountIndependentOfDebates(self, url):  # noqa: N802
+        n_queries = self.count_queries(url)
+
+        debate_ids = list(self.round.debate_set.order_by('id').values_list('id', flat=True))
+        self.assertGreater(len(debate_ids), 1)
+        Debate.objects.filter(id__in=debate_ids[:len(debate_ids) // 2]).delete()
+
+        cache.clear()
+        with self.assertNumQueries(n_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_results_entry(self):
+        user = get_user_model().objects.create_user('test_admin', is_staff=True, is_superuser=True)
+        self.client.force_login(user)
+        self.assertQueryCountIndependentOfDebates(self.reverse_url('results-round-list'))
+
+    def test_public_results_by_debate(self):
+        self.tournament.preferences['public_features__public_results'] = True
+        url = self.reverse_url('results-public-round')
+        self.client.get(url + '?view=debate')  # stores the view in the session
+        self.assertQueryCountIndependentOfDebates(url)
+
+    def test_public_results_by_team(self):
+        self.tournament.preferences['public_features__public_results'] = True
+        url = self.reverse_url('results-public-round')
+        self.client.get(url + '?view=team')  # stores the view in the session
+        self.assertQueryCountIndependentOfDebates(url)
@@ -1,13 +1,17 @@
+import hashlib
 import logging
-from itertools import combinations
+from time import time
+from uuid import uuid4
 
 from django.contrib.humanize.templatetags.humanize import ordinal
-from django.db.models import Count
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy
 
 from draw.models import Debate
 from options.utils import use_team_code_names
+from tournaments.models import Round
 from tournaments.utils import get_side_name
 
 logger = logging.getLogger(__name__)
@@ -103,21 +107,24 @@ def populate_identical_ballotsub_lists(ballotsubs):
     that are identical to it.
 
     Two ballot submissions are identical if they share the same debate, motion,
-    speakers and all speaker scores."""
+    speakers and all speaker scores.
+
+    The ballot submissions may be from different debates (e.g., all ballot
+    submissions in a round). Each result is reduced to its fingerprint once,
+    and ballot submissions are grouped by debate and fingerprint, so this takes
+    linear time in the number of ballot submissions."""
 
     from .prefetch import populate_results
     populate_results(ballotsubs)
 
+    groups = {}
     for ballotsub in ballotsubs:
-        ballotsub.identical_ballotsub_versions = []
-
-    for ballotsub1, ballotsub2 in combinations(ballotsubs, 2):
-        if ballotsub1.result.identical(ballotsub2.result):
-            ballotsub1.identical_ballotsub_versions.append(ballotsub2.version)
-            ballotsub2.identical_ballotsub_versions.append(ballotsub1.version)
+        groups.setdefault((ballotsub.debate_id, ballotsub.result.fingerprint()), []).append(ballotsub)
 
-    for ballotsub in ballotsubs:
-        ballotsub.identical_ballotsub_versions.sort()
+    for group in groups.values():
+        versions = sorted(ballotsub.version for ballotsub in group)
+        for ballotsub in group:
+            ballotsub.identical_ballotsub_versions = [v for v in versions if v != ballotsub.version]
 
 
 _BP_POSITION_NAMES = [
@@ -160,3 +167,47 @@ def side_and_position_names(tournament):
                 else ordinal(pos)
                 for pos in tournament.positions]
             yield side, positions
+
+
+# Cache key of a token that changes whenever anything that standings or
+# results are computed from changes
+RESULTS_VERSION_KEY = "results_version"
+
+
+def bump_results_version():
+    """Invalidates everything cached against the results version. Should be
+    called (after committing) whenever ballots, scores, or the teams, speakers
+    or rounds that standings are computed from change."""
+    cache.set(RESULTS_VERSION_KEY, (uuid4().hex, int(time())), None)
+
+
+def get_results_version():
+    """Returns a 2-tuple `(token, modified)`, where `token` identifies the
+    current state of results and `modified` is the Unix time at which it last
+    changed."""
+    version = cache.get(RESULTS_VERSION_KEY)
+    if version is None:
+        version = (uuid4().hex, int(time()))
+        if not cache.add(RESULTS_VERSION_KEY, version, None):
+            version = cache.get(RESULTS_VERSION_KEY, version)
+    return version
+
+
+def get_results_fingerprint(tournament_slug):
+    """Returns a string that identifies the current state of the ballots and
+    rounds of the tournament with slug `tournament_slug`.
+
+    Unlike the token from `get_results_version()`, this is derived from the
+    database, so it's the same in every process and survives the cache being
+    flushed, at the cost of two (aggregate) queries. It's meant for things kept
+    outside the cache, like public page snapshots."""
+    ballots = Debate.objects.filter(round__tournament__slug=tournament_slug).aggregate(
+        n=Count('ballotsubmission'),
+        confirmed=Count('ballotsubmission', filter=Q(ballotsubmission__confirmed=True)),
+        submitted=Max('ballotsubmission__timestamp'),
+        confirmed_at=Max('ballotsubmission__confirm_timestamp'),
+    )
+    rounds = Round.objects.filter(tournament__slug=tournament_slug).order_by('seq').values_list(
+        'seq', 'completed', 'draw_status', 'motions_status', 'silent')
+    state = repr((sorted(ballots.items()), list(rounds)))
+    return hashlib.sha1(state.encode()).hexdigest()
@@ -6,8 +6,8 @@ from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import ProgrammingError
-from django.db.models import Count, Max, Q, Window
-from django.db.models.functions import Coalesce, Rank
+from django.db.models import Count, Q, Window
+from django.db.models.functions import Rank
 from django.http import HttpResponseRedirect
 from django.http.response import Http404
 from django.shortcuts import render
@@ -22,6 +22,7 @@ from actionlog.models import ActionLogEntry
 from adjallocation.models import DebateAdjudicator
 from draw.models import Debate
 from draw.prefetch import populate_opponents
+from draw.projection import count_sides
 from draw.types import DebateSide
 from motions.models import DebateTeamMotionPreference, RoundMotion
 from motions.utils import merge_motion_vetos, merge_motions
@@ -71,8 +72,8 @@ class BaseResultsEntryForRoundView(RoundMixin, VueTableTemplateView):
 
     def _get_draw(self):
         if not hasattr(self, '_draw'):
-            self._draw = self.round.debate_set_with_prefetches(
-                filter_args=[~Q(debateteam__side=DebateSide.BYE)], ordering=('room_rank',), results=True, wins=True, check_ins=True, iron=True)
+            self._draw = list(self.round.debate_set_with_prefetches(
+                filter_args=[~Q(debateteam__side=DebateSide.BYE)], ordering=('room_rank',), summaries=True, wins=True, check_ins=True, iron=True))
         return self._draw
 
     def get_table(self):
@@ -84,7 +85,7 @@ class BaseResultsEntryForRoundView(RoundMixin, VueTableTemplateView):
         if self.tournament.pref('enable_postponements'):
             table.add_debate_postponement_column(draw)
         table.add_debate_venue_columns(draw, for_admin=True)
-        table.add_debate_results_columns(draw, iron=True, n_cols=self._get_draw().aggregate(n=Coalesce(Max('debateteam__side'), self.tournament.pref('teams_in_debate')-1))['n']+1)
+        table.add_debate_results_columns(draw, iron=True, n_cols=count_sides(draw, self.tournament))
         table.add_debate_adjudicators_column(draw, show_splits=True, for_admin=True)
         return table
 
@@ -103,8 +104,8 @@ class BaseResultsEntryForRoundView(RoundMixin, VueTableTemplateView):
         return iron_speeches
 
     def get_context_data(self, **kwargs):
-        kwargs["incomplete_ballots"] = self._get_draw().filter(
-            Q(result_status=Debate.STATUS_NONE) | Q(result_status=Debate.STATUS_DRAFT)).exists()
+        kwargs["incomplete_ballots"] = any(debate.result_status in (Debate.STATUS_NONE, Debate.STATUS_DRAFT)
+                                           for debate in self._get_draw())
         kwargs["iron_speeches"] = self.get_irons_list()
         return super().get_context_data(**kwargs)
 
@@ -173,14 +174,12 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
             return self.get_table_by_team()
 
     def get_table_by_debate(self):
-        debates = self.round.debate_set_with_prefetches(results=True,
-                wins=True, institutions=True, adjudicators=True)
-        populate_confirmed_ballots(debates, motions=True,
-                results=self.round.ballots_per_debate == 'per-adj')
+        debates = list(self.round.debate_set_with_prefetches(summaries=True,
+                wins=True, institutions=True, adjudicators=True))
 
         table = TabbycatTableBuilder(view=self, sort_key="venue")
         table.add_debate_venue_columns(debates)
-        table.add_debate_results_columns(debates, n_cols=debates.aggregate(n=Max('debateteam__side'))['n']+1)
+        table.add_debate_results_columns(debates, n_cols=count_sides(debates, self.tournament))
         if not (self.tournament.pref('teams_in_debate') == 4 and self.round.is_break_round):
             table.add_debate_ballot_link_column(debates)
         table.add_debate_adjudicators_column(debates, show_splits=True)
@@ -205,8 +204,7 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
 
         if self.tournament.pref('teams_in_debate') == 2:
             populate_opponents([ts.debate_team for ts in teamscores])
-        populate_confirmed_ballots(debates, motions=True,
-            results=self.round.ballots_per_debate == 'per-adj')
+        populate_confirmed_ballots(debates, motions=True, summaries=True)
 
         table = TabbycatTableBuilder(view=self, sort_key="team")
         table.add_team_columns([ts.debate_team.team for ts in teamscores])
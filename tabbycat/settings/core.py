@@ -94,6 +94,8 @@ FORMAT_MODULE_PATH = [
 # ==============================================================================
 
 MIDDLEWARE = [
+    # Only used if INSTRUMENT_VIEWS is set; must be first to count all queries
+    'utils.middleware.ViewInstrumentationMiddleware',
     'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -111,9 +113,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Only used if PUBLIC_SNAPSHOT_ROOT is set; must be after Authentication and Locale
+    'utils.middleware.PublicSnapshotMiddleware',
     'utils.middleware.DebateMiddleware',
 ]
 
+# Log and add response headers with query counts, SQL time, cache hits/misses
+# and render time for each request
+INSTRUMENT_VIEWS = bool(int(os.environ['INSTRUMENT_VIEWS'])) if 'INSTRUMENT_VIEWS' in os.environ else False
+
 TABBYCAT_APPS = (
     'actionlog',
     'adjallocation',
@@ -213,6 +221,24 @@ PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 *
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
 
+# How long an expired public page may still be served while one request
+# rebuilds it, and the longest a rebuild may hold its lock
+PUBLIC_CACHE_STALE_TIMEOUT = int(os.environ.get('PUBLIC_CACHE_STALE_TIMEOUT', 60 * 5))
+PUBLIC_CACHE_LOCK_TIMEOUT = int(os.environ.get('PUBLIC_CACHE_LOCK_TIMEOUT', 60))
+
+# Directory holding pre-rendered public pages written by `snapshotpublic`. These
+# are served (while current) by PublicSnapshotMiddleware, or can be served
+# directly by the web server; leave blank to disable
+PUBLIC_SNAPSHOT_ROOT = os.environ.get('PUBLIC_SNAPSHOT_ROOT', '')
+
+# Standings tables with at least this many rows leave out their round-by-round
+# columns, which the browser then loads separately
+TAB_DEFERRED_COLUMNS_MIN_ROWS = int(os.environ.get('TAB_DEFERRED_COLUMNS_MIN_ROWS', 150))
+
+# Number of worker processes in which graph-based power-paired draws find the
+# matchings of separate brackets; 0 finds them sequentially
+DRAW_MATCHING_PROCESSES = int(os.environ.get('DRAW_MATCHING_PROCESSES', 0))
+
 # Default non-heroku cache is to use local memory
 CACHES = {
     'default': {
@@ -408,6 +434,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ==============================================================================
+# Email delivery
+# ==============================================================================
+
+# Ballot receipts confirmed within this many seconds of each other are sent in
+# one batch by the notifications worker; 0 sends each as it arrives
+EMAIL_BATCH_WINDOW = float(os.environ.get('EMAIL_BATCH_WINDOW', 5))
+
+# Number of connections to the email backend the worker keeps open, and how
+# long (in seconds) they may sit idle before being reopened
+EMAIL_CONNECTION_POOL_SIZE = int(os.environ.get('EMAIL_CONNECTION_POOL_SIZE', 2))
+EMAIL_CONNECTION_IDLE_TIMEOUT = int(os.environ.get('EMAIL_CONNECTION_IDLE_TIMEOUT', 60))
+
 # ==============================================================================
 # Push Notifications (WebPush)
 # ==============================================================================
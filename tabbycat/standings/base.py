@@ -145,6 +145,9 @@ class Standings:
         self._metric_specs = list()
         self._ranking_specs = list()
 
+        # Data that annotators in the same run may share, keyed by name
+        self.annotator_cache = dict()
+
     @property
     def standings(self):
         assert self.ranked, "sort() must be called before accessing standings"
@@ -1,16 +1,24 @@
-from django.db.models import Aggregate, Avg, Case, CharField, Count, F, Value, When
-from django.utils.translation import gettext as _
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Aggregate, Avg, Case, CharField, Count, Exists, F, OuterRef, Value, When
+from django.utils.translation import get_language, gettext as _
 
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
+from breakqual.models import BreakingTeam
 from participants.models import Person, Speaker, SpeakerCategory
 from participants.utils import regions_ordered
 from results.models import SpeakerScore
+from results.utils import get_results_version
 from tournaments.models import Round
 
 
 gendered_types = (Person.GENDER_FEMALE, Person.GENDER_MALE)
 
+DIVERSITY_VERSION_KEY = "diversity_version"
+
 
 class Percentile(Aggregate):
     function = 'PERCENTILE_CONT'
@@ -39,6 +47,19 @@ def _gender_group(gender_field):
     )
 
 
+def _gender_group_of(gender):
+    """Python equivalent of `_gender_group()`, for rows already fetched."""
+    if gender in (Person.GENDER_FEMALE, Person.GENDER_OTHER):
+        return 'N'
+    elif gender == Person.GENDER_MALE:
+        return 'M'
+    return '-'
+
+
+def _increment(counts, key, count):
+    counts[key] = counts.get(key, 0) + count
+
+
 def _group_data(get_statistic, group_values, group_labels):
     data = []
     for value, label in zip(group_values, group_labels):
@@ -50,6 +71,12 @@ def _group_data(get_statistic, group_values, group_labels):
     return data
 
 
+def _combine_means(means):
+    """Returns the overall mean of a list of `(mean, count)` pairs."""
+    total = sum(count for mean, count in means)
+    return sum(mean * count for mean, count in means) / total if total else None
+
+
 def compile_statistics_by_gender(titles, queryset, statistics, gender_field):
     aggregates = {key: value for key, value in STATISTICS_MAP.items() if key in statistics}
     overall_statistics = queryset.aggregate(**aggregates)
@@ -66,40 +93,44 @@ def compile_statistics_by_gender(titles, queryset, statistics, gender_field):
     return results
 
 
-def compile_grouped_means_by_gender(titles, queryset, gender_field, group_field, group_values):
-    overall_means = queryset.values(group_field).annotate(Avg('score'))
-    overall_means = {d[group_field]: d['score__avg'] for d in overall_means}
-    gender_means = queryset.values(group_field, gender=_gender_group(gender_field)).annotate(Avg('score'))
-    gender_means = {(d[group_field], d['gender']): d['score__avg'] for d in gender_means}
+def grouped_means_by_gender(queryset, gender_field, *group_fields):
+    """Returns a dict mapping `(*groups, gender_group)` to `(mean, count)` pairs
+    of scores, from a single query grouped by `group_fields` and gender."""
+    rows = queryset.values(*group_fields, gender=_gender_group(gender_field)).annotate(
+        mean=Avg('score'), count=Count('id')).order_by()
+    return {(*(row[f] for f in group_fields), row['gender']): (row['mean'], row['count']) for row in rows}
+
 
+def compile_grouped_means_by_gender(titles, means, group_values):
+    """`means` is a dict mapping `(group, gender_group)` to `(mean, count)`
+    pairs, as returned by `grouped_means_by_gender()`."""
     results = []
     for title, group in zip(titles, group_values):
-        result = {'title': title}
-        try:
-            result['datum'] = overall_means[group]
-        except KeyError:
+        group_means = {gender: mean for (g, gender), mean in means.items() if g == group}
+        if not group_means:
             continue  # no data available, omit from table
-        result['data'] = _group_data(lambda gender: gender_means[(group, gender)], ['N', 'M'], ['NM', 'Male'])
+        result = {'title': title}
+        result['datum'] = _combine_means(group_means.values())
+        result['data'] = _group_data(lambda gender: group_means[gender][0], ['N', 'M'], ['NM', 'Male'])
         results.append(result)
 
     return results
 
 
-def compile_gender_counts(title, queryset, gender_field):
-    return compile_grouped_counts(title, queryset, _gender_group(gender_field), ['N', 'M', '-'], ['NM', 'Male', 'Unknown'])
+def compile_gender_counts(title, counts):
+    """`counts` is a dict mapping gender groups to counts."""
+    return compile_grouped_counts(title, counts, ['N', 'M', '-'], ['NM', 'Male', 'Unknown'])
 
 
-def compile_grouped_counts(title, queryset, group_field, group_values, group_labels):
-    counts = queryset.values(group=group_field).annotate(count=Count(Value(1)))  # Count counts records, value doesn't matter
-    counts = {d['group']: d['count'] for d in counts}
+def compile_grouped_counts(title, counts, group_values, group_labels):
+    """`counts` is a dict mapping groups to counts, omitting empty groups."""
     result = {'title': title}
     result['data'] = _group_data(lambda group: counts[group], group_values, group_labels)
     return result
 
 
-def compile_grouped_gender_counts(titles, queryset, gender_field, group_field, group_values):
-    counts = queryset.values(group_field, gender_group=_gender_group(gender_field)).annotate(count=Count(Value(1)))
-    counts = {(d[group_field], d['gender_group']): d['count'] for d in counts}
+def compile_grouped_gender_counts(titles, counts, group_values):
+    """`counts` is a dict mapping `(group, gender_group)` to counts."""
     results = []
     for title, group in zip(titles, group_values):
         result = {'title': title}
@@ -108,7 +139,39 @@ def compile_grouped_gender_counts(titles, queryset, gender_field, group_field, g
     return results
 
 
+def bump_diversity_version():
+    """Invalidates cached diversity data. Should be called (after committing)
+    whenever adjudicators, their allocations or feedback, breaking teams or
+    regions change; changes to speakers and results are covered by the results
+    version."""
+    cache.set(DIVERSITY_VERSION_KEY, uuid4().hex, None)
+
+
+def get_diversity_version():
+    version = cache.get(DIVERSITY_VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(DIVERSITY_VERSION_KEY, version, None):
+            version = cache.get(DIVERSITY_VERSION_KEY, version)
+    return version
+
+
 def get_diversity_data_sets(t, for_public):
+    """Returns the data for the diversity page, cached until the results or
+    the diversity version change."""
+    key = "diversity_%d_%d_%s_%s_%s" % (t.id, for_public, get_language(),
+            get_results_version()[0], get_diversity_version())
+    data_sets = cache.get(key)
+    if data_sets is None:
+        data_sets = compile_diversity_data_sets(t, for_public)
+        cache.set(key, data_sets, settings.TAB_PAGES_CACHE_TIMEOUT)
+    return data_sets
+
+
+def compile_diversity_data_sets(t, for_public):
+    """Computes the data for the diversity page. Counts and means come from a
+    fixed number of queries grouped by gender and category, position or region,
+    regardless of the number of categories or regions."""
 
     all_regions = regions_ordered(t)
 
@@ -129,82 +192,118 @@ def get_diversity_data_sets(t, for_public):
         'regions': all_regions,  # For CSS
     }
 
+    show_breaking_teams = t.pref('public_breaking_teams') is True or for_public is False
+    show_breaking_adjs = t.pref('public_breaking_adjs') is True or for_public is False
+
     # ==========================================================================
     # Speakers Demographics
     # ==========================================================================
 
     speakers = Speaker.objects.filter(team__tournament=t)
 
-    if speakers.count() > 0:
-        data_sets['speakers_gender'].append(compile_gender_counts(_("All"), speakers, 'gender'))
-
-    if t.pref('public_breaking_teams') is True or for_public is False:
-        if speakers.filter(team__breakingteam__isnull=False).count() > 0:
-            data_sets['speakers_gender'].append(compile_gender_counts(_("Breaking"),
-                    speakers.filter(team__breakingteam__isnull=False), 'gender'))
+    speaker_genders, breaking_speaker_genders = {}, {}
+    speaker_regions, breaking_speaker_regions = {}, {}
+    gendered_speakers = 0
+    for row in speakers.values('gender', region=F('team__institution__region_id'),
+            breaking=Exists(BreakingTeam.objects.filter(team_id=OuterRef('team_id')))).annotate(count=Count('id')).order_by():
+        gender, count = _gender_group_of(row['gender']), row['count']
+        _increment(speaker_genders, gender, count)
+        _increment(speaker_regions, row['region'], count)
+        if row['breaking']:
+            _increment(breaking_speaker_genders, gender, count)
+            _increment(breaking_speaker_regions, row['region'], count)
+        if row['gender'] in gendered_types:
+            gendered_speakers += count
+
+    if speaker_genders:
+        data_sets['speakers_gender'].append(compile_gender_counts(_("All"), speaker_genders))
+
+    if show_breaking_teams and breaking_speaker_genders:
+        data_sets['speakers_gender'].append(compile_gender_counts(_("Breaking"), breaking_speaker_genders))
+
+    category_genders = {}
+    for row in Speaker.categories.through.objects.filter(speaker__team__tournament=t).values(
+            'speakercategory_id', 'speaker__gender').annotate(count=Count('id')).order_by():
+        _increment(category_genders.setdefault(row['speakercategory_id'], {}), _gender_group_of(row['speaker__gender']), row['count'])
 
     for sc in SpeakerCategory.objects.filter(tournament=t).order_by('seq'):
-        if speakers.filter(categories=sc).count() > 0:
-            data_sets['speakers_categories'].append(compile_gender_counts(sc.name,
-                    speakers.filter(categories=sc), 'gender'))
+        if sc.id in category_genders:
+            in_category = category_genders[sc.id]
+            not_in_category = {gender: count - in_category.get(gender, 0) for gender, count in speaker_genders.items()}
+            data_sets['speakers_categories'].append(compile_gender_counts(sc.name, in_category))
             data_sets['speakers_categories'].append(compile_gender_counts(_("Not %(category)s") % {'category': sc.name},
-                    speakers.exclude(categories=sc), 'gender'))
+                    {gender: count for gender, count in not_in_category.items() if count > 0}))
 
     if t.team_set.exclude(institution__region__isnull=True).exists():
-        data_sets['speakers_region'].append(compile_grouped_counts(_("All Speakers"), speakers,
-                F('team__institution__region__id'), region_values, region_labels))
+        data_sets['speakers_region'].append(compile_grouped_counts(_("All Speakers"), speaker_regions,
+                region_values, region_labels))
 
-        if t.pref('public_breaking_teams') is True or for_public is False:
-            data_sets['speakers_region'].append(compile_grouped_counts(_("Breaking"),
-                    speakers.filter(team__breakingteam__isnull=False),
-                    F('team__institution__region__id'), region_values, region_labels))
+        if show_breaking_teams:
+            data_sets['speakers_region'].append(compile_grouped_counts(_("Breaking"), breaking_speaker_regions,
+                    region_values, region_labels))
 
     # ==========================================================================
     # Adjudicators Demographics
     # ==========================================================================
 
-    adjudicators = t.adjudicator_set.all()
-
-    if adjudicators.count() > 0:
-        data_sets['adjudicators_gender'].append(compile_gender_counts(_("All"), adjudicators, 'gender'))
+    adj_genders, ia_genders, breaking_adj_genders = {}, {}, {}
+    adj_regions, breaking_adj_regions = {}, {}
+    gendered_adjudicators = 0
+    for row in t.adjudicator_set.values('gender', 'independent', 'breaking',
+            region=F('institution__region_id')).annotate(count=Count('id')).order_by():
+        gender, count = _gender_group_of(row['gender']), row['count']
+        _increment(adj_genders, gender, count)
+        _increment(adj_regions, row['region'], count)
+        if row['independent']:
+            _increment(ia_genders, gender, count)
+        if row['breaking']:
+            _increment(breaking_adj_genders, gender, count)
+            _increment(breaking_adj_regions, row['region'], count)
+        if row['gender'] in gendered_types:
+            gendered_adjudicators += count
+
+    if adj_genders:
+        data_sets['adjudicators_gender'].append(compile_gender_counts(_("All"), adj_genders))
+
+    if ia_genders:
+        data_sets['adjudicators_gender'].append(compile_gender_counts(_("IAs"), ia_genders))
+
+    if show_breaking_adjs and breaking_adj_genders:
+        data_sets['adjudicators_gender'].append(compile_gender_counts(_("Breaking"), breaking_adj_genders))
+
+    position_genders = {}
+    for row in DebateAdjudicator.objects.filter(adjudicator__tournament=t).values(
+            'type', 'adjudicator__gender').annotate(count=Count('id')).order_by():
+        _increment(position_genders, (row['type'], _gender_group_of(row['adjudicator__gender'])), row['count'])
 
-    if adjudicators.filter(independent=True).exists():
-        data_sets['adjudicators_gender'].append(compile_gender_counts(_("IAs"),
-            adjudicators.filter(independent=True), 'gender'))
-
-    if (t.pref('public_breaking_adjs') is True or for_public is False) and adjudicators.filter(breaking=True).exists():
-        data_sets['adjudicators_gender'].append(compile_gender_counts(_("Breaking"),
-            adjudicators.filter(breaking=True), 'gender'))
-
-    debateadjs = DebateAdjudicator.objects.filter(adjudicator__tournament=t)
     titles = [_("Chairs"), _("Panellists"), _("Trainees")]
     adjtypes = [
         DebateAdjudicator.TYPE_CHAIR,
         DebateAdjudicator.TYPE_PANEL,
         DebateAdjudicator.TYPE_TRAINEE,
     ]
-    data_sets['adjudicators_position'] = compile_grouped_gender_counts(titles, debateadjs,
-            'adjudicator__gender', 'type', adjtypes)
+    data_sets['adjudicators_position'] = compile_grouped_gender_counts(titles, position_genders, adjtypes)
 
-    if adjudicators.exclude(institution__region__isnull=True).exists():
-        data_sets['adjudicators_region'].append(compile_grouped_counts(_("All"), adjudicators,
-                F('institution__region__id'), region_values, region_labels))
+    if any(region is not None for region in adj_regions):
+        data_sets['adjudicators_region'].append(compile_grouped_counts(_("All"), adj_regions,
+                region_values, region_labels))
 
-        if t.pref('public_breaking_adjs') is True or for_public is False:
-            data_sets['adjudicators_region'].append(compile_grouped_counts(_("Breaking"), adjudicators.filter(breaking=True),
-                    F('institution__region__id'), region_values, region_labels))
+        if show_breaking_adjs:
+            data_sets['adjudicators_region'].append(compile_grouped_counts(_("Breaking"), breaking_adj_regions,
+                    region_values, region_labels))
 
     # ==========================================================================
     # Adjudicators Results
     # ==========================================================================
 
     # Don't show data if genders have not been set
-    data_sets['gendered_adjudicators'] = adjudicators.filter(gender__in=gendered_types).count()
+    data_sets['gendered_adjudicators'] = gendered_adjudicators
     if data_sets['gendered_adjudicators'] > 0:
 
         adjfeedbacks = AdjudicatorFeedback.objects.filter(adjudicator__tournament=t, confirmed=True)
+        feedback_means = grouped_means_by_gender(adjfeedbacks, 'adjudicator__gender', 'source_adjudicator__type')
 
-        data_sets['feedbacks_count'] = adjfeedbacks.count()
+        data_sets['feedbacks_count'] = sum(count for mean, count in feedback_means.values())
 
         if data_sets['feedbacks_count'] > 0:
 
@@ -229,20 +328,20 @@ def get_diversity_data_sets(t, for_public):
                 DebateAdjudicator.TYPE_PANEL,
                 DebateAdjudicator.TYPE_TRAINEE,
             ]
-            data_sets['detailed_adjudicators_results'] = compile_grouped_means_by_gender(
-                    titles, adjfeedbacks, 'adjudicator__gender', 'source_adjudicator__type', group_values)
+            data_sets['detailed_adjudicators_results'] = compile_grouped_means_by_gender(titles, feedback_means, group_values)
 
     # ==========================================================================
     # Speakers Results
     # ==========================================================================
 
     # Don't show data if genders have not been set
-    data_sets['gendered_speakers'] = speakers.filter(gender__in=gendered_types).count()
+    data_sets['gendered_speakers'] = gendered_speakers
     if data_sets['gendered_speakers'] > 0:
 
         speakerscores = SpeakerScore.objects.filter(speaker__team__tournament=t, ballot_submission__confirmed=True)
+        score_means = grouped_means_by_gender(speakerscores, 'speaker__gender', 'position', 'debate_team__debate__round__stage')
 
-        data_sets['speaks_count'] = speakerscores.count()
+        data_sets['speaks_count'] = sum(count for mean, count in score_means.values())
         if data_sets['speaks_count'] > 0:
 
             titles = [
@@ -255,18 +354,28 @@ def get_diversity_data_sets(t, for_public):
             data_sets['speakers_results'] = compile_statistics_by_gender(titles,
                     speakerscores.exclude(position=t.reply_position), statistics, 'speaker__gender')
 
+            position_means = {}
+            for (position, stage, gender), mean in score_means.items():
+                position_means.setdefault((position, gender), []).append(mean)
+            position_means = {key: (_combine_means(means), sum(c for m, c in means)) for key, means in position_means.items()}
+
             titles = [
                 _("Reply Speaker Average") if pos == t.reply_position else
                 _("Speaker %(num)d Average") % {'num': pos}
                 for pos in t.positions
             ]
-            data_sets['detailed_speakers_results'] = compile_grouped_means_by_gender(
-                    titles, speakerscores, 'speaker__gender', 'position', t.positions)
-
-            if speakerscores.filter(debate_team__debate__round__stage=Round.Stage.ELIMINATION).exists():
-                data_sets['detailed_speakers_results'].extend(compile_statistics_by_gender(
-                    [_("Average Finals Score")],
-                    speakerscores.filter(debate_team__debate__round__stage=Round.Stage.ELIMINATION).exclude(position=t.reply_position),
-                    ['mean'], 'speaker__gender'))
+            data_sets['detailed_speakers_results'] = compile_grouped_means_by_gender(titles, position_means, t.positions)
+
+            if any(stage == Round.Stage.ELIMINATION for position, stage, gender in score_means):
+                finals_means = [(gender, mean) for (position, stage, gender), mean in score_means.items()
+                                if stage == Round.Stage.ELIMINATION and position != t.reply_position]
+                finals_means_by_gender = {}
+                for gender, mean in finals_means:
+                    finals_means_by_gender.setdefault(gender, []).append(mean)
+                data_sets['detailed_speakers_results'].append({
+                    'title': _("Average Finals Score"),
+                    'datum': _combine_means([mean for gender, mean in finals_means]),
+                    'data': _group_data(lambda gender: _combine_means(finals_means_by_gender[gender]), ['N', 'M'], ['NM', 'Male']),
+                })
 
     return data_sets
@@ -1,53 +1,97 @@
 import logging
+from collections import defaultdict
 
-from django.db.models import Prefetch
-
-from draw.models import DebateTeam
-from draw.prefetch import populate_opponents
+from draw.models import Debate, DebateTeam
+from participants.models import Team
 from results.models import SpeakerScore, TeamScore
 
 logger = logging.getLogger(__name__)
 
 
-def add_team_round_results(standings, rounds, opponents=False, lookup=None, id_attr='instance_id'):
-    """Sets, on each item `info` in `standings`, an attribute
-    `info.round_results` to be a list of `TeamScore` objects, one for each round
-    in `rounds` (in the same order), relating to the team associated with that
-    item.
+def _set_empty_round_results(items, attr, rounds):
+    """Sets `attr` on each of `items` to a list of `None`s, one for each round
+    in `rounds`, and returns a dict mapping round IDs to their indices in it."""
+    for item in items:
+        setattr(item, attr, [None] * len(rounds))
+    return {r.id: i for i, r in enumerate(rounds)}
 
-    If, for some team and round, there is no relevant `TeamScore`, then the
-    corresponding element of `info.round_results` will be `None`.
 
-    If `lookup` is given, it should be a function that takes two arguments
-    `(standings, x)` and returns the element in `standings` relating to the
-    `Team` object `x`.  By default, it just uses `standings.get_standings(x)`.
-    """
+def _add_team_round_results(items, teams, rounds, opponents=False):
+    """Sets `round_results` on each of `items`, where `teams` contains the team
+    associated with each item, in the same order.
+
+    The team scores are built from a single query returning only the columns
+    needed by the results tables. Their debate teams, debates and teams are
+    constructed from those columns, reusing the `Round` objects in `rounds`
+    and the `Team` objects in `teams`, so that nothing is fetched per item.
+    This works because a confirmed ballot has a team score for every team in
+    the debate, so the rows also provide each team's opponents."""
 
-    if lookup is None:
-        def lookup(standings, x):
-            return standings.get_standing(x)
+    rounds = list(rounds)
+    round_indices = _set_empty_round_results(items, 'round_results', rounds)
+    rounds_by_id = {r.id: r for r in rounds}
+    items_by_team_id = {team.id: item for item, team in zip(items, teams)}
+    teams_by_id = {team.id: team for team in teams}
 
-    team_ids = [getattr(info, id_attr) for info in standings]
-    teamscores = TeamScore.objects.select_related(
-        'debate_team__team', 'debate_team__debate__round').filter(
+    rows = TeamScore.objects.filter(
         ballot_submission__confirmed=True,
         debate_team__debate__round__in=rounds,
-        debate_team__team_id__in=team_ids,
+    ).values_list(
+        'id', 'ballot_submission_id', 'points', 'win', 'score', 'margin',
+        'debate_team_id', 'debate_team__side', 'debate_team__team_id',
+        'debate_team__debate_id', 'debate_team__debate__round_id', 'debate_team__debate__sides_confirmed',
     )
+    rows = list(rows)
+
+    missing_team_ids = {row[8] for row in rows} - teams_by_id.keys()
+    if missing_team_ids:
+        missing_teams = Team.objects.all()
+        if opponents:
+            missing_teams = missing_teams.prefetch_related('speaker_set')
+        teams_by_id.update(missing_teams.in_bulk(missing_team_ids))
+
+    debates = {}
+    dts_by_debate = defaultdict(list)
+    teamscores = []
+    for ts_id, bsub_id, points, win, score, margin, dt_id, side, team_id, debate_id, round_id, sides_confirmed in rows:
+        debate = debates.get(debate_id)
+        if debate is None:
+            debate = debates[debate_id] = Debate(id=debate_id, round=rounds_by_id[round_id], sides_confirmed=sides_confirmed)
+        dt = DebateTeam(id=dt_id, debate=debate, team=teams_by_id[team_id], side=side)
+        dts_by_debate[debate_id].append(dt)
+        teamscores.append(TeamScore(id=ts_id, ballot_submission_id=bsub_id, debate_team=dt,
+                points=points, win=win, score=score, margin=margin))
+
+    for debate_id, dts in dts_by_debate.items():
+        debates[debate_id].set_debateteams(dts)
+        if opponents:
+            for dt in dts:
+                others = [other for other in dts if other is not dt]
+                if len(others) != 1:
+                    logger.warning("No opponent found for %s", str(dt))
+                dt._opponent = others[0] if len(others) == 1 else None
 
-    if opponents:
-        populate_opponents([ts.debate_team for ts in teamscores])
-    else:
-        teamscores = teamscores.prefetch_related(
-            Prefetch('debate_team__debate__debateteam_set', queryset=DebateTeam.objects.select_related('team')))
+    for ts in teamscores:
+        item = items_by_team_id.get(ts.debate_team.team_id)
+        if item is not None:
+            item.round_results[round_indices[ts.debate_team.debate.round_id]] = ts
 
-    for info in standings:
-        info.round_results = [None] * len(rounds)
 
-    round_lookup = {r: i for i, r in enumerate(rounds)}
-    for ts in teamscores:
-        info = lookup(standings, ts.debate_team.team)
-        info.round_results[round_lookup[ts.debate_team.debate.round]] = ts
+def add_team_round_results(standings, rounds, opponents=False):
+    """Sets, on each item `info` in `standings`, an attribute
+    `info.round_results` to be a list of `TeamScore` objects, one for each round
+    in `rounds` (in the same order), relating to the team associated with that
+    item.
+
+    If, for some team and round, there is no relevant `TeamScore`, then the
+    corresponding element of `info.round_results` will be `None`.
+
+    The `TeamScore` objects carry only what the results tables use: their
+    scores, and their debate teams, debates, rounds and teams (with opponents
+    set if `opponents` is True).
+    """
+    infos = list(standings)
+    _add_team_round_results(infos, [info.instance for info in infos], rounds, opponents=opponents)
 
 
 def add_team_round_results_public(teams, rounds, opponents=False):
@@ -57,8 +101,8 @@ def add_team_round_results_public(teams, rounds, opponents=False):
       - `t.points`, the number of points that team has from the rounds in
         `rounds`.
     """
-    add_team_round_results(teams, rounds, opponents=opponents,
-        lookup=(lambda teams, x: [t for t in teams if t == x][0]), id_attr='id')
+    teams = list(teams)
+    _add_team_round_results(teams, teams, rounds, opponents=opponents)
     for team in teams:
         team.points = sum([(ts.points or 0) * ts.debate_team.debate.round.weight for ts in team.round_results if ts is not None])
 
@@ -71,21 +115,18 @@ def add_speaker_round_results(standings, rounds, tournament, replies=False):
     element will be `None`.
     """
 
-    speaker_ids = [info.instance_id for info in standings]
-    speaker_scores = SpeakerScore.objects.select_related('speaker',
-        'ballot_submission', 'debate_team__debate__round').filter(
+    infos = list(standings)
+    round_indices = _set_empty_round_results(infos, 'scores', rounds)
+    infos_by_speaker_id = {info.instance_id: info for info in infos}
+
+    speaker_scores = SpeakerScore.objects.filter(
         ballot_submission__confirmed=True, debate_team__debate__round__in=rounds,
-        speaker_id__in=speaker_ids, ghost=False)
+        speaker_id__in=infos_by_speaker_id.keys(), ghost=False)
 
     if replies:
         speaker_scores = speaker_scores.filter(position=tournament.reply_position)
     else:
         speaker_scores = speaker_scores.filter(position__lte=tournament.last_substantive_position)
 
-    for info in standings:
-        info.scores = [None] * len(rounds)
-
-    round_lookup = {r: i for i, r in enumerate(rounds)}
-    for ss in speaker_scores:
-        info = standings.get_standing(ss.speaker)
-        info.scores[round_lookup[ss.debate_team.debate.round]] = ss.score
+    for speaker_id, round_id, score in speaker_scores.values_list('speaker_id', 'debate_team__debate__round_id', 'score'):
+        infos_by_speaker_id[speaker_id].scores[round_indices[round_id]] = score
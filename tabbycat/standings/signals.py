@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from breakqual.models import BreakingTeam
+from participants.models import Adjudicator, Institution, Region
+
+from .diversity import bump_diversity_version
+
+
+@receiver(post_delete, sender=Adjudicator)
+@receiver(post_save, sender=Adjudicator)
+@receiver(post_delete, sender=AdjudicatorFeedback)
+@receiver(post_save, sender=AdjudicatorFeedback)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=BreakingTeam)
+@receiver(post_save, sender=BreakingTeam)
+@receiver(post_delete, sender=Institution)
+@receiver(post_save, sender=Institution)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=Region)
+def update_diversity_version(sender, **kwargs):
+    transaction.on_commit(bump_diversity_version)
@@ -1,15 +1,16 @@
 """Standings generator for speakers."""
 
 import logging
+from collections import defaultdict
 
 from django.db.models import Avg, Case, Count, F, FloatField, Max, Min, Q, StdDev, Sum, When
-from django.db.models.functions import Cast, NullIf
 from django.utils.translation import gettext_lazy as _
 
+from results.models import TeamScore
 from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
-from .metrics import QuerySetMetricAnnotator
+from .metrics import BaseMetricAnnotator, QuerySetMetricAnnotator
 from .ranking import BasicRankAnnotator
 
 logger = logging.getLogger(__name__)
@@ -47,21 +48,57 @@ class SpeakerScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
         return self.function(self.field, filter=annotation_filter)
 
 
-class TeamMetricQuerySetMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+def get_team_scores_by_team(standings, round=None):
+    """Returns a dict mapping the ID of the team of every speaker in `standings`
+    to a list of `(points, win, votes_given, votes_possible)` tuples, one for
+    each of its confirmed team scores in preliminary rounds, up to and
+    including `round` if given.
 
-    combinable = False
+    The index is built once per standings run, from one query on team scores,
+    and shared between all team metric annotators."""
+    if 'team_scores_by_team' in standings.annotator_cache:
+        return standings.annotator_cache['team_scores_by_team']
 
-    def get_annotation(self, round):
-        """Returns a QuerySet annotated with the metric."""
-        annotation_filter = Q(
-            team__debateteam__teamscore__ballot_submission__confirmed=True,
-            team__debateteam__debate__round__seq__lte=round.seq,
-            team__debateteam__debate__round__stage=Round.Stage.PRELIMINARY,
-        )
-        if self.where_value is not None:
-            annotation_filter &= Q(**{self.field: self.where_value})
+    logger.info("Running team scores query for speaker team metrics")
+    teamscores = TeamScore.objects.filter(
+        debate_team__team_id__in={speaker.team_id for speaker in standings.infos},
+        debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
+        ballot_submission__confirmed=True,
+    )
+    if round is not None:
+        teamscores = teamscores.filter(debate_team__debate__round__seq__lte=round.seq)
+
+    team_scores_by_team = defaultdict(list)
+    for team_id, *fields in teamscores.values_list('debate_team__team_id', 'points', 'win', 'votes_given', 'votes_possible'):
+        team_scores_by_team[team_id].append(tuple(fields))
+
+    standings.annotator_cache['team_scores_by_team'] = team_scores_by_team
+    return team_scores_by_team
 
-        return self.function(self.field, filter=annotation_filter)
+
+class TeamMetricAnnotator(BaseMetricAnnotator):
+    """Base class for annotators for metrics of the speaker's team. Subclasses
+    implement `get_metric()`, which reduces the team's scores (as returned by
+    `get_team_scores_by_team()`) to the metric."""
+
+    def get_metric(self, teamscores):
+        raise NotImplementedError
+
+    def annotate(self, queryset, standings, round=None):
+        team_scores_by_team = get_team_scores_by_team(standings, round)
+        for speaker, info in standings.infos.items():
+            info.add_metric(self.key, self.get_metric(team_scores_by_team.get(speaker.team_id, [])))
+
+
+class TeamCountMetricAnnotator(TeamMetricAnnotator):
+    """Counts the team scores whose `field` (an index into the tuples returned
+    by `get_team_scores_by_team()`) equals `where_value`."""
+
+    field = None
+    where_value = None
+
+    def get_metric(self, teamscores):
+        return sum(1 for ts in teamscores if ts[self.field] == self.where_value)
 
 
 class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -80,80 +117,78 @@ class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Avg
 
 
-class SpeakerTeamPointsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class SpeakerTeamPointsMetricAnnotator(TeamMetricAnnotator):
     """Metric annotator for team points."""
     key = "team_points"
     name = _("team points")
     abbr = _("Team")
 
-    field = 'team__debateteam__teamscore__points'
-    function = Sum
+    def get_metric(self, teamscores):
+        points = [p for p, win, given, possible in teamscores if p is not None]
+        return sum(points) if points else None
 
 
-class SpeakerTeamWinsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class SpeakerTeamWinsMetricAnnotator(TeamCountMetricAnnotator):
     """Metric annotator for total number of wins for the team that the speaker is in."""
     key = "team_wins"
     name = _("Wins")
     abbr = _("Wins")
 
-    function = Count
-    field = 'team__debateteam__teamscore__win'
+    field = 1  # win
     where_value = True
 
 
-class SpeakerFirstsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class SpeakerFirstsMetricAnnotator(TeamCountMetricAnnotator):
     """Metric annotator for counting the number of first-place finishes (points = 3) for a speaker's team."""
     key = "firsts"
     name = _("number of firsts")
     abbr = _("1sts")
 
-    function = Count
-    field = 'team__debateteam__teamscore__points'
+    field = 0  # points
     where_value = 3
 
 
-class SpeakerNumberOfSecondsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class SpeakerNumberOfSecondsMetricAnnotator(TeamCountMetricAnnotator):
     """Metric annotator for counting the number of second-place finishes (points = 2) for a speaker's team."""
     key = "seconds"
     name = _("number of seconds")
     abbr = _("2nds")
 
-    function = Count
-    field = 'team__debateteam__teamscore__points'
+    field = 0  # points
     where_value = 2
 
 
-class SpeakerNumberOfThirdsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class SpeakerNumberOfThirdsMetricAnnotator(TeamCountMetricAnnotator):
     """Metric annotator for counting the number of third-place finishes (points = 1) for a speaker's team."""
     key = "thirds"
     name = _("number of thirds")
     abbr = _("3rds")
 
-    function = Count
-    field = 'team__debateteam__teamscore__points'
+    field = 0  # points
     where_value = 1
 
 
-class NumberOfAdjudicatorsMetricAnnotator(TeamMetricQuerySetMetricAnnotator):
+class NumberOfAdjudicatorsMetricAnnotator(TeamMetricAnnotator):
     key = "num_adjs"
     name = _("number of adjudicators who voted for this team")
     abbr = _("Ballots")
     choice_name = _("votes/ballots carried")
-    function = Sum
 
     def __init__(self, adjs_per_debate=3):
         self.adjs_per_debate = adjs_per_debate
 
-    def get_field(self):
-        return (Cast('team__debateteam__teamscore__votes_given', FloatField()) /
-            NullIf('team__debateteam__teamscore__votes_possible', 0, output_field=FloatField()) *
-            self.adjs_per_debate)
-
-    def annotate_with_queryset(self, queryset, standings):
-        cast = int if all(t.num_adjs == int(t.num_adjs) for t in queryset if t.num_adjs is not None) else float
-        for item in queryset:
-            metric = item.num_adjs or 0
-            standings.add_metric(item, self.key, cast(metric))
+    def get_metric(self, teamscores):
+        # As in the team metric, each debate is normalized to a panel of
+        # `adjs_per_debate`, ignoring debates with no votes
+        return sum(given / possible * self.adjs_per_debate
+                   for points, win, given, possible in teamscores if given is not None and possible)
+
+    def annotate(self, queryset, standings, round=None):
+        super().annotate(queryset, standings, round)
+        infos = standings.infos.values()
+        if all(info.metrics[self.key] == int(info.metrics[self.key]) for info in infos):
+            for info in infos:
+                info.metrics[self.key] = int(info.metrics[self.key])
 
 
 class StandardDeviationSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
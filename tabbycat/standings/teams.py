@@ -1,13 +1,14 @@
 """Standings generator for teams."""
 
 import logging
+from collections import defaultdict
 from statistics import mean
 
-from django.contrib.postgres.aggregates import ArrayAgg
 from django.db.models import Avg, Count, F, FloatField, PositiveIntegerField, Q, StdDev, Sum
 from django.db.models.functions import Cast, NullIf
 from django.utils.translation import gettext_lazy as _
 
+from draw.models import DebateTeam
 from results.models import TeamScore
 from tournaments.models import Round
 
@@ -172,35 +173,58 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
         return super().get_annotated_queryset(queryset, round)
 
 
+def get_opponents_by_team(standings, round=None):
+    """Returns a dict mapping the ID of every team in the tournament(s) of the
+    teams in `standings` to a list of its opponents' IDs, with one entry per
+    preliminary debate, up to and including `round` if given.
+
+    The index is built once per standings run, from one query on debate teams,
+    and shared between all draw strength annotators."""
+    if 'opponents_by_team' in standings.annotator_cache:
+        return standings.annotator_cache['opponents_by_team']
+
+    logger.info("Running opponents query for draw strength")
+    tournament_ids = {team.tournament_id for team in standings.infos}
+    debateteams = DebateTeam.objects.filter(
+        debate__round__tournament_id__in=tournament_ids,
+        debate__round__stage=Round.Stage.PRELIMINARY,
+    )
+    if round is not None:
+        debateteams = debateteams.filter(debate__round__seq__lte=round.seq)
+
+    teams_by_debate = defaultdict(list)
+    for debate_id, team_id in debateteams.values_list('debate_id', 'team_id'):
+        teams_by_debate[debate_id].append(team_id)
+
+    opponents_by_team = defaultdict(list)
+    for team_ids in teams_by_debate.values():
+        for team_id in team_ids:
+            opponents_by_team[team_id].extend(opp_id for opp_id in team_ids if opp_id != team_id)
+
+    standings.annotator_cache['opponents_by_team'] = opponents_by_team
+    return opponents_by_team
+
+
 class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
 
     opponent_annotator = None
 
     def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
+        if not standings.infos:
             return
 
-        logger.info("Running opponents query for draw strength:")
+        opponents_by_team = get_opponents_by_team(standings, round)
 
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
-
-        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), round)
-        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
-
-        for team in queryset:
+        # Opponents needn't be in the standings, so get the metric for every
+        # team in the tournament
+        annotator = self.opponent_annotator()
+        tournament_teams = queryset.model.objects.filter(tournament_id__in={team.tournament_id for team in standings.infos})
+        opp_metrics = dict(annotator.get_annotated_queryset(tournament_teams, round).values_list('id', annotator.key))
+
+        for team in standings.infos:
             draw_strength = 0
             for opponent_id in opponents_by_team[team.id]:
-                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
+                opp_metric = opp_metrics[opponent_id]
                 if opp_metric is not None: # opp_metric is None when no debates have happened
                     draw_strength += opp_metric
             standings.add_metric(team, self.key, draw_strength)
@@ -215,30 +239,16 @@ class DrawStrengthByRankMetricAnnotator(BaseMetricAnnotator):
     extra_only = True  # Cannot rank based on ranking
 
     def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
+        if not standings.infos:
             return
 
-        logger.info("Running opponents query for rank draw strength:")
-
-        team_filter = Q()
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-            team_filter &= Q(tournament=round.tournament)
-
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.filter(team_filter).annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
-        teams_by_id = {team.id: team for team in teams_with_opponents}
+        opponents_by_team = get_opponents_by_team(standings, round)
+        infos_by_id = {team.id: info for team, info in standings.infos.items()}
 
-        for team in queryset:
+        for team in standings.infos:
             ranks = []
             for opponent_id in opponents_by_team[team.id]:
-                if opponent := standings.infos.get(teams_by_id[opponent_id]):
+                if opponent := infos_by_id.get(opponent_id):
                     ranks.append(opponent.rankings['rank'][0])
             ranks_without_none = [rank for rank in ranks if rank is not None]
             standings.add_metric(team, self.key, mean(ranks_without_none))
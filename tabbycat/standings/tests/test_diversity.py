@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from adjallocation.allocation import AdjudicatorAllocation, bulk_save_allocations
+from participants.models import Adjudicator, Person, Speaker
+from utils.tests import CompletedTournamentTestMixin
+
+from ..diversity import compile_diversity_data_sets, get_diversity_data_sets, get_diversity_version
+
+
+class DiversityDataTests(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cached_until_changed(self):
+        data_sets = get_diversity_data_sets(self.tournament, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_diversity_data_sets(self.tournament, True), data_sets)
+
+        Adjudicator.objects.filter(tournament=self.tournament).update(gender='')
+        with self.captureOnCommitCallbacks(execute=True):
+            Adjudicator.objects.filter(tournament=self.tournament).first().save()
+        self.assertNotEqual(get_diversity_data_sets(self.tournament, True), data_sets)
+
+    def test_bulk_allocation_changes_version(self):
+        version = get_diversity_version()
+        debate = self.tournament.round_set.get(seq=4).debate_set.first()
+        adjs = list(self.tournament.adjudicator_set.all()[:2])
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_save_allocations([AdjudicatorAllocation(debate, chair=adjs[0], panellists=[adjs[1]])])
+        self.assertNotEqual(get_diversity_version(), version)
+
+    def test_speaker_gender_counts(self):
+        speakers = Speaker.objects.filter(team__tournament=self.tournament)
+        speakers.update(gender=Person.GENDER_MALE)
+        speakers.filter(team=self.tournament.team_set.first()).update(gender=Person.GENDER_OTHER)
+
+        data_sets = compile_diversity_data_sets(self.tournament, False)
+        counts = {d['label']: d['count'] for d in data_sets['speakers_gender'][0]['data']}
+        self.assertEqual(counts, {
+            'NM': speakers.filter(gender=Person.GENDER_OTHER).count(),
+            'Male': speakers.filter(gender=Person.GENDER_MALE).count(),
+        })
+        self.assertEqual(data_sets['gendered_speakers'], counts['Male'])
@@ -12,6 +12,8 @@ from utils.tests import suppress_logs
 from venues.models import Venue
 
 from ..base import StandingsError
+from ..round_results import add_speaker_round_results, add_team_round_results
+from ..speakers import SpeakerStandingsGenerator
 from ..teams import TeamStandingsGenerator
 
 
@@ -120,6 +122,14 @@ class TestTrivialStandings(TestCase):
         # teams have faced each other twice, so draw strength is twice opponent's score
         self._base_metric_test({'draw_strength_speaks': [394, 406]})
 
+    def test_draw_strength_shared_opponents(self):
+        generator = TeamStandingsGenerator(('draw_strength', 'draw_strength_speaks'), ())
+        standings = self.get_standings(generator)
+        self.assertEqual(dict(standings.annotator_cache['opponents_by_team']),
+            {self.team1.id: [self.team2.id] * 2, self.team2.id: [self.team1.id] * 2})
+        self.assertEqual(standings.get_standing(self.team2).metrics['draw_strength'], 4)
+        self.assertEqual(standings.get_standing(self.team2).metrics['draw_strength_speaks'], 406)
+
     def test_margin_sum(self):
         self._base_metric_test({'margin_sum': [6, -6]})
 
@@ -206,6 +216,42 @@ class TestTrivialStandings(TestCase):
         self.set_up_speaker_scores(2)
         self._base_metric_test({'wins': [2, 0], 'speaks_ind_avg': [101.5, 98.5]})
 
+    def test_round_results(self):
+        self.set_up_speaker_scores(1)
+        rounds = list(self.tournament.round_set.filter(seq__lte=2).order_by('seq'))
+        standings = self.get_standings(TeamStandingsGenerator(('wins',), ('rank',)))
+        with self.assertNumQueries(1):
+            add_team_round_results(standings, rounds, opponents=True)
+        results = standings.get_standing(self.team1).round_results
+        self.assertEqual([(ts.win, ts.score, ts.debate_team.debate.round) for ts in results],
+            [(True, 101, rounds[0]), (True, 102, rounds[1])])
+        self.assertEqual(results[0].debate_team.opponent.team, self.team2)
+
+        generator = SpeakerStandingsGenerator(('total',), ('rank',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(Speaker.objects.filter(team__tournament=self.tournament), round=rounds[1])
+        add_speaker_round_results(standings, rounds, self.tournament)
+        self.assertEqual([info.scores for info in standings], [[101, 102], [99, 98]])
+
+    def test_speaker_team_metrics(self):
+        self.set_up_speaker_scores(1)
+        generator = SpeakerStandingsGenerator(('team_points', 'total'), ('rank',),
+            extra_metrics=('team_wins', 'firsts', 'num_adjs'))
+        rd = self.tournament.round_set.order_by('-seq').first()
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(Speaker.objects.filter(team__tournament=self.tournament), round=rd)
+        self.assertEqual(standings.annotator_cache['team_scores_by_team'][self.team1.id], [(1, True, 1, 1)] * 2)
+
+        speaker1, speaker2 = Speaker.objects.filter(team__tournament=self.tournament).order_by('team__reference')
+        expected = {
+            speaker1: {'team_points': 2, 'total': 203, 'team_wins': 2, 'firsts': 0, 'num_adjs': 6},
+            speaker2: {'team_points': 0, 'total': 197, 'team_wins': 0, 'firsts': 0, 'num_adjs': 0},
+        }
+        for speaker, metrics in expected.items():
+            self.assertEqual(standings.get_standing(speaker).metrics, metrics)
+        self.assertEqual(standings.get_standing(speaker1).rankings['rank'], (1, False))
+        self.assertEqual(standings.get_standing(speaker2).rankings['rank'], (2, False))
+
 
 class IgnorableDebateMixin:
 
@@ -263,6 +309,15 @@ class TestStandingsWithUnconfirmedBallotSubmission(IgnorableDebateMixin, TestTri
     def test_draw_strength_speaks(self):
         self._base_metric_test({'draw_strength_speaks': [591, 609]})
 
+    def test_draw_strength_shared_opponents(self):
+        # As above, the ignorable debate still counts as an opponent
+        generator = TeamStandingsGenerator(('draw_strength', 'draw_strength_speaks'), ())
+        standings = self.get_standings(generator)
+        self.assertEqual(dict(standings.annotator_cache['opponents_by_team']),
+            {self.team1.id: [self.team2.id] * 3, self.team2.id: [self.team1.id] * 3})
+        self.assertEqual(standings.get_standing(self.team2).metrics['draw_strength'], 6)
+        self.assertEqual(standings.get_standing(self.team2).metrics['draw_strength_speaks'], 609)
+
 
 class TestBasicStandings(TestCase):
 
@@ -1,8 +1,13 @@
 import logging
+from unittest import mock
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from utils.tests import ConditionalTournamentViewSimpleLoadTestMixin, suppress_logs
+from standings.views import BaseStandingsView
+from utils.tests import CompletedTournamentTestMixin, ConditionalTournamentViewSimpleLoadTestMixin, suppress_logs, TableViewTestsMixin
 
 
 class PublicStandingsTestMixin(ConditionalTournamentViewSimpleLoadTestMixin):
@@ -41,3 +46,49 @@ class PublicAdjudicatorTabViewTest(ConditionalTournamentViewSimpleLoadTestMixin,
 class PublicDiversityViewTest(ConditionalTournamentViewSimpleLoadTestMixin, TestCase):
     view_name = 'standings-public-diversity'
     view_toggle_preference = 'public_features__public_diversity'
+
+
+class DeferredRoundColumnsTest(TableViewTestsMixin, CompletedTournamentTestMixin, TestCase):
+
+    def get_tables(self, view_name, preference, min_rows, url=None):
+        self.tournament.preferences[preference] = True
+        cache.clear()
+        with mock.patch.object(BaseStandingsView, 'deferred_columns_min_rows', min_rows), \
+                suppress_logs('standings.metrics', logging.INFO), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.reverse_url(view_name))
+        self.assertResponseOK(response)
+        self.num_queries = len(queries.captured_queries)
+        return self.get_table_data(response) if url is None else response.json()
+
+    def assertDeferredColumnsMatch(self, view_name, preference):  # noqa: N802
+        full, = self.get_tables(view_name, preference, 10000)
+        light, = self.get_tables(view_name, preference, 0)
+        self.assertIsNone(full['deferred_columns'])
+
+        deferred = light['deferred_columns']
+        self.assertIsNotNone(deferred)
+        num_columns = len(full['head']) - len(light['head'])
+        self.assertEqual(num_columns, self.tournament.prelim_rounds(until=self.tournament.current_round).count())
+
+        with suppress_logs('standings.metrics', logging.INFO):
+            columns = self.client.get(deferred['url']).json()
+        index = deferred['index']
+        self.assertEqual(light['head'][:index] + columns['head'] + light['head'][index:], full['head'])
+        for key, light_row, full_row in zip(deferred['keys'], light['data'], full['data']):
+            self.assertEqual(light_row[:index] + columns['data'][str(key)] + light_row[index:], full_row)
+
+    def test_team_tab(self):
+        self.assertDeferredColumnsMatch('standings-public-tab-team', 'tab_release__team_tab_released')
+
+    def test_speaker_tab(self):
+        self.assertDeferredColumnsMatch('standings-public-tab-speaker', 'tab_release__speaker_tab_released')
+
+    def test_deferred_requests_make_fewer_queries(self):
+        preference = 'tab_release__team_tab_released'
+        self.get_tables('standings-public-tab-team', preference, 10000)
+        full = self.num_queries
+        light, = self.get_tables('standings-public-tab-team', preference, 0)
+        self.assertLess(self.num_queries, full)
+        self.get_tables('standings-public-tab-team', preference, 0, url=light['deferred_columns']['url'])
+        self.assertLess(self.num_queries, full)
@@ -4,6 +4,7 @@ import logging
 from django.conf import settings
 from django.contrib import messages
 from django.db.models import Avg, Count, Prefetch
+from django.http import JsonResponse
 from django.utils.html import escape, mark_safe
 from django.utils.translation import gettext as _, gettext_lazy
 from django.views.generic.base import TemplateView
@@ -24,7 +25,7 @@ from utils.mixins import AdministratorMixin
 from utils.tables import TabbycatTableBuilder
 from utils.views import VueTableTemplateView
 
-from .base import StandingsError
+from .base import Standings, StandingsError
 from .diversity import get_diversity_data_sets
 from .round_results import add_speaker_round_results, add_team_round_results, add_team_round_results_public
 from .speakers import SpeakerStandingsGenerator
@@ -115,6 +116,13 @@ class BaseStandingsView(RoundMixin, VueTableTemplateView):
         "<p>The tab director will need to resolve this issue.</p>",
     )
 
+    deferred_columns_min_rows = settings.TAB_DEFERRED_COLUMNS_MIN_ROWS
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('columns') == 'rounds':
+            return self.get_round_columns_response()
+        return super().get(request, *args, **kwargs)
+
     def get_page_subtitle(self):
         return _("as of %(round)s") % {'round': self.round.name}
 
@@ -133,6 +141,55 @@ class BaseStandingsView(RoundMixin, VueTableTemplateView):
         instructions %= {'standings_options_url': standings_options_url}
         return mark_safe(message + instructions)
 
+    def get_tab_limit(self):
+        return None
+
+    def get_participants(self):
+        """Returns the teams or speakers in the standings."""
+        raise NotImplementedError
+
+    def add_round_results(self, standings, rounds):
+        raise NotImplementedError
+
+    def add_round_columns(self, table, standings, rounds):
+        raise NotImplementedError
+
+    def add_or_defer_round_columns(self, table, standings, rounds):
+        """Adds round results to the standings and the round-by-round columns
+        to the table, unless there are enough rows that they're better loaded
+        separately, in which case the round results aren't computed at all and
+        the table points the browser to `get_round_columns_response()`."""
+        if len(standings) >= self.deferred_columns_min_rows and len(rounds) > 0:
+            url = self.request.path + "?columns=rounds"
+            table.add_deferred_columns(url, [info.instance_id for info in standings])
+        else:
+            self.add_round_results(standings, rounds)
+            self.populate_result_missing(standings)
+            self.add_round_columns(table, standings, rounds)
+
+    def get_round_columns_standings(self):
+        """Returns standings with the same rows as the full table, and the
+        rounds for its round-by-round columns. The rows only depend on metrics
+        if there's a rank limit, so without one, this doesn't generate them."""
+        if self.round is None or self.get_tab_limit():
+            return self.get_standings()
+        standings = Standings(self.get_participants())
+        standings.sort_from_rankings()
+        return standings, self.get_rounds()
+
+    def get_round_columns_response(self):
+        """Returns just the round-by-round columns of the table, keyed by
+        team or speaker ID. Rank limits apply as for the full table, and on
+        public pages, this is cached in the same way."""
+        table = TabbycatTableBuilder(view=self)
+        try:
+            standings, rounds = self.get_round_columns_standings()
+        except StandingsError:
+            return JsonResponse({'head': [], 'data': {}})
+        self.add_round_results(standings, rounds)
+        self.add_round_columns(table, standings, rounds)
+        return JsonResponse(table.keyed_jsondict([info.instance_id for info in standings]))
+
 
 class PublicTabMixin(PublicTournamentPageMixin):
     """Mixin for views that should only be allowed when the tab is released publicly."""
@@ -221,13 +278,12 @@ class BaseSpeakerStandingsView(BaseStandingsView):
         rank_filter = self.get_rank_filter()
         generator = SpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter)
         standings = generator.generate(speakers, round=self.round)
-
-        rounds = self.get_rounds()
-        self.add_round_results(standings, rounds)
-        self.populate_result_missing(standings)
         self.limit_rank_display(standings)
 
-        return standings, rounds
+        return standings, self.get_rounds()
+
+    def get_participants(self):
+        return self.get_speakers()
 
     def get_table(self):
         table = TabbycatTableBuilder(view=self, sort_key="rk")
@@ -249,13 +305,15 @@ class BaseSpeakerStandingsView(BaseStandingsView):
         table.add_ranking_columns(standings)
         table.add_speaker_columns([info.speaker for info in standings])
         table.add_team_columns([info.speaker.team for info in standings])
+        self.add_or_defer_round_columns(table, standings, rounds)
+        table.add_metric_columns(standings, integer_score_columns=self.integer_score_columns(rounds))
+
+        return table
 
+    def add_round_columns(self, table, standings, rounds):
         scores_headers = [{'key': escape(round.abbreviation), 'title': escape(round.abbreviation)} for round in rounds]
         scores_data = [[metricformat(x) if x is not None else '—' for x in standing.scores] for standing in standings]
         table.add_columns(scores_headers, scores_data)
-        table.add_metric_columns(standings, integer_score_columns=self.integer_score_columns(rounds))
-
-        return table
 
     def limit_rank_display(self, standings):
         # Only filter ranks on PublicTabMixin
@@ -443,12 +501,14 @@ class BaseTeamStandingsView(BaseStandingsView):
         standings = generator.generate(teams, round=self.round)
         self.limit_rank_display(standings)
 
-        rounds = self.get_rounds()
+        return standings, self.get_rounds()
+
+    def get_participants(self):
+        return self.get_teams().select_related('institution').prefetch_related('speaker_set')
+
+    def add_round_results(self, standings, rounds):
         opponents = self.tournament.pref('teams_in_debate') == 2
         add_team_round_results(standings, rounds, opponents=opponents)
-        self.populate_result_missing(standings)
-
-        return standings, rounds
 
     def limit_rank_display(self, standings):
         # Only filter ranks on PublicTabMixin
@@ -466,12 +526,14 @@ class BaseTeamStandingsView(BaseStandingsView):
 
         table.add_ranking_columns(standings)
         table.add_team_columns([info.team for info in standings], show_break_categories=True)
-
-        table.add_standings_results_columns(standings, rounds, self.show_ballots())
+        self.add_or_defer_round_columns(table, standings, rounds)
         table.add_metric_columns(standings, integer_score_columns=self.integer_score_columns(rounds))
 
         return table
 
+    def add_round_columns(self, table, standings, rounds):
+        table.add_standings_results_columns(standings, rounds, self.show_ballots())
+
     def show_ballots(self):
         return False
 
@@ -23,6 +23,7 @@ export default new Vuex.Store({
     wsBridge: null,
     wsPseudoComponentID: null,
     lastSaved: null,
+    allocationVersions: {}, // Keyed by socket label; last update version seen
     // For hover panels
     hoverSubject: null,
     hoverType: null,
@@ -86,6 +87,25 @@ export default new Vuex.Store({
         }
       })
     },
+    applyAdjudicatorMoves (state, moves) {
+      // Apply moves of single adjudicators, as broadcast by the server, like:
+      // [{ adjudicator: 12, from: 73, to: 74, position: 'P' }]
+      moves.forEach((move) => {
+        const from = state.debatesOrPanels[move.from]
+        if (from) {
+          for (const position in from.adjudicators) {
+            from.adjudicators[position] = from.adjudicators[position].filter(id => id !== move.adjudicator)
+          }
+        }
+        const to = state.debatesOrPanels[move.to]
+        if (to) {
+          to.adjudicators[move.position].push(move.adjudicator)
+        }
+      })
+    },
+    setAllocationVersion (state, payload) {
+      Vue.set(state.allocationVersions, payload.socketLabel, payload.version)
+    },
     setAllocatableAttributes (state, changes) {
       changes.forEach((allocatableItem) => {
         if (state.allocatableItems[allocatableItem.id]) {
@@ -337,6 +357,14 @@ export default new Vuex.Store({
       commit('updateSaveCounter')
       // TODO: error handling; locking; checking if the result matches sent data
     },
+    sendAdjudicatorMoves ({ commit }, { allocationChanges, moves }) {
+      // Mutate local state with the full new allocations, but only send the
+      // moves themselves over the websocket, like:
+      // { "adjudicatorMoves": [{ "adjudicator": 12, "from": 73, "to": 74, "position": "P" }], "componentID": 1407 }
+      commit('setDebateOrPanelAttributes', allocationChanges)
+      this.state.wsBridge.send({ adjudicatorMoves: moves, componentID: this.state.wsPseudoComponentID })
+      commit('updateSaveCounter')
+    },
     updateAllocatableItemModified ({ commit }, unallocatedItemIDs) {
       // To preserve the 'drag order' on the unallocated item we need to set the
       // modified attribute to be the current date time
@@ -359,6 +387,9 @@ export default new Vuex.Store({
         if (payload.debatesOrPanels) {
           commit('setDebateOrPanelAttributes', payload.debatesOrPanels)
         }
+        if (payload.adjudicatorMoves) {
+          commit('applyAdjudicatorMoves', payload.adjudicatorMoves)
+        }
       }
     },
   },
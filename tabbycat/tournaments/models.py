@@ -449,19 +449,23 @@ class Round(models.Model):
 
     def debate_set_with_prefetches(self, filter_args=[], filter_kwargs={}, ordering=(F('venue__name').asc(nulls_last=True),),
             teams=True, adjudicators=True, speakers=True, wins=False,
-            results=False, venues=True, institutions=False, check_ins=False, iron=False):
+            results=False, summaries=False, venues=True, institutions=False, check_ins=False, iron=False):
         """Returns the debate set, with aff_team and neg_team populated.
         This is basically a prefetch-like operation, except that it also figures
-        out which team is on which side, and sets attributes accordingly."""
+        out which team is on which side, and sets attributes accordingly.
+
+        `results` populates the full result of each confirmed ballot, and
+        `summaries` populates just its result summary, which is much cheaper."""
         from adjallocation.models import DebateAdjudicator
         from draw.models import DebateTeam
         from participants.models import Speaker
-        from results.prefetch import populate_confirmed_ballots, populate_wins, populate_checkins
+        from results.models import BallotSubmission
+        from results.prefetch import populate_prefetched_confirmed_ballots, populate_wins, populate_checkins
 
         debates = self.debate_set.filter(*filter_args, **filter_kwargs)
-        if results:
-            debates = debates.prefetch_related('ballotsubmission_set',
-                'ballotsubmission_set__submitter', 'ballotsubmission_set__participant_submitter')
+        if results or summaries:
+            debates = debates.prefetch_related(Prefetch('ballotsubmission_set',
+                queryset=BallotSubmission.objects.select_related('submitter', 'participant_submitter', 'motion')))
         if adjudicators:
             debates = debates.prefetch_related(
                 Prefetch('debateadjudicator_set',
@@ -499,8 +503,9 @@ class Round(models.Model):
             debates = debates.order_by(*ordering)
 
         # These functions populate relevant attributes of each debate, operating in-place
-        if results:
-            populate_confirmed_ballots(debates, motions=True, results=True)
+        if results or summaries:
+            # The confirmed ballots are among the prefetched ones, so aren't queried again
+            populate_prefetched_confirmed_ballots(debates, results=results, summaries=summaries)
         if wins:
             populate_wins(debates)
         if check_ins:
@@ -0,0 +1,75 @@
+from time import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.cache import get_cache_key
+from django.views.generic import View
+
+from utils.mixins import CacheMixin
+
+
+class CountingView(CacheMixin, View):
+    page_cache_timeout = 60
+    cache_stale_timeout = 60
+    cache_lock_wait = 0.3
+    calls = 0
+
+    def get(self, request, *args, **kwargs):
+        CountingView.calls += 1
+        return HttpResponse(str(CountingView.calls))
+
+
+class PublicPageCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        self.factory = RequestFactory()
+        self.view = CountingView.as_view()
+
+    def get(self, after=0):
+        with patch('utils.mixins.time', return_value=time() + after):
+            return self.view(self.factory.get('/page/'))
+
+    def lock_page(self):
+        request = self.factory.get('/page/')
+        cache_key = get_cache_key(request, CountingView.cache_key_prefix, 'GET', cache=cache)
+        cache.set(CountingView()._get_cache_lock_key(request, cache_key), True)
+
+    def test_fresh_page_served_from_cache(self):
+        self.assertEqual(self.get().content, b"1")
+        self.assertEqual(self.get(after=30).content, b"1")
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_uses_view_timeout(self):
+        self.assertIn("max-age=60", self.get()['Cache-Control'])
+
+    def test_stale_page_rebuilt_once(self):
+        self.get()
+        self.assertEqual(self.get(after=90).content, b"2")
+        self.assertEqual(self.get(after=90).content, b"2")
+        self.assertEqual(CountingView.calls, 2)
+
+    def test_stale_page_served_while_rebuilding(self):
+        self.get()
+        self.lock_page()
+        response = self.get(after=90)
+        self.assertEqual(response.content, b"1")
+        self.assertIn("max-age=0", response['Cache-Control'])
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_cached_page_headers_count_down(self):
+        self.get()
+        self.assertIn("max-age=30", self.get(after=30)['Cache-Control'])
+
+    def test_zero_timeout_not_cached(self):
+        with patch.object(CountingView, 'page_cache_timeout', 0):
+            self.assertEqual(self.get().content, b"1")
+            self.assertEqual(self.get().content, b"2")
+
+    def test_missing_page_built_after_waiting(self):
+        self.lock_page()
+        self.assertEqual(self.get().content, b"1")
+        self.assertEqual(CountingView.calls, 1)
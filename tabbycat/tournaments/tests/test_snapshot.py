@@ -0,0 +1,100 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+
+from participants.models import Speaker
+from results.models import BallotSubmission
+from utils.tests import CompletedTournamentTestMixin
+
+
+class PublicSnapshotTests(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tempdir = TemporaryDirectory()
+        self.root = self.tempdir.name
+        self.tournament.round_set.update(completed=True)
+        self.tournament.preferences['public_features__public_participants'] = True
+        self.write_snapshot()
+
+    def write_snapshot(self, *args):
+        call_command('snapshotpublic', '-t', self.tournament.slug, '--output', self.root, *args,
+                     stdout=open(os.devnull, 'w'))
+
+    def assertSnapshotServed(self, url, served=True):  # noqa: N802
+        response = Client().get(url)
+        if served:
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('X-Snapshot', response)
+        else:
+            self.assertNotIn('X-Snapshot', response)
+        return response
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+        super().tearDown()
+
+    def test_snapshot_written(self):
+        directory = os.path.join(self.root, self.tournament.slug)
+        with open(os.path.join(directory, "snapshot.json")) as f:
+            manifest = json.load(f)
+        index = self.reverse_url('tournament-public-index')
+        self.assertIn(index, manifest['pages'])
+        self.assertTrue(os.path.isfile(os.path.join(directory, "index.html")))
+        for path in manifest['pages']:
+            self.assertNotIn("/admin/", path)
+
+    def test_snapshot_served_until_stale(self):
+        index = self.reverse_url('tournament-public-index')
+        with override_settings(PUBLIC_SNAPSHOT_ROOT=self.root):
+            response = Client().get(index)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('X-Snapshot', response)
+
+            # Snapshots don't depend on the cache
+            cache.clear()
+            response = Client().get(index)
+            self.assertIn('X-Snapshot', response)
+
+            BallotSubmission.objects.filter(debate__round__tournament=self.tournament, confirmed=True).first().delete()
+            response = Client().get(index)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Snapshot', response)
+
+    def test_unfinished_tournament_refused(self):
+        self.tournament.round_set.filter(seq=4).update(completed=False)
+        with self.assertRaises(CommandError):
+            self.write_snapshot()
+        self.write_snapshot('--force')
+
+    def test_csrf_token_not_in_snapshot(self):
+        index = self.reverse_url('tournament-public-index')
+        with open(os.path.join(self.root, self.tournament.slug, "index.html"), encoding='utf-8') as f:
+            self.assertIn("__snapshot_csrf_token__", f.read())
+
+        with override_settings(PUBLIC_SNAPSHOT_ROOT=self.root):
+            response = self.assertSnapshotServed(index)
+        self.assertNotIn(b"__snapshot_csrf_token__", response.content)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_disabled_page_not_served(self):
+        participants = self.reverse_url('participants-public-list')
+        with override_settings(PUBLIC_SNAPSHOT_ROOT=self.root):
+            self.assertSnapshotServed(participants)
+            self.tournament.preferences['public_features__public_participants'] = False
+            self.assertSnapshotServed(participants, served=False)
+
+    def test_stale_after_participant_renamed(self):
+        index = self.reverse_url('tournament-public-index')
+        with override_settings(PUBLIC_SNAPSHOT_ROOT=self.root):
+            self.assertSnapshotServed(index)
+            speaker = Speaker.objects.filter(team__tournament=self.tournament).first()
+            speaker.name = "Renamed Speaker"
+            speaker.save()
+            self.assertSnapshotServed(index, served=False)
@@ -92,7 +92,7 @@ class BaseTournamentDashboardHomeView(TournamentMixin, WarnAboutDatabaseUseMixin
             debates = t.current_round.debate_set.filter(
                 ballotsubmission__confirmed=True,
             ).order_by('-ballotsubmission__timestamp')[:updates]
-            populate_confirmed_ballots(debates, results=True)
+            populate_confirmed_ballots(debates, summaries=True)
             subs = [d._confirmed_ballot.serialize_like_actionlog for d in debates]
             kwargs["initialBallots"] = json.dumps(subs)
         else:
@@ -0,0 +1,352 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from adjallocation.allocators.base import AdjudicatorAllocationError, registry as allocator_registry
+from adjallocation.models import AdjudicatorInstitutionConflict, TeamInstitutionConflict
+from availability.utils import activate_all
+from breakqual.base import BreakGeneratorError
+from breakqual.generator import BreakGenerator
+from breakqual.models import BreakCategory
+from draw.generator import DrawFatalError, DrawUserError
+from draw.manager import DRAW_MANAGER_CLASSES, DrawManager
+from motions.models import Motion, RoundMotion
+from options.presets import AustralsPreferences, BritishParliamentaryPreferences, PublicInformation
+from participants.models import Adjudicator, Institution, Speaker, Team
+from results.dbutils import add_results_to_round_bulk
+from results.models import BallotSubmission
+from standings.speakers import SpeakerStandingsGenerator
+from standings.teams import TeamStandingsGenerator
+from tournaments.models import Round, Tournament
+from tournaments.utils import auto_make_rounds
+from venues.allocator import allocate_venues
+from venues.models import Venue
+
+User = get_user_model()
+
+FORMAT_PRESETS = {
+    'ap': AustralsPreferences,
+    'bp': BritishParliamentaryPreferences,
+}
+
+# Errors that mean an operation isn't possible in a synthesized tournament
+# (e.g. a draw type that can't handle the number of teams), rather than a bug
+OPERATION_ERRORS = (DrawUserError, DrawFatalError, AdjudicatorAllocationError, BreakGeneratorError)
+
+# (URL name, whether it takes a round sequence number, whether it takes a break category)
+ADMIN_PAGES = [
+    ('tournament-admin-home', False, False),
+    ('draw', True, False),
+    ('edit-debate-adjudicators', True, False),
+    ('results-round-list', True, False),
+    ('participants-list', False, False),
+    ('standings-team', False, False),
+    ('standings-speaker', False, False),
+    ('breakqual-teams', False, True),
+]
+PUBLIC_PAGES = [
+    ('tournament-public-index', False, False),
+    ('draw-public-current-rounds', False, False),
+    ('results-public-round', True, False),
+    ('participants-public-list', False, False),
+    ('standings-public-tab-team', False, False),
+    ('standings-public-tab-speaker', False, False),
+    ('breakqual-public-teams', False, True),
+]
+
+
+class Command(BaseCommand):
+
+    help = "Synthesizes tournaments of various sizes, and times and counts the " \
+           "database queries of draws, allocations, standings, the break and " \
+           "key pages in each. Results are written as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--teams", type=int, nargs="+", default=[50, 200, 400],
+                            help="Numbers of teams in each synthesized tournament (rounded up "
+                            "to a multiple of the number of teams per debate)")
+        parser.add_argument("-f", "--formats", type=str, nargs="+", choices=list(FORMAT_PRESETS.keys()),
+                            default=list(FORMAT_PRESETS.keys()), help="Formats of synthesized tournaments")
+        parser.add_argument("-r", "--rounds", type=int, default=5,
+                            help="Number of preliminary rounds in each tournament")
+        parser.add_argument("--break-size", type=int, default=16,
+                            help="Size of the open break")
+        parser.add_argument("--panel-size", type=int, default=3,
+                            help="Number of adjudicators to create per debate")
+        parser.add_argument("--seed", type=int, default=None,
+                            help="Seed for the random number generator, for repeatable tournaments")
+        parser.add_argument("-o", "--output", type=str, default=None,
+                            help="File to write JSON results to (default standard output)")
+        parser.add_argument("--keep", action="store_true", default=False,
+                            help="Don't delete the synthesized tournaments afterwards")
+        parser.add_argument("--matching-processes", type=int, default=0,
+                            help="Also time graph power-paired draws (in two-team formats) with "
+                            "bracket matchings found in this many worker processes, against "
+                            "finding them sequentially")
+
+    def handle(self, *args, **options):
+        if options["rounds"] < 1:
+            raise CommandError("There must be at least one round.")
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+
+        self.matching_processes = options["matching_processes"]
+        self.user = User.objects.create_superuser("benchmark-%d" % time.time_ns(), "", None)
+        scenarios = []
+        try:
+            for fmt in options["formats"]:
+                for nteams in options["teams"]:
+                    scenarios.append(self.run_scenario(fmt, nteams, **options))
+            self.write_report(scenarios, options["output"])
+        finally:
+            # Kept tournaments' ballots are protected references to the user
+            if not options["keep"]:
+                self.user.delete()
+
+    def write_report(self, scenarios, path):
+        output = {
+            'tabbycat_version': settings.TABBYCAT_VERSION,
+            'database': connection.vendor,
+            'scenarios': scenarios,
+        }
+
+        if path:
+            with open(path, 'w') as f:
+                json.dump(output, f, indent=2)
+        else:
+            json.dump(output, self.stdout, indent=2)
+            self.stdout.write("")
+
+    def log(self, message):
+        # Progress goes to stderr, so that JSON on stdout stays machine-readable
+        self.stderr.write(message, style_func=self.style.MIGRATE_HEADING)
+
+    def measure(self, entries, operation, func, *args, **info):
+        """Calls `func(*args)`, recording the time it took and the queries it
+        made in a new entry in `entries`. Returns the result of `func`, or None
+        if it raised one of `OPERATION_ERRORS`."""
+        entry = {'operation': operation, **info}
+        result = None
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            try:
+                result = func(*args)
+            except OPERATION_ERRORS as e:
+                entry['error'] = str(e)
+            entry['seconds'] = time.perf_counter() - start
+        entry['queries'] = len(queries.captured_queries)
+        entry['sql_seconds'] = sum(float(q['time']) for q in queries.captured_queries)
+        entries.append(entry)
+        return result
+
+    # ==========================================================================
+    # Synthesis
+    # ==========================================================================
+
+    def run_scenario(self, fmt, nteams, **options):
+        preset = FORMAT_PRESETS[fmt]
+        nsides = preset.debate_rules__teams_in_debate
+        nteams = -(-nteams // nsides) * nsides
+        slug = "benchmark-%s-%d" % (fmt, nteams)
+        Tournament.objects.filter(slug=slug).delete()
+
+        self.log("Synthesizing tournament '%s'..." % slug)
+        start = time.perf_counter()
+        tournament, institutions = self.synthesize_tournament(slug, preset, nteams, **options)
+        entries = []
+        scenario = {
+            'format': fmt,
+            'teams': nteams,
+            'rounds': options["rounds"],
+            'tournament': slug,
+            'setup_seconds': time.perf_counter() - start,
+            'measurements': entries,
+        }
+
+        try:
+            for round in tournament.prelim_rounds():
+                self.log("Simulating %s of '%s'..." % (round.name, slug))
+                tournament.current_round = round
+                tournament.save()
+                self.simulate_round(entries, round)
+
+            self.log("Computing standings and break for '%s'..." % slug)
+            self.measure_standings(entries, tournament)
+            for category in tournament.breakcategory_set.all():
+                self.measure(entries, 'break', BreakGenerator(category).generate, variant=category.slug)
+
+            self.log("Requesting pages for '%s'..." % slug)
+            self.measure_pages(entries, tournament)
+        finally:
+            if not options["keep"]:
+                tournament.delete()
+                Institution.objects.filter(id__in=[inst.id for inst in institutions]).delete()
+
+        return scenario
+
+    def synthesize_tournament(self, slug, preset, nteams, **options):
+        tournament = Tournament.objects.create(name="Benchmark %s" % slug, short_name=slug[:25], slug=slug)
+        preset.save(tournament)
+        PublicInformation.save(tournament)
+        auto_make_rounds(tournament, options["rounds"])
+        BreakCategory.objects.create(tournament=tournament, name="Open", slug="open", seq=1,
+                break_size=options["break_size"], is_general=True, priority=100)
+
+        ninstitutions = max(nteams // 4, 2)
+        institutions = Institution.objects.bulk_create([
+            Institution(name="%s Institution %d" % (slug, i), code="Inst %d" % i)
+            for i in range(ninstitutions)
+        ])
+
+        teams = []
+        for i in range(nteams):
+            team = Team(tournament=tournament, institution=institutions[i % ninstitutions],
+                        reference=str(i // ninstitutions + 1), use_institution_prefix=True,
+                        seed=random.randint(1, 4))
+            team.save()
+            teams.append(team)
+        Speaker.objects.bulk_create([
+            Speaker(name="Speaker %d-%d" % (i, j), team=team)
+            for i, team in enumerate(teams)
+            for j in range(preset.debate_rules__substantive_speakers)
+        ])
+        TeamInstitutionConflict.objects.bulk_create([
+            TeamInstitutionConflict(team=team, institution=team.institution) for team in teams
+        ])
+        Team.break_categories.through.objects.bulk_create([
+            Team.break_categories.through(team=team, breakcategory=category)
+            for team in teams for category in tournament.breakcategory_set.all()
+        ])
+
+        ndebates = nteams // preset.debate_rules__teams_in_debate
+        adjudicators = Adjudicator.objects.bulk_create([
+            Adjudicator(name="Adjudicator %d" % i, tournament=tournament,
+                        institution=random.choice(institutions), base_score=random.uniform(1, 5))
+            for i in range(ndebates * options["panel_size"])
+        ])
+        AdjudicatorInstitutionConflict.objects.bulk_create([
+            AdjudicatorInstitutionConflict(adjudicator=adj, institution=adj.institution)
+            for adj in adjudicators
+        ])
+        Venue.objects.bulk_create([
+            Venue(name="Room %d" % i, priority=random.randint(1, 100), tournament=tournament)
+            for i in range(ndebates)
+        ])
+
+        for round in tournament.round_set.all():
+            motion = Motion.objects.create(tournament=tournament, text="This House would benchmark %s" % round.name,
+                                           reference="Motion %d" % round.seq)
+            RoundMotion.objects.create(motion=motion, round=round, seq=1)
+
+        return tournament, institutions
+
+    # ==========================================================================
+    # Measurements
+    # ==========================================================================
+
+    def simulate_round(self, entries, round):
+        activate_all(round)
+        teams_in_debate = round.tournament.pref('teams_in_debate')
+
+        # Time every applicable draw type on this round, leaving the round's
+        # own draw type for last so that its draw is the one that's kept
+        draw_types = [draw_type for (n, draw_type) in DRAW_MANAGER_CLASSES
+                      if n == teams_in_debate and draw_type not in [Round.DrawType.MANUAL, Round.DrawType.ELIMINATION]]
+        own_draw_type = round.draw_type
+        draw_types.remove(own_draw_type)
+        for draw_type in draw_types:
+            round.draw_type = draw_type
+            round.save()
+            self.measure(entries, 'draw', DrawManager(round).create, round=round.seq, variant=Round.DrawType(draw_type).name.lower())
+            round.debate_set.all().delete()
+            round.draw_status = Round.Status.NONE
+        if self.matching_processes > 1 and teams_in_debate == 2:
+            self.measure_parallel_matching(entries, round)
+        round.draw_type = own_draw_type
+        round.save()
+        self.measure(entries, 'draw', DrawManager(round).create, round=round.seq, variant=Round.DrawType(own_draw_type).name.lower())
+        round.draw_status = Round.Status.CONFIRMED
+        round.save()
+
+        debates = round.debate_set.all()
+        adjs = round.active_adjudicators.all()
+        own_allocator = 'hungarian-voting' if round.ballots_per_debate == 'per-adj' else 'hungarian-consensus'
+        for key, allocator_class in allocator_registry.items():
+            allocator = allocator_class(debates, adjs, round)
+            result = self.measure(entries, 'adjudicator-allocation', allocator.allocate, round=round.seq, variant=key)
+            if key == own_allocator and result is not None:
+                allocation, extra_msgs = result
+                for alloc in allocation:
+                    alloc.save()
+
+        self.measure(entries, 'venue-allocation', allocate_venues, round, round=round.seq)
+
+        self.measure(entries, 'results', lambda: add_results_to_round_bulk(
+            round, submitter_type=BallotSubmission.Submitter.TABROOM, user=self.user, confirmed=True),
+            round=round.seq)
+        round.motions_status = Round.MotionsStatus.MOTIONS_RELEASED
+        round.completed = True
+        round.save()
+
+    def measure_parallel_matching(self, entries, round):
+        """Times graph power-paired draws with bracket matchings found
+        sequentially and in worker processes. The random state is the same for
+        both, so the draws should be identical, which is recorded too."""
+        round.draw_type = Round.DrawType.POWERPAIRED
+        round.save()
+        state = random.getstate()
+        draws = []
+        for variant, processes in [('graph-sequential', 0), ('graph-parallel', self.matching_processes)]:
+            random.setstate(state)
+            options = {'avoid_conflicts': 'graph', 'matching_processes': processes}
+            debates = self.measure(entries, 'draw', DrawManager(round).create, options, round=round.seq, variant=variant)
+            draws.append([[dt.team_id for dt in debate.debateteam_set.order_by('side')]
+                          for debate in sorted(debates or [], key=lambda d: d.room_rank)])
+            entries[-1]['processes'] = processes
+            round.debate_set.all().delete()
+            round.draw_status = Round.Status.NONE
+        entries[-1]['identical'] = draws[0] == draws[1]
+
+    def measure_standings(self, entries, tournament):
+        round = tournament.prelim_rounds().last()
+
+        metrics = tournament.pref('team_standings_precedence')
+        extra_metrics = tournament.pref('team_standings_extra_metrics')
+        generator = TeamStandingsGenerator(metrics, ('rank',), extra_metrics)
+        self.measure(entries, 'team-standings', generator.generate, tournament.team_set.all(), round=round.seq)
+
+        metrics = tournament.pref('speaker_standings_precedence')
+        extra_metrics = tournament.pref('speaker_standings_extra_metrics')
+        generator = SpeakerStandingsGenerator(metrics, ('rank',), extra_metrics)
+        speakers = Speaker.objects.filter(team__tournament=tournament)
+        self.measure(entries, 'speaker-standings', generator.generate, speakers, round=round.seq)
+
+    def measure_pages(self, entries, tournament):
+        round = tournament.prelim_rounds().last()
+        category = tournament.breakcategory_set.first()
+        admin_client = Client()
+        admin_client.force_login(self.user)
+        public_client = Client()
+
+        for client, pages, access in [(admin_client, ADMIN_PAGES, 'admin'), (public_client, PUBLIC_PAGES, 'public')]:
+            for name, has_round, has_category in pages:
+                kwargs = {'tournament_slug': tournament.slug}
+                if has_round:
+                    kwargs['round_seq'] = round.seq
+                if has_category:
+                    kwargs['category'] = category.slug
+                url = reverse(name, kwargs=kwargs)
+
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    response = self.measure(entries, 'page', client.get, url, variant=name, access=access, url=url)
+                entries[-1]['status'] = response.status_code
+                if response.status_code != 200:
+                    self.stderr.write("Warning: %s returned status %d" % (url, response.status_code))
@@ -4,7 +4,7 @@ from adjallocation.allocators.hungarian import ConsensusHungarianAllocator, Voti
 from availability.utils import activate_all, set_availability
 from draw.manager import DrawManager
 from draw.models import Debate
-from results.dbutils import add_results_to_round
+from results.dbutils import add_results_to_round, add_results_to_round_bulk
 from results.management.commands.generateresults import GenerateResultsCommandMixin
 from tournaments.models import Round
 from utils.management.base import RoundCommand
@@ -53,7 +53,10 @@ class Command(GenerateResultsCommandMixin, RoundCommand):
         allocate_venues(round)
 
         self.stdout.write("Generating results for round '{}'...".format(round.name))
-        add_results_to_round(round, **self.result_kwargs(options))
+        if options["bulk"]:
+            add_results_to_round_bulk(round, **self.result_kwargs(options))
+        else:
+            add_results_to_round(round, **self.result_kwargs(options))
 
         round.completed = True
         round.save()
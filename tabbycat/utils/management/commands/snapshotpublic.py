@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import shutil
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import resolve, Resolver404, reverse
+from django.utils import translation
+
+from utils.middleware import get_snapshot_fingerprint, SNAPSHOT_CSRF_PLACEHOLDER, SNAPSHOT_INDEX_FILES, SNAPSHOT_MANIFEST
+from utils.mixins import CacheMixin
+
+from ..base import TournamentCommand
+
+
+class Command(TournamentCommand):
+
+    help = "Renders the public pages of a tournament to static files, for an " \
+           "archived tournament whose pages no longer change. The snapshot is " \
+           "served by PublicSnapshotMiddleware until the tournament next changes, or " \
+           "the web server can serve it directly, e.g. in nginx, " \
+           "'try_files /snapshots$uri/index.html @django;'."
+
+    csrf_token_re = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("-o", "--output", type=str, default=settings.PUBLIC_SNAPSHOT_ROOT,
+            help="Directory to write snapshots to (default: the PUBLIC_SNAPSHOT_ROOT setting)")
+        parser.add_argument("--host", type=str, default="localhost",
+            help="Host name to render pages for (default: localhost)")
+        parser.add_argument("--delete", action="store_true", default=False,
+            help="Delete the tournament's snapshot instead of writing one")
+        parser.add_argument("--force", action="store_true", default=False,
+            help="Write a snapshot even if the tournament has rounds that aren't completed")
+
+    def handle_tournament(self, tournament, **options):
+        if not options["output"]:
+            raise CommandError("No output directory: use --output or set PUBLIC_SNAPSHOT_ROOT.")
+
+        directory = os.path.join(options["output"], tournament.slug)
+        if options["delete"]:
+            shutil.rmtree(directory, ignore_errors=True)
+            self.stdout.write("Deleted snapshot of %s" % tournament.name)
+            return
+
+        if not options["force"] and tournament.round_set.filter(completed=False).exists():
+            raise CommandError("%s has rounds that aren't completed. Snapshots are for finished tournaments; "
+                               "use --force to write one anyway." % tournament.name)
+
+        # Take the fingerprint first, so that anything that changes while pages
+        # are being rendered makes the snapshot stale
+        snapshot_fingerprint = get_snapshot_fingerprint(tournament.slug)
+
+        staging = directory + ".new"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        with translation.override(settings.LANGUAGE_CODE), \
+                override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, options["host"]]):
+            pages = self.write_pages(tournament, staging, options["host"], options["verbosity"])
+
+        with open(os.path.join(staging, SNAPSHOT_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({
+                'tournament': tournament.slug,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'snapshot_fingerprint': snapshot_fingerprint,
+                'language': settings.LANGUAGE_CODE,
+                'pages': pages,
+            }, f, indent=2)
+
+        # Swap in the new snapshot, so that the old one is served until it's done
+        if os.path.isdir(directory):
+            old = directory + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+            os.replace(staging, directory)
+            shutil.rmtree(old)
+        else:
+            os.replace(staging, directory)
+
+        self.stdout.write(self.style.SUCCESS("Wrote %d pages of %s to %s" % (len(pages), tournament.name, directory)))
+
+    def write_pages(self, tournament, staging, host, verbosity):
+        """Crawls the tournament's public pages, starting from its public index,
+        and writes each one to `staging`. Returns a list of paths written."""
+
+        client = Client(HTTP_HOST=host)
+        prefix = "/%s/" % tournament.slug
+        link_re = re.compile(r'["\'](%s[^"\'\s?#<>]*)' % re.escape(prefix))
+
+        start = reverse('tournament-public-index', kwargs={'tournament_slug': tournament.slug})
+        queue = deque([start])
+        seen = {start}
+        pages = []
+
+        while queue:
+            path = queue.popleft()
+            response = client.get(path)
+            content_type = response.get('Content-Type', '').split(';')[0]
+            if response.status_code != 200 or content_type not in SNAPSHOT_INDEX_FILES:
+                self.stdout.write("Skipped %s (%d)" % (path, response.status_code), style_func=self.style.WARNING)
+                continue
+
+            content = response.content
+            if content_type == 'text/html':
+                # The crawler's CSRF token mustn't be given to visitors
+                content = self.csrf_token_re.sub(rb'\1' + SNAPSHOT_CSRF_PLACEHOLDER.encode() + rb'\2', content)
+
+            filename = os.path.join(staging, *path.strip('/').split('/')[1:], SNAPSHOT_INDEX_FILES[content_type])
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, 'wb') as f:
+                f.write(content)
+            pages.append(path)
+            if verbosity >= 2:
+                self.stdout.write("Wrote %s" % path)
+
+            for link in link_re.findall(response.content.decode(response.charset or 'utf-8')):
+                if not link.endswith('/'):
+                    link += '/'
+                if link not in seen and self.is_snapshottable(link):
+                    seen.add(link)
+                    queue.append(link)
+
+        return pages
+
+    def is_snapshottable(self, path):
+        """Only pages that are cached publicly are the same for every visitor,
+        so only those are suitable for a snapshot."""
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return False
+        view_class = getattr(match.func, 'view_class', None)
+        return view_class is not None and issubclass(view_class, CacheMixin)
@@ -1,8 +1,26 @@
-from django.core.cache import cache
+import hashlib
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
+from django.urls import resolve, Resolver404
+from django.utils._os import safe_join
 
+from options.models import TournamentPreferenceModel
+from participants.models import Adjudicator, Institution, Speaker, Team
+from results.utils import get_results_fingerprint
 from tournaments.models import Round, Tournament
 
+logger = logging.getLogger(__name__)
+
 
 class DebateMiddleware(object):
 
@@ -40,3 +58,261 @@ class DebateMiddleware(object):
                     cache.set(cached_key, request.round, None)
 
         return None
+
+
+class ViewStats:
+    """Accumulates query, cache and render statistics for a single request."""
+
+    _missing = object()
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self._render_start = None
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper; see `connection.execute_wrapper()`."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def wrap_cache(self, backend):
+        """Counts hits and misses on `backend` until `unwrap_cache()` is called.
+        Cache backends are thread-local, so this doesn't affect other requests."""
+        original_get = backend.get
+        original_get_many = backend.get_many
+
+        def get(key, default=None, *args, **kwargs):
+            value = original_get(key, self._missing, *args, **kwargs)
+            if value is self._missing:
+                self.cache_misses += 1
+                return default
+            self.cache_hits += 1
+            return value
+
+        def get_many(keys, *args, **kwargs):
+            # Some backends implement get_many() using get(), so don't count twice
+            keys = list(keys)
+            hits, misses = self.cache_hits, self.cache_misses
+            values = original_get_many(keys, *args, **kwargs)
+            self.cache_hits = hits + len(values)
+            self.cache_misses = misses + len(keys) - len(values)
+            return values
+
+        backend.get = get
+        backend.get_many = get_many
+
+    def unwrap_cache(self, backend):
+        del backend.get
+        del backend.get_many
+
+    def start_render(self, response):
+        self._render_start = time.perf_counter()
+        response.add_post_render_callback(self.finish_render)
+
+    def finish_render(self, response):
+        self.render_time += time.perf_counter() - self._render_start
+
+    def headers(self):
+        return {
+            'X-Query-Count': str(self.queries),
+            'X-Cache-Hits': str(self.cache_hits),
+            'X-Cache-Misses': str(self.cache_misses),
+            'Server-Timing': "sql;dur=%.1f, render;dur=%.1f, total;dur=%.1f" % (
+                self.sql_time * 1000, self.render_time * 1000, self.total_time * 1000),
+        }
+
+
+class ViewInstrumentationMiddleware:
+    """Records the number of database queries, the time spent in SQL, cache
+    hits and misses and the time spent rendering templates for each request.
+    These are logged and added to the response as headers (`X-Query-Count`,
+    `X-Cache-Hits`, `X-Cache-Misses` and `Server-Timing`).
+
+    This is opt-in: it removes itself unless the `INSTRUMENT_VIEWS` setting is
+    true. It should be first in `MIDDLEWARE`, so that queries made by other
+    middleware are counted."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENT_VIEWS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = ViewStats()
+        request.view_stats = stats
+        backend = caches[DEFAULT_CACHE_ALIAS]
+
+        start = time.perf_counter()
+        stats.wrap_cache(backend)
+        try:
+            with connection.execute_wrapper(stats.record_query):
+                response = self.get_response(request)
+        finally:
+            stats.unwrap_cache(backend)
+        stats.total_time = time.perf_counter() - start
+
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        logger.info("%s %s (%s): %d queries, %.1f ms SQL, %d cache hits, %d cache misses, %.1f ms render, %.1f ms total",
+                    request.method, request.path, view_name, stats.queries, stats.sql_time * 1000,
+                    stats.cache_hits, stats.cache_misses, stats.render_time * 1000, stats.total_time * 1000)
+        for header, value in stats.headers().items():
+            response[header] = value
+        return response
+
+    def process_template_response(self, request, response):
+        request.view_stats.start_render(response)
+        return response
+
+
+# Layout of snapshots written by the `snapshotpublic` command: each page is at
+# <root>/<path>/<index file>, where the index file depends on its content type,
+# and each tournament's directory has a manifest.
+SNAPSHOT_MANIFEST = "snapshot.json"
+SNAPSHOT_INDEX_FILES = {
+    'text/html': "index.html",
+    'application/json': "index.json",
+}
+
+# Snapshots are written with this in place of CSRF tokens (e.g. in the language
+# form in the footer), and served with a token for the visitor instead
+SNAPSHOT_CSRF_PLACEHOLDER = "__snapshot_csrf_token__"
+
+
+def get_snapshot_fingerprint(tournament_slug):
+    """Returns a string that identifies the current state of everything public
+    pages show: ballots and rounds (see `get_results_fingerprint()`), the
+    tournament's preferences, which control which pages are public and what
+    they show, and its participants' names.
+
+    This is derived from the database, so it survives the cache being flushed.
+    Participants have no modification times, so their names are hashed here,
+    which takes a few queries; snapshots are meant for archived tournaments,
+    for which this is much cheaper than rendering pages."""
+    preferences = TournamentPreferenceModel.objects.filter(instance__slug=tournament_slug).order_by(
+        'section', 'name').values_list('section', 'name', 'raw_value')
+    speakers = Speaker.objects.filter(team__tournament__slug=tournament_slug).order_by('id').values_list(
+        'id', 'name', 'last_name', 'code_name', 'anonymous', 'team_id')
+    adjudicators = Adjudicator.objects.filter(tournament__slug=tournament_slug).order_by('id').values_list(
+        'id', 'name', 'last_name', 'code_name', 'anonymous', 'institution_id')
+    teams = Team.objects.filter(tournament__slug=tournament_slug).order_by('id').values_list(
+        'id', 'reference', 'short_reference', 'code_name', 'short_name', 'long_name', 'use_institution_prefix',
+        'institution_id', 'emoji')
+    institutions = Institution.objects.filter(team__tournament__slug=tournament_slug).order_by('id').distinct().values_list(
+        'id', 'name', 'code')
+
+    state = repr((get_results_fingerprint(tournament_slug), list(preferences), list(speakers),
+                  list(adjudicators), list(teams), list(institutions)))
+    return hashlib.sha1(state.encode()).hexdigest()
+
+
+class PublicSnapshotMiddleware:
+    """Serves pre-rendered public pages written by the `snapshotpublic`
+    command, so that archived tournaments don't need their pages regenerated.
+
+    A snapshot is only served to anonymous users, in the language it was
+    rendered in, while the page is still enabled, and only while everything
+    that public pages show is as it was when it was taken (see
+    `get_snapshot_fingerprint()`); otherwise, requests fall through to the
+    views as normal.
+
+    This is opt-in: it removes itself unless the `PUBLIC_SNAPSHOT_ROOT` setting
+    is set."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PUBLIC_SNAPSHOT_ROOT', ''):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.root = settings.PUBLIC_SNAPSHOT_ROOT
+        self._manifests = {}
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and not request.user.is_authenticated:
+            response = self.get_snapshot_response(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def get_manifest(self, slug):
+        """Returns the manifest for the tournament's snapshot, reloading it
+        only if it has been rewritten since it was last read."""
+        try:
+            path = safe_join(self.root, slug, SNAPSHOT_MANIFEST)
+            mtime = os.stat(path).st_mtime_ns
+        except (ValueError, OSError):
+            return None
+
+        cached = self._manifests.get(slug)
+        if cached is None or cached[0] != mtime:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    cached = (mtime, json.load(f))
+            except (OSError, ValueError):
+                return None
+            self._manifests[slug] = cached
+        return cached[1]
+
+    def get_snapshot_response(self, request):
+        # Snapshots are of pages without query strings, which can change the
+        # response (e.g. the deferred columns of standings tables)
+        if request.GET:
+            return None
+
+        parts = [part for part in request.path_info.split('/') if part]
+        if not parts:
+            return None
+
+        manifest = self.get_manifest(parts[0])
+        if manifest is None:
+            return None
+        if manifest['language'] != getattr(request, 'LANGUAGE_CODE', settings.LANGUAGE_CODE):
+            return None
+
+        # Check for the file before anything that needs the database
+        for content_type, filename in SNAPSHOT_INDEX_FILES.items():
+            try:
+                path = safe_join(self.root, *parts, filename)
+            except ValueError:
+                return None
+            if os.path.isfile(path):
+                break
+        else:
+            return None
+
+        if not self.is_page_enabled(request):
+            return None
+        if manifest.get('snapshot_fingerprint') != get_snapshot_fingerprint(parts[0]):
+            return None
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        if content_type == 'text/html':
+            content = content.replace(SNAPSHOT_CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+        response = HttpResponse(content, content_type=content_type + "; charset=utf-8")
+        response['X-Snapshot'] = manifest['created']
+        return response
+
+    def is_page_enabled(self, request):
+        """Checks the page's view would show it, for views that can be
+        disabled by a tournament preference."""
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        view_class = getattr(match.func, 'view_class', None)
+        if view_class is None or not hasattr(view_class, 'is_page_enabled'):
+            return True
+        view = view_class(**getattr(match.func, 'view_initkwargs', {}))
+        view.setup(request, *match.args, **match.kwargs)
+        try:
+            return view.is_page_enabled(view.tournament)
+        except Exception:
+            logger.exception("Error checking whether snapshot of %s is enabled", request.path_info)
+            return False
@@ -2,6 +2,7 @@ import logging
 from secrets import SystemRandom
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
+from django.db import IntegrityError, transaction
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import formats, timezone, translation
@@ -74,6 +75,55 @@ def generate_identifier_string(charset, length):
     return ''.join(SystemRandom().choice(charset) for _ in range(length))
 
 
+def allocate_unique_keys(instances, field, generate, existing, num_attempts=10):
+    """Sets `field` on each of `instances` to a value returned by `generate()`
+    that isn't in `existing`, a set of values already in use. `existing` is
+    updated with the values allocated. Returns the instances that were given
+    values; instances for which no unused value was found within `num_attempts`
+    tries are logged and left unchanged."""
+    allocated = []
+    for instance in instances:
+        for i in range(num_attempts):
+            new_key = generate()
+            if new_key not in existing:
+                setattr(instance, field, new_key)
+                existing.add(new_key)
+                allocated.append(instance)
+                break
+        else:
+            logger.error("Could not generate unique %s for %r after %d tries", field, instance, num_attempts)
+    return allocated
+
+
+def bulk_allocate_unique_keys(instances, field, generate, existing_queryset, num_attempts=10, update_fields=None):
+    """Allocates values of `field` to `instances` using `allocate_unique_keys()`
+    and saves them in a single `bulk_update()`. Values in use are loaded once
+    from `existing_queryset`, which should be a queryset of the model of
+    `instances` covering the scope in which `field` must be unique.
+
+    If the update violates a unique constraint, because another process took
+    one of the values in the meantime, nothing is saved and allocation is
+    retried against a fresh set of existing values, up to `num_attempts` times.
+    Returns the instances that were given values."""
+    instances = list(instances)
+    model = existing_queryset.model
+    fields = [field] + list(update_fields or [])
+
+    for i in range(num_attempts):
+        existing = set(existing_queryset.exclude(**{field + '__isnull': True}).values_list(field, flat=True))
+        allocated = allocate_unique_keys(instances, field, generate, existing, num_attempts)
+        try:
+            with transaction.atomic():
+                model.objects.bulk_update(allocated, fields)
+        except IntegrityError:
+            logger.warning("Collision saving %d new %s values for %s, retrying", len(allocated), field, model.__name__)
+            continue
+        return allocated
+
+    logger.error("Could not save unique %s values for %s after %d tries", field, model.__name__, num_attempts)
+    return []
+
+
 def add_query_string_parameter(url, key, value):
     scheme, netloc, path, params, query, fragment = urlparse(url)
     query_parts = parse_qs(query)
@@ -1,12 +1,14 @@
 import logging
 import os
+from hashlib import md5
+from time import monotonic, sleep, time
 from typing import Optional, TYPE_CHECKING
 
 from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
 from django.db import connection
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.utils.cache import get_cache_key, has_vary_header, learn_cache_key, patch_response_headers
 from django.views.generic.base import ContextMixin
 
 from users.permissions import has_permission
@@ -163,10 +165,94 @@ class WarnAboutLegacySendgridConfigVarsMixin(ContextMixin):
 
 
 class CacheMixin:
-    """Mixin for views that cache the page and need to update quickly."""
-
-    cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
-
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    """Mixin for views that cache the page and need to update quickly.
+
+    Pages are cached as with Django's `cache_page`, varying on the same
+    headers, but only one request rebuilds a page at a time. While it does,
+    other requests get the expired copy if there is one (for up to
+    `cache_stale_timeout` seconds after it expired), or otherwise wait up to
+    `cache_lock_wait` seconds for the new one. The lock is a cache key set with
+    `add()`, so this works with any cache backend shared between workers.
+
+    Pages are fresh for `page_cache_timeout` seconds. Like the `cache_page`
+    decorator this mixin used to apply, this doesn't use views' own
+    `cache_timeout`. If it is 0, pages aren't cached."""
+
+    page_cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
+    cache_stale_timeout = settings.PUBLIC_CACHE_STALE_TIMEOUT
+    cache_lock_timeout = settings.PUBLIC_CACHE_LOCK_TIMEOUT
+    cache_lock_wait = 5
+    cache_key_prefix = 'publicpage'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.page_cache_timeout <= 0:
+            return super().dispatch(request, *args, **kwargs)
+
+        cache_key = get_cache_key(request, self.cache_key_prefix, 'GET', cache=cache)
+        entry = cache.get(cache_key) if cache_key is not None else None
+        lock_key = self._get_cache_lock_key(request, cache_key)
+
+        if entry is not None:
+            fresh_until, response = entry
+            if time() < fresh_until:
+                return self._patch_cached_response(response, fresh_until)
+            if not cache.add(lock_key, True, self.cache_lock_timeout):
+                # Someone else is refreshing it
+                return self._patch_cached_response(response, fresh_until)
+        elif not cache.add(lock_key, True, self.cache_lock_timeout):
+            response = self._wait_for_cached_page(request, lock_key)
+            if response is not None:
+                return response
+            # Give up waiting and build it anyway, without the lock
+            return self._build_and_cache_page(request, *args, **kwargs)
+
+        try:
+            return self._build_and_cache_page(request, *args, **kwargs)
+        finally:
+            cache.delete(lock_key)
+
+    def _get_cache_lock_key(self, request, cache_key):
+        # Before any response has been cached, the headers that the cache key
+        # depends on aren't known, so use the URL
+        if cache_key is None:
+            cache_key = md5(request.build_absolute_uri().encode('ascii'), usedforsecurity=False).hexdigest()
+        return "%s.lock.%s" % (self.cache_key_prefix, cache_key)
+
+    def _wait_for_cached_page(self, request, lock_key):
+        deadline = monotonic() + self.cache_lock_wait
+        while monotonic() < deadline:
+            sleep(0.1)
+            cache_key = get_cache_key(request, self.cache_key_prefix, 'GET', cache=cache)
+            entry = cache.get(cache_key) if cache_key is not None else None
+            if entry is not None:
+                return self._patch_cached_response(entry[1], entry[0])
+            if cache.get(lock_key) is None:
+                return None  # the rebuild finished without caching anything
+        return None
+
+    @staticmethod
+    def _patch_cached_response(response, fresh_until):
+        # The headers were set when the page was cached, so update them to
+        # match the time left, which is none for stale pages
+        del response['Expires']
+        patch_response_headers(response, max(0, round(fresh_until - time())))
+        return response
+
+    def _build_and_cache_page(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+
+        # Same conditions as Django's UpdateCacheMiddleware
+        if response.streaming or response.status_code not in (200, 304):
+            return response
+        if not request.COOKIES and response.cookies and has_vary_header(response, 'Cookie'):
+            return response
+        if 'private' in response.get('Cache-Control', ()):
+            return response
+
+        patch_response_headers(response, self.page_cache_timeout)
+        ttl = self.page_cache_timeout + self.cache_stale_timeout
+        cache_key = learn_cache_key(request, response, ttl, self.cache_key_prefix, cache=cache)
+        cache.set(cache_key, (time() + self.page_cache_timeout, response), ttl)
+        return response
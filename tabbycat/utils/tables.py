@@ -18,6 +18,7 @@ from draw.models import Debate
 from draw.types import DebateSide
 from options.utils import use_team_code_names
 from results.models import BallotSubmission
+from results.prefetch import populate_results
 from results.result import get_result_class
 from standings.templatetags.standingsformat import metricformat, rankingformat
 from tournaments.mixins import SingleObjectByRandomisedUrlMixin
@@ -59,6 +60,7 @@ class BaseTableBuilder:
         self.sort_order = kwargs.get('sort_order', '')
         self.empty_title = kwargs.get('empty_title', _("No Data Available"))
         self.highlight_column = None  # Column index to use for row highlighting (None = no highlighting)
+        self.deferred_columns = None
 
     @staticmethod
     def _convert_header(header):
@@ -147,6 +149,30 @@ class BaseTableBuilder:
                 cells = map(self._convert_cell, cells)
                 row.extend(cells)
 
+    def add_deferred_columns(self, url, keys):
+        """Leaves a place for columns that the browser loads from `url` after
+        the page has loaded, so that large tables don't have to be sent all at
+        once. `url` should return the dict from `keyed_jsondict()` of a table
+        holding just those columns.
+
+        - `keys` must be a list identifying each row (in the same order as
+          existing columns), so that loaded cells can be matched to their rows.
+        """
+        self.deferred_columns = {
+            'url': url,
+            'index': len(self.headers),
+            'keys': list(keys),
+        }
+
+    def keyed_jsondict(self, keys):
+        """Returns the headers and cells of the table, with the cells in a dict
+        keyed by `keys`, one for each row. This is the form in which columns
+        set up by `add_deferred_columns()` are loaded."""
+        return {
+            'head': self.headers,
+            'data': dict(zip(keys, self.data)),
+        }
+
     def jsondict(self):
         """Returns the JSON dict for the table."""
         return {
@@ -159,6 +185,7 @@ class BaseTableBuilder:
             'sort_key': self.sort_key,
             'sort_order': self.sort_order,
             'highlight_column': self.highlight_column,
+            'deferred_columns': self.deferred_columns,
         }
 
 
@@ -431,7 +458,7 @@ class TabbycatTableBuilder(BaseTableBuilder):
         if not hasattr(ts, 'debate_team'):
             return {'text': self.BLANK_TEXT}
 
-        other_teams = {dt.side: self._team_short_name(dt.team) for dt in ts.debate_team.debate.debateteam_set.all()}
+        other_teams = {dt.side: self._team_short_name(dt.team) for dt in ts.debate_team.debate.debateteams}
         n_teams = max(other_teams.keys()) + 1
         other_team_strs = [_("Teams in debate:")]
         for side in range(n_teams):
@@ -591,15 +618,15 @@ class TabbycatTableBuilder(BaseTableBuilder):
 
             return popover_data
 
+        split_ballots = {}
+        if show_splits and (self.admin or self.tournament.pref('show_splitting_adjudicators')):
+            split_ballots = self._get_split_ballots(debates)
+
         for debate in debates:
             adjs_data = []
-            # The purpose of the second condition is to short-circuit debate.confirmed_ballot
-            if show_splits and self.tournament.ballots_per_debate(debate.round.stage) == 'per-adj' \
-                    and debate.confirmed_ballot \
-                    and debate.confirmed_ballot.result.is_voting \
-                    and debate.confirmed_ballot.result.is_valid() \
-                    and (self.admin or self.tournament.pref('show_splitting_adjudicators')):
-                for adj, position, split in debate.confirmed_ballot.result.adjudicators_with_splits():
+            ballotsub = split_ballots.get(debate.id)
+            if ballotsub is not None and ballotsub.result.is_valid():
+                for adj, position, split in ballotsub.result.adjudicators_with_splits():
                     adjs_data.append({'adj': adj, 'position': position, 'split': bool(split)})
             else:
                 for adj, position in debate.adjudicators.with_positions():
@@ -619,6 +646,20 @@ class TabbycatTableBuilder(BaseTableBuilder):
 
         self.add_column({'key': 'adjudicators', 'title': _(title)}, da_data)
 
+    def _get_split_ballots(self, debates):
+        """Returns a dict mapping debate IDs to the confirmed ballots of debates
+        in `debates` that can have splits, i.e. voting ballots, with their full
+        results populated in bulk. Other ballots' full results aren't loaded."""
+        ballotsubs = {}
+        for debate in debates:
+            # The purpose of the first condition is to short-circuit debate.confirmed_ballot
+            if self.tournament.ballots_per_debate(debate.round.stage) != 'per-adj' or not debate.confirmed_ballot:
+                continue
+            if get_result_class(debate.confirmed_ballot, debate.round, self.tournament).is_voting:
+                ballotsubs[debate.id] = debate.confirmed_ballot
+        populate_results([b for b in ballotsubs.values() if not hasattr(b, '_result')], self.tournament)
+        return ballotsubs
+
     def add_debate_motion_column(self, debates):
         """Shows the motions associated with the debates.
         The mechanism depends on whether the 'enable_motions' preferences is enabled:
@@ -848,7 +889,7 @@ class TabbycatTableBuilder(BaseTableBuilder):
         for debate in debates:
             if not debate.confirmed_ballot:
                 ballot_links_data.append(_("No ballot"))
-            elif not debate.confirmed_ballot.result.uses_speakers:
+            elif not debate.confirmed_ballot.result_summary.uses_speakers:
                 ballot_links_data.append(_("No scores"))
             else:
                 ballot_links_data.append({
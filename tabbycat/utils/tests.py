@@ -6,7 +6,10 @@ from unittest import expectedFailure
 from django.contrib.auth import get_user, get_user_model
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import tag, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
@@ -241,6 +244,46 @@ class ConditionalTableViewTestsMixin(TableViewTestsMixin, ConditionalTournamentT
         raise NotImplementedError
 
 
+class QueryBudgetTestMixin:
+    """Mixin for testing that the number of database queries a view makes
+    doesn't grow with the size of the tournament, so that N+1 query issues fail
+    tests rather than being found in production. The view is loaded once for
+    each fixture in `query_budget_fixtures`, each loaded in turn (and rolled
+    back) inside the test, and the query counts must all be equal.
+
+    Subclasses must inherit from TestCase separately, and shouldn't set
+    `fixtures`. If `in_round` is passed to `assertQueryBudgetConstant()`, the
+    view is loaded for the last completed round in each fixture."""
+
+    query_budget_fixtures = ['after_round_1.json', 'after_round_4.json']
+
+    def count_view_queries(self, fixture, view_name, in_round=False, admin=False, **kwargs):
+        with transaction.atomic():
+            call_command('loaddata', fixture, verbosity=0)
+            cache.clear()
+            tournament = Tournament.objects.get()
+            if in_round:
+                kwargs['round_seq'] = tournament.round_set.filter(completed=True).order_by('seq').last().seq
+            if admin:
+                user = get_user_model().objects.create_user('test_admin', is_staff=True, is_superuser=True)
+                self.client.force_login(user)
+            url = reverse_tournament(view_name, tournament, kwargs=kwargs)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, "View %r with fixture %r gave response with status code %d" %
+                (view_name, fixture, response.status_code))
+
+            self.client.logout()
+            transaction.set_rollback(True)
+        return len(queries)
+
+    def assertQueryBudgetConstant(self, view_name, **kwargs):  # noqa: N802
+        counts = {fixture: self.count_view_queries(fixture, view_name, **kwargs) for fixture in self.query_budget_fixtures}
+        self.assertEqual(len(set(counts.values())), 1, "View %r made different numbers of queries "
+            "with different fixtures: %s" % (view_name, counts))
+
+
 class BaseMinimalTournamentTestCase(TestCase):
     """Currently used in availability and participants tests as a pseudo fixture
     to create the basic data to simulate simple tournament functions"""
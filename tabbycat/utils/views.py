@@ -60,15 +60,21 @@ class VueTableTemplateView(TemplateView):
     tables_orientation = 'columns' # Layout option: tables as rows or as columns
 
     def get_context_data(self, **kwargs):
-        tables = self.get_tables()
-
-        tables_dicts = [tb.jsondict() for tb in tables if tb is not None]
-        kwargs["tables_data"] = json.dumps(tables_dicts)
-
-        kwargs["tables_count"] = list(range(len(tables)))
+        if "tables_data" not in kwargs:
+            kwargs.update(self.get_tables_context())
         kwargs["tables_orientation"] = self.tables_orientation
         return super().get_context_data(**kwargs)
 
+    def get_tables_context(self):
+        """Returns the context variables for the tables. Views that cache these
+        can pass them to `get_context_data()` to avoid rebuilding the tables."""
+        tables = self.get_tables()
+        tables_dicts = [tb.jsondict() for tb in tables if tb is not None]
+        return {
+            "tables_data": json.dumps(tables_dicts),
+            "tables_count": list(range(len(tables))),
+        }
+
     def get_table(self):
         raise NotImplementedError("subclasses must implement get_table()")
 
@@ -6,6 +6,7 @@ from django.db.models import Q
 
 from draw.models import Debate
 from draw.types import DebateSide
+from privateurls.utils import bump_landing_version_on_commit
 
 from .models import VenueConstraint
 
@@ -13,8 +14,11 @@ logger = logging.getLogger(__name__)
 
 
 def allocate_venues(round, debates=None):
+    """Allocates venues to the debates in `round` and saves them. Returns the
+    debates, with their new venues set, so that callers can use them without
+    querying them again."""
     allocator = VenueAllocator()
-    allocator.allocate(round, debates)
+    return allocator.allocate(round, debates)
 
 
 class VenueAllocator:
@@ -52,6 +56,9 @@ class VenueAllocator:
         debate_venues.update({debate: None for debate in debates_without_venues})
 
         self.save_venues(debate_venues)
+        # bulk_update() doesn't send signals, so invalidate landing pages here
+        bump_landing_version_on_commit('draw', round.tournament_id)
+        return list(debate_venues.keys())
 
     def collect_constraints(self, debates):
         """Returns a list of tuples `(debate, constraints)`, where `constraints`
@@ -21,9 +21,10 @@ class VenuesWorkerConsumer(EditDebateOrPanelWorkerMixin):
             self.return_error(group, _("Draw is not confirmed, confirm draw to assign rooms."))
             return
 
-        allocate_venues(round)
+        debates = allocate_venues(round)
         self.log_action(event['extra'], round, ActionLogEntry.ActionType.VENUES_AUTOALLOCATE)
 
-        content = self.reserialize_debates(SimpleDebateVenueSerializer, round)
+        # Serialize the debates as allocated, which already have their venues
+        content = self.reserialize_debates(SimpleDebateVenueSerializer, round, debates)
         msg = _("Successfully auto-allocated rooms to debates.")
         self.return_response(content, group, msg, 'success')
@@ -28,19 +28,26 @@ class Venue(models.Model):
 
     @property
     def display_name(self) -> str:
-        categories = self.venuecategory_set.all()
+        categories = [(category.name, category.display_in_venue_name) for category in self.venuecategory_set.all()]
+        return self.format_display_name(self.name, categories)
+
+    @staticmethod
+    def format_display_name(name, categories) -> str:
+        """Returns the display name of a room called `name`, where `categories`
+        is a list of `(name, display_in_venue_name)` pairs, one for each of its
+        categories. For callers that have these without model instances."""
         prefixes = []
         suffixes = []
-        for category in categories:
-            if category.display_in_venue_name == VenueCategory.DISPLAY_PREFIX:
-                prefixes.append(category.name)
-            elif category.display_in_venue_name == VenueCategory.DISPLAY_SUFFIX:
-                suffixes.append(category.name)
+        for category_name, display_in_venue_name in categories:
+            if display_in_venue_name == VenueCategory.DISPLAY_PREFIX:
+                prefixes.append(category_name)
+            elif display_in_venue_name == VenueCategory.DISPLAY_SUFFIX:
+                suffixes.append(category_name)
         display_name = ""
         if prefixes:
             prefixes.sort()
             display_name += ", ".join(prefixes) + " "
-        display_name += self.name
+        display_name += name
         if suffixes:
             suffixes.sort()
             display_name += " " + ", ".join(suffixes)
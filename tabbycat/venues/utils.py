@@ -1,8 +1,10 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 
-from venues.models import VenueConstraint
+from participants.models import Adjudicator, Institution, Team
+from venues.models import VenueCategory, VenueConstraint
 
 
 def venue_conflicts_display(debates):
@@ -12,16 +14,34 @@ def venue_conflicts_display(debates):
     relating to a single participant) is "unfulfilled" if the relevant
     participant had constraints and *none* of their constraints were met."""
 
+    # Collect participants from the (prefetched) debates, so that constraints
+    # and venue categories can be fetched in one query each, however many rooms
+    teams = [team for debate in debates for team in debate.teams]
+    adjudicators = {adj.id for debate in debates for adj in debate.adjudicators.all()}
+    institutions = {team.institution_id for team in teams if team.institution_id is not None}
+
+    team_ct, adj_ct, inst_ct = (ContentType.objects.get_for_model(model).id for model in (Team, Adjudicator, Institution))
+
     constraints = {}
-    for vc in VenueConstraint.objects.filter_for_debates(debates).select_related('category'):
+    for vc in VenueConstraint.objects.filter(
+            Q(subject_content_type_id=team_ct, subject_id__in={team.id for team in teams}) |
+            Q(subject_content_type_id=adj_ct, subject_id__in=adjudicators) |
+            Q(subject_content_type_id=inst_ct, subject_id__in=institutions)).select_related('category'):
         constraints.setdefault((vc.subject_content_type_id, vc.subject_id), []).append(vc)
 
-    def _add_constraint_message(debate, instance, venue, success_message, failure_message, message_args):
-        key = (ContentType.objects.get_for_model(instance).id, instance.id)
+    venue_ids = {debate.venue_id for debate in debates if debate.venue_id is not None}
+    venue_categories = {}
+    for venue_id, category_id in VenueCategory.venues.through.objects.filter(
+            venue_id__in=venue_ids).values_list('venue_id', 'venuecategory_id'):
+        venue_categories.setdefault(venue_id, set()).add(category_id)
+
+    def _add_constraint_message(debate, content_type_id, instance_id, success_message, failure_message, message_args):
+        key = (content_type_id, instance_id)
         if key not in constraints:
             return
+        categories = venue_categories.get(debate.venue_id, set())
         for constraint in constraints[key]:
-            if constraint.category in venue.venuecategory_set.all():
+            if constraint.category_id in categories:
                 message_args['category'] = escape(constraint.category.name)
                 conflict_messages[debate].append(("success", success_message % message_args))
                 return
@@ -30,24 +50,23 @@ def venue_conflicts_display(debates):
 
     conflict_messages = {debate: [] for debate in debates}
     for debate in debates:
-        venue = debate.venue
-        if venue is None:
+        if debate.venue_id is None:
             continue
 
         for team in debate.teams:
-            _add_constraint_message(debate, team, venue,
+            _add_constraint_message(debate, team_ct, team.id,
                 _("Room constraint of %(name)s met (%(category)s)"),
                 _("Room does not meet any constraint of %(name)s"),
                 {'name': escape(team.short_name)})
 
-            if team.institution is not None:
-                _add_constraint_message(debate, team.institution, venue,
+            if team.institution_id is not None:
+                _add_constraint_message(debate, inst_ct, team.institution_id,
                     _("Room constraint of %(team)s met (%(category)s, via institution %(institution)s)"),
                     _("Room does not meet any constraint of institution %(institution)s (%(team)s)"),
                     {'institution': escape(team.institution.code), 'team': escape(team.short_name)})
 
         for adjudicator in debate.adjudicators.all():
-            _add_constraint_message(debate, adjudicator, venue,
+            _add_constraint_message(debate, adj_ct, adjudicator.id,
                 _("Room constraint of %(name)s met (%(category)s)"),
                 _("Room does not meet any constraint of %(name)s"),
                 {'name': escape(adjudicator.name)})